@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+
+# Copyright 2017 Francisco Pina Martins <f.pinamartins@gmail.com>
+# This file is part of structure_threader.
+# structure_threader is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# structure_threader is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
+
+# Usage: python3 normalization_benchmark.py [num_of_Ks] [draws]
+
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from numpy.random import normal as rnorm
+
+from structure_threader.wrappers.maverick_wrapper import \
+    maverick_normalization
+
+
+def scalar_normalization(x_mean, x_sd, klist, draws=int(1e6), limit=95):
+    """
+    The previous implementation of maverick_normalization(), with one draw
+    at a time, kept here as the baseline.
+    """
+    x_mean = [x - max(x_mean) for x in x_mean]
+
+    z_array = np.zeros([len(x_mean), draws], dtype=np.longdouble)
+
+    for i in range(z_array.shape[0]):
+        y_array = np.array([np.exp(rnorm(x_mean[i], x_sd[i]),
+                                   dtype=np.longdouble)
+                            for _ in range(draws)])
+
+        z_array[i] = y_array
+
+    sum_ar = sum(z_array)
+
+    for i in range(draws):
+
+        z_array[:, i] = z_array[:, i] / sum_ar[i]
+
+    l_limit = (100 - limit) / 2
+    u_limit = 100 - l_limit
+
+    norm_res = dict(
+        (k, {"norm_mean": np.mean(z_array[i]),
+             "lower_limit": np.percentile(z_array[i], l_limit),
+             "upper_limit": np.percentile(z_array[i], u_limit)})
+        for i, k in enumerate(klist))
+
+    return norm_res
+
+
+def benchmark(num_ks, draws):
+    """
+    Times both implementations on made up evidences with overlapping
+    intervals, and prints the results side by side, along with the peak
+    memory used by each.
+    """
+    klist = list(range(1, num_ks + 1))
+    x_mean = [-3000 + 2 * np.sqrt(k) for k in klist]
+    x_sd = [0.5] * num_ks
+
+    results = []
+    for func in (scalar_normalization, maverick_normalization):
+        np.random.seed(1)
+        tracemalloc.start()
+        start = time.perf_counter()
+        results.append(func(x_mean, x_sd, klist, draws=draws))
+        results[-1]["secs"] = time.perf_counter() - start
+        results[-1]["peak"] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+    print("{} K values, {} draws".format(num_ks, draws))
+    print("Scalar:     {:.2f}s, {:.0f}MB peak memory".format(
+        results[0]["secs"], results[0]["peak"]))
+    print("Vectorized: {:.2f}s ({:.0f}x faster), {:.0f}MB peak memory".format(
+        results[1]["secs"], results[0]["secs"] / results[1]["secs"],
+        results[1]["peak"]))
+    print("\nK\tmean (scalar / vectorized)\tinterval (scalar / vectorized)")
+    for k in klist:
+        old, new = results[0][k], results[1][k]
+        print("{}\t{:.4f} / {:.4f}\t\t[{:.4f}, {:.4f}] / [{:.4f}, {:.4f}]"
+              .format(k, float(old["norm_mean"]), new["norm_mean"],
+                      float(old["lower_limit"]), float(old["upper_limit"]),
+                      new["lower_limit"], new["upper_limit"]))
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20,
+              int(sys.argv[2]) if len(sys.argv) > 2 else int(1e5))
@@ -0,0 +1,70 @@
+#!/usr/bin/python3
+
+# Copyright 2017 Francisco Pina Martins <f.pinamartins@gmail.com>
+# This file is part of structure_threader.
+# structure_threader is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# structure_threader is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
+
+# Usage: python3 plot_benchmark.py [num_of_individuals] [K]
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from structure_threader.plotter.structplot import PlotList
+
+
+def benchmark(nind, k):
+    """
+    Times the vector (SVG) and raster static plots of a made up Q matrix
+    with nind individuals and K clusters, split into 20 populations, and
+    reports the size of each plot file.
+    """
+    tmpdir = tempfile.mkdtemp()
+    qfile = os.path.join(tmpdir, "fS_run_K.{}.meanQ".format(k))
+    rng = np.random.RandomState(1)
+    np.savetxt(qfile, rng.dirichlet([0.5] * k, size=nind), fmt="%.6f")
+
+    popfile = os.path.join(tmpdir, "popfile")
+    sizes = np.diff(np.linspace(0, nind, 21).astype(int))
+    with open(popfile, "w") as fhandle:
+        for i, size in enumerate(sizes):
+            fhandle.write("Pop{}\t{}\t{}\n".format(i + 1, size, i + 1))
+
+    klist = PlotList([qfile], "faststructure", popfile=popfile)
+    print("{} individuals, K={}".format(nind, k))
+
+    renderers = [("svg", lambda: klist.plotk_static(k, tmpdir))]
+    renderers += [(fmt, lambda fmt=fmt: klist.plotk_raster(k, tmpdir,
+                                                           fmt=fmt))
+                  for fmt in ("png", "pdf")]
+    for fmt, render in renderers:
+        start = time.perf_counter()
+        render()
+        secs = time.perf_counter() - start
+        size = os.path.getsize(os.path.join(tmpdir, "fS_run_K.{}.{}".format(
+            k, fmt)))
+        print("{}: {:.2f}s, {:.1f}MB".format(
+            "Vector SVG" if fmt == "svg" else "Raster " + fmt.upper(), secs,
+            size / 2 ** 20))
+
+    shutil.rmtree(tmpdir)
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20000,
+              int(sys.argv[2]) if len(sys.argv) > 2 else 5)
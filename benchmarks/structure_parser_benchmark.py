@@ -0,0 +1,156 @@
+#!/usr/bin/python3
+
+# Copyright 2017 Francisco Pina Martins <f.pinamartins@gmail.com>
+# This file is part of structure_threader.
+# structure_threader is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# structure_threader is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
+
+# Usage: python3 structure_parser_benchmark.py [num_of_individuals] [K]
+
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from structure_threader.plotter.structplot import PlotK
+
+
+class LoopPlotK(PlotK):
+    """
+    The previous implementation of the STRUCTURE parser, which appends the
+    values of each individual with np.vstack, kept here as the baseline.
+    The USEPOPINFO parser mixed str and int cluster keys, which can not be
+    sorted in python 3, so the key of the assumed population is an int here.
+    """
+
+    def _parse_usepopinfo(self, fhandle, end_string):
+        self.qvals = np.array([])
+        next(fhandle)
+        for line in fhandle:
+            if line.strip() != "":
+                if line.strip().lower().startswith(end_string):
+                    return
+                if self.get_indv:
+                    self.indv.append(line.split()[1])
+                qvalues_dic = defaultdict(float)
+                fields = line.strip().split("|")[:-1]
+                qvalues_dic[int(fields[0].split()[3])] = \
+                    float(fields[0].split()[5])
+                for pop in fields[1:]:
+                    prob = sum(map(float, pop.split()[-3:]))
+                    qvalues_dic[int(pop.split()[1][:-1])] = prob
+                cl_vals = [vals for k, vals in sorted(qvalues_dic.items())]
+                try:
+                    self.qvals = np.vstack((self.qvals, cl_vals))
+                except ValueError:
+                    self.qvals = np.array(cl_vals)
+
+    def _parse_nousepopinfo(self, fhandle, end_string):
+        self.qvals = np.array([])
+        for line in fhandle:
+            if line.strip() != "":
+                if line.strip().lower().startswith(end_string):
+                    return
+                if self.get_indv:
+                    self.indv.append(line.split()[1])
+                fields = line.strip().split()
+                cl_vals = [float(x) for x in fields[5:]]
+                try:
+                    self.qvals = np.vstack((self.qvals, cl_vals))
+                except ValueError:
+                    self.qvals = np.array(cl_vals)
+
+    def _parse_structure(self):
+        parsing_string = "inferred ancestry of individuals:"
+        popinfo_string = "probability of being from assumed " \
+                         "population | prob of other pops"
+        end_parsing_string = "estimated allele frequencies in each " \
+                             "cluster"
+        with open(self.file_path) as flh:
+            for line in flh:
+                if line.strip().lower().startswith(parsing_string):
+                    if next(flh).lower().startswith(popinfo_string):
+                        self._parse_usepopinfo(flh, end_parsing_string)
+                    else:
+                        self._parse_nousepopinfo(flh, end_parsing_string)
+                    break
+
+
+def write_output(filename, nind, k, usepopinfo):
+    """
+    Writes a made up STRUCTURE output file with nind individuals and K
+    clusters, with or without the USEPOPINFO layout.
+    """
+    rng = np.random.RandomState(1)
+    qvals = rng.dirichlet([0.5] * k, size=nind)
+    with open(filename, "w") as fhandle:
+        fhandle.write("Run parameters:\n   {} individuals\n\n".format(nind))
+        fhandle.write("Inferred ancestry of individuals:\n")
+        if usepopinfo:
+            fhandle.write("Probability of being from assumed population | "
+                          "prob of other pops\n")
+            fhandle.write("        Label (%Miss) Pop\n")
+            for i in range(nind):
+                pop = i % k + 1
+                fhandle.write("{:>4} ind{:<8} (0) {:>4} :  {:.3f} | ".format(
+                    i + 1, i + 1, pop, qvals[i, pop - 1]))
+                for other in range(1, k + 1):
+                    if other != pop:
+                        third = qvals[i, other - 1] / 3
+                        fhandle.write("Pop {}: {:.3f} {:.3f} {:.3f} | "
+                                      .format(other, third, third, third))
+                fhandle.write("\n")
+        else:
+            fhandle.write("        Label (%Miss) Pop:  Inferred clusters\n")
+            for i in range(nind):
+                fhandle.write("{:>4} ind{:<8} (0) {:>4} :  {}\n".format(
+                    i + 1, i + 1, 1, " ".join("{:.3f}".format(x)
+                                              for x in qvals[i])))
+        fhandle.write("\n\nEstimated Allele Frequencies in each cluster\n")
+        fhandle.write("Locus 1 :\n")
+
+
+def benchmark(nind, k):
+    """
+    Times both parsers on made up outputs of both layouts, and checks that
+    their results are identical.
+    """
+    tmpdir = tempfile.mkdtemp()
+    print("{} individuals, K={}".format(nind, k))
+    for usepopinfo in (False, True):
+        filename = os.path.join(tmpdir, "str_K{}_rep1_f".format(k))
+        write_output(filename, nind, k, usepopinfo)
+
+        results = []
+        for parser in (LoopPlotK, PlotK):
+            start = time.perf_counter()
+            kobj = parser(filename, "structure", get_indv=True)
+            results.append((time.perf_counter() - start, kobj))
+
+        (old_secs, old), (new_secs, new) = results
+        identical = (np.array_equal(old.qvals, new.qvals) and
+                     list(old.indv) == list(new.indv))
+        print("{}: vstack {:.2f}s, vectorized {:.3f}s ({:.0f}x faster), "
+              "identical results: {}".format(
+                  "USEPOPINFO" if usepopinfo else "Default",
+                  old_secs, new_secs, old_secs / new_secs, identical))
+        os.remove(filename)
+    os.rmdir(tmpdir)
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20000,
+              int(sys.argv[2]) if len(sys.argv) > 2 else 5)
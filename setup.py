@@ -68,6 +68,8 @@ setup(
               "structure_threader.sanity_checks",
               "structure_threader.colorer",
               "structure_threader.wrappers",
+              "structure_threader.scheduler",
+              "structure_threader.stats",
               "structure_threader.skeletons"],
     install_requires=["plotly",
                       "colorlover",
@@ -16,13 +16,16 @@
 # along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
 
 import argparse
-import sys
 import os
 
+from collections import OrderedDict
+
 try:
     import sanity_checks.sanity as sanity
+    import scheduler.deadline as dl
 except ImportError:
     import structure_threader.sanity_checks.sanity as sanity
+    import structure_threader.scheduler.deadline as dl
 
 
 def argument_parser(args):
@@ -54,32 +57,31 @@ def argument_parser(args):
     id_opts = run_parser.add_argument_group(
         "Individual/Population identification options")
     main_exec = run_parser.add_argument_group(
-        "Program execution options. Mutually exclusive")
+        "Program execution options. Use more than one for an ensemble run")
     k_opts = run_parser.add_argument_group("Cluster options")
     run_opts = run_parser.add_argument_group("Structure run options")
     plot_opts = run_parser.add_argument_group("Q-matrix plotting options")
     misc_opts = run_parser.add_argument_group("Miscellaneous options")
 
     # Group options
-    main_exec_ex = main_exec.add_mutually_exclusive_group(required=True)
     k_opts = k_opts.add_mutually_exclusive_group(required=True)
     id_opts = id_opts.add_mutually_exclusive_group(required=False)
 
-    main_exec_ex.add_argument("-st", dest="external_prog", type=str,
-                              default=None,
-                              metavar="filepath",
-                              help="Location of the structure executable "
-                              "in  your environment.")
-    main_exec_ex.add_argument("-fs", dest="external_prog", type=str,
-                              default=None,
-                              metavar="filepath",
-                              help="Location of the fastStructure "
-                              "executable in your environment.")
-    main_exec_ex.add_argument("-mv", dest="external_prog", type=str,
-                              default=None,
-                              metavar="filepath",
-                              help="Location of the MavericK executable "
-                              "in your environment.")
+    main_exec.add_argument("-st", dest="st_prog", type=str,
+                           default=None,
+                           metavar="filepath",
+                           help="Location of the structure executable "
+                           "in  your environment.")
+    main_exec.add_argument("-fs", dest="fs_prog", type=str,
+                           default=None,
+                           metavar="filepath",
+                           help="Location of the fastStructure "
+                           "executable in your environment.")
+    main_exec.add_argument("-mv", dest="mv_prog", type=str,
+                           default=None,
+                           metavar="filepath",
+                           help="Location of the MavericK executable "
+                           "in your environment.")
 
     k_opts.add_argument("-K", dest="k_list", type=int,
                         help="Number of Ks to calculate.\n",
@@ -104,6 +106,16 @@ def argument_parser(args):
     io_opts.add_argument("--params", dest="params", type=str, required=False,
                          help="File with run parameters.",
                          metavar="parameters_file.txt", default=None)
+    io_opts.add_argument("--st_params", dest="st_params", type=str,
+                         required=False,
+                         help="STRUCTURE mainparams file. Overrides "
+                         "--params for STRUCTURE\nin ensemble runs.",
+                         metavar="mainparams", default=None)
+    io_opts.add_argument("--mv_params", dest="mv_params", type=str,
+                         required=False,
+                         help="MavericK parameters file. Overrides "
+                         "--params for MavericK\nin ensemble runs.",
+                         metavar="parameters.txt", default=None)
 
     id_opts.add_argument("--pop", dest="popfile", type=str, required=False,
                          help="File with population information.",
@@ -116,6 +128,77 @@ def argument_parser(args):
                            help="Number of threads to use "
                                 "(default:%(default)s).\n",
                            metavar="int", default=4)
+    misc_opts.add_argument("--adaptive", dest="adaptive",
+                           action="store_const", const=True, default=False,
+                           help="Tune the number of concurrent jobs at "
+                           "runtime to maximize throughput.\nThe value "
+                           "of -t is used as the upper bound.")
+    misc_opts.add_argument("--min_threads", dest="min_threads", type=int,
+                           required=False,
+                           help="Lower bound for the number of concurrent "
+                           "jobs when using --adaptive "
+                           "(default:%(default)s).\n",
+                           metavar="int", default=1)
+    misc_opts.add_argument("--deadline", dest="deadline", type=str,
+                           required=False,
+                           help="Time budget for the run. Jobs are ordered "
+                           "so that one replicate of each K\nruns first, "
+                           "and no job is launched after the deadline.\n"
+                           "Example: 8h, 90m, 1h30m",
+                           metavar="duration", default=None)
+    misc_opts.add_argument("--deadline_policy", dest="deadline_policy",
+                           type=str, required=False,
+                           choices=["kill", "finish"],
+                           help="What to do with running jobs when the "
+                           "deadline is reached (default:%(default)s).\n",
+                           default="kill")
+    misc_opts.add_argument("--pilot", dest="pilot", action="store_const",
+                           const=True, default=False,
+                           help="Launch a very short pilot run for each K "
+                           "before the full runs,\nto check the parameters "
+                           "and estimate the runtime of each job.")
+    misc_opts.add_argument("--hierarchical", dest="hierarchical",
+                           action="store_const", const=True, default=False,
+                           help="Re-run the analysis on each inferred "
+                           "cluster of the best K,\nrecursively, to look "
+                           "for substructure. Only for STRUCTURE\nand "
+                           "fastStructure.")
+    misc_opts.add_argument("--max_depth", dest="max_depth", type=int,
+                           required=False,
+                           help="Maximum number of nested levels of "
+                           "--hierarchical analyses (default:%(default)s).\n",
+                           metavar="int", default=2)
+    misc_opts.add_argument("--min_cluster_size", dest="min_cluster_size",
+                           type=int, required=False,
+                           help="Clusters with fewer individuals are not "
+                           "analysed further\nin --hierarchical runs "
+                           "(default:%(default)s).\n",
+                           metavar="int", default=10)
+    misc_opts.add_argument("--assign_threshold", dest="assign_threshold",
+                           type=float, required=False,
+                           help="Minimum Q value to assign an individual to "
+                           "a cluster\nin --hierarchical runs "
+                           "(default:%(default)s).\n",
+                           metavar="float", default=0.8)
+    misc_opts.add_argument("--mode_threshold", dest="mode_threshold",
+                           type=float, required=False,
+                           help="Minimum similarity (CLUMPP's G') between "
+                           "replicates of\nthe same mode. Only the major "
+                           "mode of each K is\nplotted "
+                           "(default:%(default)s).\n",
+                           metavar="float", default=0.9)
+    misc_opts.add_argument("--mc_tolerance", dest="mc_tolerance",
+                           type=float, required=False,
+                           help="Monte Carlo standard error at which the "
+                           "MavericK evidence\nnormalization stops drawing. "
+                           "Use 0 for a fixed number of\ndraws "
+                           "(default:%(default)s).\n",
+                           metavar="float", default=0)
+    misc_opts.add_argument("--sobol", dest="sobol", action="store_const",
+                           const=True, default=False,
+                           help="Use quasi-random (scrambled Sobol) draws "
+                           "in the MavericK\nevidence normalization. "
+                           "Requires scipy.")
     misc_opts.add_argument("--log", dest="log", type=bool, required=False,
                            help="Choose this option if you want to "
                            "enable logging.",
@@ -149,6 +232,27 @@ def argument_parser(args):
                            help="Use the individual labels in the "
                                 "structure plot instead of population"
                                 " labels")
+    plot_opts.add_argument("--raster", dest="raster", type=str,
+                           required=False, choices=["png", "pdf", "svg"],
+                           help="Draw the static plots as a single image in "
+                           "this format instead of\none vector shape per "
+                           "individual. Recommended for very large sample "
+                           "sizes.", default=None)
+    plot_opts.add_argument("--dpi", dest="dpi", type=int, required=False,
+                           help="Resolution of the --raster plots "
+                           "(default:%(default)s).", metavar="int",
+                           default=300)
+    plot_opts.add_argument("--html_report", dest="report",
+                           action="store_const", const=True,
+                           help="Write the interactive plots as a single "
+                           "index page that loads\neach plot on demand, "
+                           "instead of one standalone HTML file per plot.")
+    plot_opts.add_argument("--pop_summary", dest="pop_summary",
+                           action="store_const", const=True,
+                           help="Also write the mean, median and standard "
+                           "deviation of the Q values\nof each population, "
+                           "as a table and as a plot. Requires --pop or "
+                           "--ind.")
 
     # ####################### PLOT ARGUMENTS ##################################
     # Group definitions
@@ -190,6 +294,31 @@ def argument_parser(args):
                             help="Use the individual labels in the "
                                  "structure plot instead of population"
                                  " labels")
+    extra_opts.add_argument("--raster", dest="raster", type=str,
+                            choices=["png", "pdf", "svg"], default=None,
+                            help="Draw the static plots as a single image "
+                                 "in this format instead of one vector "
+                                 "shape per individual. Recommended for "
+                                 "very large sample sizes.")
+    extra_opts.add_argument("--dpi", dest="dpi", type=int, default=300,
+                            help="Resolution of the --raster plots "
+                                 "(default:%(default)s).", metavar="int")
+    extra_opts.add_argument("--html_report", dest="report",
+                            action="store_const", const=True,
+                            help="Write the interactive plots as a single "
+                                 "index page that loads each plot on "
+                                 "demand, instead of one standalone HTML "
+                                 "file per plot.")
+    extra_opts.add_argument("--pop_summary", dest="pop_summary",
+                            action="store_const", const=True,
+                            help="Also write the mean, median and standard "
+                                 "deviation of the Q values of each "
+                                 "population, as a table and as a plot.")
+    extra_opts.add_argument("-t", dest="threads", type=int, default=1,
+                            help="Number of processes used to read the "
+                                 "result files and draw the plots "
+                                 "(default:%(default)s).",
+                            metavar="int")
 
     sort_opts_ex.add_argument("--pop", dest="popfile", type=str,
                               required=False,
@@ -227,11 +356,26 @@ def argument_sanity(arguments, parser):
     Performs some sanity checks on the user provided arguments.
     """
     if arguments.main_op == "run":
-        # External program
-        sanity.file_checker(arguments.external_prog,
-                            "Could not find your external program in "
-                            "the specified path "
-                            "'{}'.".format(arguments.external_prog))
+        # External programs, in the order their jobs are scheduled. More
+        # than one program makes an ensemble run.
+        arguments.programs = OrderedDict(
+            (name, path) for name, path in
+            (("structure", arguments.st_prog),
+             ("maverick", arguments.mv_prog),
+             ("faststructure", arguments.fs_prog)) if path is not None)
+        if not arguments.programs:
+            parser.error("one of the arguments -st -fs -mv is required")
+        for external_prog in arguments.programs.values():
+            sanity.file_checker(external_prog,
+                                "Could not find your external program in "
+                                "the specified path "
+                                "'{}'.".format(external_prog))
+        if len(arguments.programs) == 1:
+            arguments.wrapped_prog, arguments.external_prog = \
+                list(arguments.programs.items())[0]
+        else:
+            arguments.wrapped_prog = "ensemble"
+            arguments.external_prog = None
 
         # Input file
         sanity.file_checker(arguments.infile,
@@ -251,29 +395,79 @@ def argument_sanity(arguments, parser):
                 " --".join(arguments.extra_options.split())
 
         # fastStructure is really only usefull with either a pop or indfile...
-        if "-fs" in sys.argv and\
+        if "faststructure" in arguments.programs and\
             arguments.popfile is None and\
                 arguments.indfile is None:
             parser.error("-fs requires either --pop or --ind.")
 
         # Make sure we provide paths for mainparam, extraparams and
-        # parameters.txt  depending on the wrapped program.
-        if arguments.params is not None:
-            arguments.params = os.path.abspath(arguments.params)
-        if "-mv" in sys.argv and arguments.params is None:
-            parser.error("-mv requires --params.")
-        elif "-mv" in sys.argv:
-            sanity.file_checker(os.path.abspath(arguments.params))
+        # parameters.txt  depending on the wrapped program(s).
+        for params in ("params", "st_params", "mv_params"):
+            if getattr(arguments, params) is not None:
+                setattr(arguments, params,
+                        os.path.abspath(getattr(arguments, params)))
+        arguments.program_params = {
+            "structure": arguments.st_params or arguments.params,
+            "maverick": arguments.mv_params or arguments.params,
+            "faststructure": None}
+        if "maverick" in arguments.programs:
+            if arguments.program_params["maverick"] is None:
+                parser.error("-mv requires --params or --mv_params.")
+            sanity.file_checker(arguments.program_params["maverick"])
+        if len(arguments.programs) == 1:
+            arguments.params = \
+                arguments.program_params[arguments.wrapped_prog]
 
         # Number of replicates
         arguments.replicates = range(1, arguments.replicates + 1)
 
         arguments.threads = sanity.cpu_checker(arguments.threads)
 
+        if arguments.adaptive and arguments.min_threads > arguments.threads:
+            parser.error("--min_threads can not be larger than -t.")
+
+        if arguments.mc_tolerance < 0:
+            parser.error("--mc_tolerance can not be negative.")
+        elif arguments.mc_tolerance == 0:
+            arguments.mc_tolerance = None
+
+        if arguments.hierarchical is True:
+            if arguments.wrapped_prog not in ("structure", "faststructure"):
+                parser.error("--hierarchical can only be used with either "
+                             "-st or -fs.")
+            if arguments.notests is not False:
+                parser.error("--hierarchical requires the bestK tests.")
+            if arguments.infile.endswith((".bed", ".bim", ".fam")):
+                parser.error("--hierarchical can not be used with PLINK "
+                             "input files.")
+            if not 0 < arguments.assign_threshold <= 1:
+                parser.error("--assign_threshold must be between 0 and 1.")
+
+        if not 0 < arguments.mode_threshold <= 1:
+            parser.error("--mode_threshold must be between 0 and 1.")
+
+        if arguments.dpi <= 0:
+            parser.error("--dpi must be a positive number.")
+
+        # Time budget, in seconds. The absolute deadline is only set once the
+        # run starts.
+        arguments.deadline_end = None
+        if arguments.deadline is not None:
+            deadline = dl.parse_duration(arguments.deadline)
+            if not deadline:
+                parser.error("Invalid --deadline '{}'. Use a duration such "
+                             "as 8h, 90m or 1h30m.".format(
+                                 arguments.deadline))
+            arguments.deadline = deadline
+
     elif arguments.main_op == "plot":
         if arguments.program == "faststructure" and arguments.popfile is None\
                 and arguments.indfile is None:
             parser.error("fastStructure plots require either --pop or --ind.")
+        arguments.threads = sanity.cpu_checker(arguments.threads)
+
+        if arguments.dpi <= 0:
+            parser.error("--dpi must be a positive number.")
 
     elif arguments.main_op == "run" or arguments.main_op == "plot":
         # Check the existance of several files:
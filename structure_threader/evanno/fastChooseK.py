@@ -39,21 +39,56 @@
 
 
 import glob
+import os
+import re
 import numpy as np
 
+try:
+    from evanno.harvest_index import HarvestIndex, INDEX_FILE
+    from stats.results_store import open_store
+except ImportError:
+    from structure_threader.evanno.harvest_index import HarvestIndex, \
+        INDEX_FILE
+    from structure_threader.stats.results_store import open_store
 
-insum = lambda x, axes: np.apply_over_axes(np.sum, x, axes)
+
+# fastStructure writes the marginal likelihood at the end of the log, so only
+# this many bytes from the end are read at first.
+LOG_TAIL_BYTES = 4096
+
+# K is the number before the extension, whatever the prefix of the run (so
+# replicates may use different prefixes).
+K_VALUE_RE = re.compile(r"\.(\d+)\.(?:log|meanQ)$")
 
 
 # class Exception(Exception):
 #     pass
 
 
+def read_tail(file, size):
+    """
+    Returns the complete lines in the last size bytes of a file.
+    """
+    with open(file, 'rb') as handle:
+        handle.seek(0, os.SEEK_END)
+        start = max(0, handle.tell() - size)
+        handle.seek(start)
+        tail = handle.read().decode()
+
+    if start > 0:
+        # Drop the partial first line
+        tail = tail[tail.find('\n') + 1:]
+
+    return tail.splitlines()
+
+
 def parse_logs(files):
     """
     Parses through log files to extract marginal
     likelihood estimates from executing the
     variational inference algorithm on a dataset.
+    Only the tail of each log is read, unless the
+    estimate is not found there.
 
     Arguments:
 
@@ -62,18 +97,35 @@ def parse_logs(files):
     """
     marginal_likelihood = []
     for file in files:
-        handle = open(file, 'r')
-        for line in handle:
+        lines = read_tail(file, LOG_TAIL_BYTES)
+        if not any('Marginal Likelihood' in line for line in lines):
+            handle = open(file, 'r')
+            lines = handle.readlines()
+            handle.close()
+        for line in lines:
             if 'Marginal Likelihood' in line:
                 m = float(line.strip().split('=')[1])
                 marginal_likelihood.append(m)
                 break
-        handle.close()
 
     return marginal_likelihood
 
 
-def parse_varQs(files):
+def read_meanQ(file):
+    """
+    Reads a .meanQ file into an individuals x K array in
+    a single pass, splitting the whole text at once instead
+    of parsing it line by line.
+    """
+    handle = open(file, 'r')
+    text = handle.read()
+    handle.close()
+
+    columns = len(text[:text.find('\n')].split())
+    return np.array(text.split(), dtype=float).reshape(-1, columns)
+
+
+def parse_varQs(files, store=None):
     """
     Parses through multiple .meanQ files to extract the mean
     admixture proportions estimated by executing the
@@ -85,14 +137,21 @@ def parse_varQs(files):
 
         files : list
             list of .meanQ file names
+
+        store : ResultsStore
+            optional results store the .meanQ files are
+            read from, when they are stored there
     """
     bestKs = []
 
     for file in files:
-        handle = open(file, 'r')
-        Q = np.array([list(map(float, line.strip().split())) for line in handle])
-        Q = Q/insum(Q, [1])
-        handle.close()
+        Q = None
+        if store is not None:
+            Q = store.qvals(file, 'faststructure')
+        if Q is None:
+            Q = read_meanQ(file)
+        Q = np.asarray(Q).reshape(Q.shape[0], -1)
+        Q = Q / Q.sum(axis=1, keepdims=True)
 
         N = Q.shape[0]
         C = np.cumsum(np.sort(Q.sum(0))[::-1])
@@ -100,19 +159,69 @@ def parse_varQs(files):
 
     return bestKs
 
-def main(indir, outpath):
+
+def model_components(file):
+    """
+    Returns the number of model components used to explain structure in
+    the data of a .meanQ file. Defined at module level, so that the files
+    can be parsed on a pool of processes.
+    """
+    return int(parse_varQs([file])[0])
+
+
+def k_values(files):
+    """
+    Returns the files whose names end in .<K>.log or .<K>.meanQ and their K
+    values.
+    """
+    matches = [(file, K_VALUE_RE.search(file)) for file in files]
+
+    return ([file for file, m in matches if m is not None],
+            [int(m.group(1)) for file, m in matches if m is not None])
+
+
+def main(indir, outpath, threads=1):
     """
     Main function that runs everything in order.
+    When there are several replicates of a K (runs with different prefixes
+    in indir), their marginal likelihoods are averaged and all their
+    .meanQ files count for the model components.
+    The logs are read by a pool of threads, since only their tail is read,
+    and the .meanQ files are parsed by a pool of processes.
     """
     if indir.endswith("/") is False:
         indir = indir + "/"
 
-    files = glob.glob('%s*.log'%indir)
-    Ks = np.array([int(file.split('.')[-2]) for file in files])
-    marginal_likelihoods = parse_logs(files)
-
-    files = glob.glob('%s*.meanQ'%indir)
-    bestKs = parse_varQs(files)
+    # Parsed values are cached, so that a rerun only parses new files
+    index = HarvestIndex(os.path.join(outpath, INDEX_FILE))
+
+    # Values stored when the runs finished are not parsed again
+    store = open_store(indir)
+
+    def parse_log(file):
+        stats = store.stats(file[:-len('.log')] + '.meanQ', 'faststructure')
+        if stats is not None and 'marginal_likelihood' in stats:
+            return stats['marginal_likelihood']
+        return parse_logs([file])
+
+    files, Ks = k_values(glob.glob('%s*.log'%indir))
+    likelihoods = {}
+    for K, ml in zip(Ks, index.values(files, parse_log, threads)):
+        likelihoods.setdefault(K, []).extend(ml)
+    Ks = np.array(sorted(K for K in likelihoods if likelihoods[K]))
+    marginal_likelihoods = [np.mean(likelihoods[K]) for K in Ks]
+
+    # Stored Q matrices are memory mapped, so only the other .meanQ files
+    # are worth sending to the pool of processes
+    files = k_values(glob.glob('%s*.meanQ'%indir))[0]
+    stored = set(x for x in files
+                 if store.lookup(x, 'faststructure') is not None)
+    bestKs = index.values([x for x in files if x in stored],
+                          lambda x: int(parse_varQs([x], store)[0]))
+    bestKs += index.values([x for x in files if x not in stored],
+                           model_components, threads, processes=True)
+
+    index.save()
 
     outfile = open(outpath + "/chooseK.txt", "w")
     ml = "Model complexity that maximizes marginal likelihood = %d\n"\
@@ -0,0 +1,180 @@
+#!/usr/bin/python3
+
+# Copyright 2017 Francisco Pina Martins <f.pinamartins@gmail.com>
+# This file is part of structure_threader.
+# structure_threader is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# structure_threader is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from threading import Lock
+
+try:
+    from scheduler.job_pool import process_context
+except ImportError:
+    from structure_threader.scheduler.job_pool import process_context
+
+# Name of the index file, written to the bestK tests output directory
+INDEX_FILE = "harvest_index.jsonl"
+
+# Only the start of each file is hashed, so that checking an entry is much
+# cheaper than parsing the file again.
+HASH_BYTES = 65536
+
+
+def file_signature(filename):
+    """
+    Returns the (size, mtime, hash) signature of a file, where hash is the
+    SHA-1 of its first HASH_BYTES bytes.
+    """
+    stat = os.stat(filename)
+    with open(filename, "rb") as fhandle:
+        digest = hashlib.sha1(fhandle.read(HASH_BYTES)).hexdigest()
+
+    return stat.st_size, stat.st_mtime_ns, digest
+
+
+class HarvestIndex(object):
+    """
+    Persistent cache of the values parsed from result files, so that a
+    re-harvest only parses the files that are new or were changed since the
+    previous one. The index is a JSON-lines file with one entry per result
+    file, holding its path (relative to the index), signature and values.
+    """
+
+    def __init__(self, filename=None):
+        """
+        :param filename: (str) Path to the index file. It is loaded if it
+        exists. If None, the index is only kept in memory.
+        """
+        self.filename = filename
+        """
+        Index entries, keyed by relative path: {"size": int, "mtime": int,
+        "hash": str, "values": values}.
+        """
+        self.entries = {}
+        """
+        Keys of the entries that were used or updated since the index was
+        loaded. Only these are saved, which drops removed files.
+        """
+        self.seen = set()
+        """Number of files that had to be parsed by values()."""
+        self.parsed = 0
+        self._lock = Lock()
+
+        if filename is not None and os.path.isfile(filename):
+            with open(filename) as fhandle:
+                for line in fhandle:
+                    try:
+                        entry = json.loads(line)
+                        self.entries[entry.pop("path")] = entry
+                    except (ValueError, KeyError, AttributeError):
+                        # A truncated or corrupted line is just a cache miss
+                        continue
+
+    def _key(self, path):
+        """
+        Returns the index key of a result file.
+        """
+        if self.filename is None:
+            return os.path.abspath(path)
+        return os.path.relpath(os.path.abspath(path),
+                               os.path.dirname(os.path.abspath(self.filename)))
+
+    def lookup(self, path):
+        """
+        Returns the cached values of a result file, or None if the file is not
+        in the index or changed since it was indexed.
+        """
+        key = self._key(path)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        size, mtime, digest = file_signature(path)
+        if (entry["size"], entry["mtime"], entry["hash"]) != (size, mtime,
+                                                              digest):
+            return None
+
+        with self._lock:
+            self.seen.add(key)
+
+        return entry["values"]
+
+    def update(self, path, values):
+        """
+        Stores the values parsed from a result file. The values must be JSON
+        serializable.
+        """
+        key = self._key(path)
+        size, mtime, digest = file_signature(path)
+        with self._lock:
+            self.entries[key] = {"size": size, "mtime": mtime, "hash": digest,
+                                 "values": values}
+            self.seen.add(key)
+
+    def values(self, files, parse, threads=1, processes=False):
+        """
+        Returns [parse(x) for x in files], taking the values from the index
+        where possible. The other files are parsed on a pool of threads, or
+        of processes when processes is True, and added to the index.
+        Exceptions raised by parse are propagated.
+        :param parse: (callable) Parses one result file into JSON serializable
+        values. It must be picklable (a module level function) when processes
+        is True.
+        :param processes: (bool) Parse the files on a pool of processes, for
+        CPU bound parsers that would hold the GIL in a thread pool.
+        """
+        results = [self.lookup(x) for x in files]
+        stale = [i for i, x in enumerate(results) if x is None]
+
+        # Spawning processes is only worth it for more than one file
+        if processes and threads > 1 and len(stale) > 1:
+            with ProcessPoolExecutor(max_workers=min(threads, len(stale)),
+                                     mp_context=process_context()) \
+                    as executor:
+                parsed = list(executor.map(parse, [files[i] for i in stale]))
+            for i, values in zip(stale, parsed):
+                self.update(files[i], values)
+                results[i] = values
+        else:
+            def _parse(i):
+                values = parse(files[i])
+                self.update(files[i], values)
+                return values
+
+            with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+                for i, values in zip(stale, executor.map(_parse, stale)):
+                    results[i] = values
+
+        self.parsed += len(stale)
+
+        return results
+
+    def save(self):
+        """
+        Writes the index file, keeping only the entries of the files that were
+        seen since it was loaded. The file is replaced atomically, so an
+        interrupted harvest never leaves a broken index behind.
+        """
+        if self.filename is None:
+            return
+
+        tmpfile = self.filename + ".tmp"
+        with open(tmpfile, "w") as fhandle:
+            for key in sorted(self.seen):
+                entry = dict(self.entries[key], path=key)
+                fhandle.write(json.dumps(entry, sort_keys=True) + "\n")
+        os.replace(tmpfile, self.filename)
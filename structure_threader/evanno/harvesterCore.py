@@ -57,14 +57,26 @@ FROM,
 OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 """
-import math
 import os
 import re
 import time
 import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+  from scheduler.job_pool import process_context
+except ImportError:
+  from structure_threader.scheduler.job_pool import process_context
 
 __version__ = 'vA.2 July 2014' # alpha.number convention for core
 EPSILON = 0.0000001 # for determining if a stdev ~ 0
+BOOTSTRAP_RESAMPLES = 2000
+BOOTSTRAP_CHUNK = 2 ** 22 # max. number of resampled values held at once
+BOOTSTRAP_SPLITS = 16 # min. number of chunks, to spread over processes
+BOOTSTRAP_SEED = 0 # so that evanno.txt is the same for the same runs
 
 
 class HarvesterError(Exception): pass
@@ -99,6 +111,10 @@ class Data:
     self.LnPK            = None
     self.LnPPK           = None
     self.deltaK          = None
+    self.lnProbs         = None
+    self.deltaKLower     = None
+    self.deltaKUpper     = None
+    self.pBest           = None
 
 
 class RunRecord:
@@ -251,37 +267,57 @@ def writeRawOutputToFile(filename, data):
   file.close()
 
 
+# A single pattern for all the header values, in the order of
+# addAttribute()'s pattern types. Lines are matched after stripping
+# leading whitespace, like STRUCTURE's indented "Run parameters".
+HEADER_RE = re.compile(
+    r'^[ \t]*(?:'
+    r'(?P<indivs>\d+) individuals|'
+    r'(?P<loci>\d+) loci|'
+    r'(?P<k>\d+) populations assumed|'
+    r'(?P<burnin>\d+) Burn\-in period|'
+    r'(?P<reps>\d+) Reps|'
+    # nan, inf
+    r'Estimated Ln Prob of Data\s+=\s+(?P<lnprob>[\d.$nainf-]+)|'
+    r'Mean value of ln likelihood\s+=\s+(?P<meanln>[\d.$nainf-]+)|'
+    r'Variance of ln likelihood\s+=\s+(?P<varln>[\d.$nainf-]+))',
+    re.MULTILINE)
+VARLN_RE = re.compile(r'^[ \t]*Variance of ln likelihood\s+=\s+'
+                      r'[\d.$nainf-]+', re.MULTILINE)
+RUN_NUMBER_RE = re.compile(r'.*_(\d+)_f$')
+CHUNK_SIZE = 16384
+
+
+def readHeader(filename, chunkSize=CHUNK_SIZE):
+  """ Returns the text of filename up to the end of the "Variance of ln
+  likelihood" line, which is the last of the values we need, reading it in
+  chunks of chunkSize characters. The Q-matrix and allele frequencies that
+  follow are never read. Returns the whole file if the line is missing.
+  """
+  text = ''
+  with open(filename, 'r') as infile:
+    while True:
+      chunk = infile.read(chunkSize)
+      # Only search from the start of the line the previous chunk ended in
+      start = text.rfind('\n') + 1
+      text += chunk
+      m = VARLN_RE.search(text, start)
+      if m != None:
+        end = text.find('\n', m.end())
+        if end != -1:
+          return text[:end + 1]
+      if chunk == '':
+        return text
+
+
 def readFile(filename, data):
   run = RunRecord()
   run.name = os.path.basename(filename)
-  m = re.search(r'.*_(\d+)_f$', run.name)
+  m = RUN_NUMBER_RE.search(run.name)
   if m != None:
     run.runNumber = m.group(1)
-  regExs = {'indivs' : r'^(\d+) individuals.*$',
-              'loci'   : r'^(\d+) loci.*$',
-              'k'      : r'^(\d+) populations assumed.*$',
-              'burnin' : r'^(\d+) Burn\-in period.*$',
-              'reps'   : r'^(\d+) Reps.*$',
-              # nan, inf
-              'lnprob' : r'^Estimated Ln Prob of Data\s+=\s+([\d.$nainf-]+).*$',
-              'meanln' : r'^Mean value of ln likelihood\s+=\s+([\d.$nainf-]+).*$',
-              'varln'  : r'^Variance of ln likelihood\s+=\s+([\d.$nainf-]+).*$',
-            }
-  pats = {}
-  for r in regExs:
-    pats[r] = re.compile(regExs[r])
-  isDone = False
-  with open(filename, 'r') as infile:
-    for line in infile:
-      if isDone:
-        break
-      line = line.strip()
-      for p in pats:
-        m = re.match(pats[p], line)
-        if m != None:
-          addAttribute(p, m.group(1), run, data)
-          if p == 'varln':
-            isDone = True
+  for m in HEADER_RE.finditer(readHeader(filename)):
+    addAttribute(m.lastgroup, m.group(m.lastgroup), run, data)
   return validateRecord(run)
 
 
@@ -365,20 +401,53 @@ def evannoTests(data, isWeb=False):
   return None
 
 
+def lnProbArray(data):
+  """ Returns the est. Ln Prob of Data values of data.records as a
+  K x replicate array, in the order of data.sortedKs. When the number of
+  replicates differs between K values, the missing ones are NaN.
+  """
+  reps = max(len(data.records[k]) for k in data.sortedKs)
+  lnProbs = np.full((len(data.sortedKs), reps), np.nan)
+  for i, k in enumerate(data.sortedKs):
+    lnProbs[i, :len(data.records[k])] = [r.estLnProb for r in data.records[k]]
+  return lnProbs
+
+
+def meansAndSds(lnProbs, counts):
+  """ Returns the means and sample standard deviations along the last axis of
+  lnProbs, using only the first counts values of each row (counts is
+  broadcast against lnProbs without its last axis). The standard deviation
+  of a single replicate is 0.
+  """
+  mask = np.arange(lnProbs.shape[-1]) < counts[..., np.newaxis]
+  values = np.where(mask, lnProbs, 0.0)
+  means = values.sum(axis=-1) / counts
+  squares = np.where(mask, values - means[..., np.newaxis], 0.0) ** 2
+  sds = np.sqrt(squares.sum(axis=-1) / np.maximum(counts - 1, 1))
+  return means, sds
+
+
+def evannoArrays(means, sds):
+  """ Returns the L'(K), |L''(K)| and delta K arrays (along the last axis)
+  for consecutive K values with the given means and standard deviations.
+  L'(K) starts at the second K, the other two at the second K and end at the
+  second to last K. Delta K is NaN where the standard deviation is 0.
+  """
+  LnPK = np.diff(means, axis=-1)
+  LnPPK = np.abs(np.diff(LnPK, axis=-1))
+  with np.errstate(divide='ignore', invalid='ignore'):
+    deltaK = (np.abs(means[..., 2:] - 2.0 * means[..., 1:-1] +
+                     means[..., :-2]) / sds[..., 1:-1])
+  deltaK[sds[..., 1:-1] == 0] = np.nan
+  return LnPK, LnPPK, deltaK
+
+
 def calculateMeansAndSds(data):
-  data.estLnProbMeans = {}
-  data.estLnProbStdevs = {}
-  for k in data.records:
-    data.estLnProbMeans[k] = 0
-    data.estLnProbStdevs[k] = 0
-    for r in data.records[k]:
-      data.estLnProbMeans[k] += r.estLnProb
-    data.estLnProbMeans[k] /= len(data.records[k])
-    if len(data.records[k]) > 1:
-      for r in data.records[k]:
-        data.estLnProbStdevs[k] += (r.estLnProb - data.estLnProbMeans[k]) ** 2
-      data.estLnProbStdevs[k] /= (len(data.records[k]) - 1)
-      data.estLnProbStdevs[k] = math.sqrt(data.estLnProbStdevs[k])
+  data.lnProbs = lnProbArray(data)
+  counts = np.array([len(data.records[k]) for k in data.sortedKs])
+  means, sds = meansAndSds(data.lnProbs, counts)
+  data.estLnProbMeans = dict(zip(data.sortedKs, means.tolist()))
+  data.estLnProbStdevs = dict(zip(data.sortedKs, sds.tolist()))
 
 
 def calculatePrimesDoublePrimesDeltaK(data):
@@ -394,20 +463,69 @@ def calculatePrimesDoublePrimesDeltaK(data):
   values for both the previous K, 'prevK' and the next K, 'nextK'. So if you run
   Structure for K = 1..20, you'll only get delta K for K = 2..19.
   """
-  data.LnPK = {}
-  data.LnPPK = {}
-  data.deltaK = {}
-  for i in range(1, len(data.sortedKs)):
-    thisK = data.sortedKs[i]
-    prevK = data.sortedKs[i - 1]
-    data.LnPK[thisK] = data.estLnProbMeans[thisK] - data.estLnProbMeans[prevK]
-  for i in range(1, len(data.sortedKs) - 1):
-    prevK = data.sortedKs[i - 1]
-    thisK = data.sortedKs[i]
-    nextK = data.sortedKs[i + 1]
-    data.LnPPK[thisK] = abs(data.LnPK[nextK] - data.LnPK[thisK])
-    # data.deltaK[thisK] = data.LnPPK[thisK] / float(data.estLnProbStdevs[thisK])
-    data.deltaK[thisK] = (abs(data.estLnProbMeans[nextK] -
-                              2.0 * data.estLnProbMeans[thisK] +
-                              data.estLnProbMeans[prevK]) /
-                          float(data.estLnProbStdevs[thisK]))
+  means = np.array([data.estLnProbMeans[k] for k in data.sortedKs])
+  sds = np.array([data.estLnProbStdevs[k] for k in data.sortedKs])
+  LnPK, LnPPK, deltaK = evannoArrays(means, sds)
+  # evannoTests() makes sure that no stdev is ~0 here
+  data.LnPK = dict(zip(data.sortedKs[1:], LnPK.tolist()))
+  data.LnPPK = dict(zip(data.sortedKs[1:-1], LnPPK.tolist()))
+  data.deltaK = dict(zip(data.sortedKs[1:-1], deltaK.tolist()))
+
+
+def bootstrapChunk(lnProbs, counts, resamples, seed):
+  """ Makes resamples bootstrap resamples of the replicates of every K and
+  returns the resampled delta K values as a resamples x (K - 2) array.
+  """
+  rng = np.random.default_rng(seed)
+  picks = (rng.random((resamples,) + lnProbs.shape) *
+           counts[:, np.newaxis]).astype(int)
+  values = lnProbs[np.arange(lnProbs.shape[0])[:, np.newaxis], picks]
+  means, sds = meansAndSds(values, counts)
+  return evannoArrays(means, sds)[2]
+
+
+def bootstrapDeltaK(data, resamples=BOOTSTRAP_RESAMPLES, confidence=95,
+                    processes=1, seed=BOOTSTRAP_SEED):
+  """ Bootstraps the replicates of each K (resampling them with replacement)
+  to estimate how much delta K depends on the particular runs that were
+  made. Fills the following dictionaries keyed on the K values of
+  data.deltaK:
+  data.deltaKLower, data.deltaKUpper : the limits of the confidence% interval
+  of delta K
+  data.pBest : the fraction of resamples in which each K has the largest
+  delta K
+  Resamples where all the replicates of a K are the same give no delta K for
+  that K, and are left out of its interval. The resamples are made in at
+  least BOOTSTRAP_SPLITS chunks, which are spread over the processes. Each
+  chunk gets its own seed, derived from seed, so the results only depend on
+  the seed and not on the number of processes.
+  """
+  counts = np.array([len(data.records[k]) for k in data.sortedKs])
+  chunk = max(1, min(-(-resamples // BOOTSTRAP_SPLITS),
+                     BOOTSTRAP_CHUNK // data.lnProbs.size))
+  sizes = [min(chunk, resamples - x) for x in range(0, resamples, chunk)]
+  seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+  args = ([data.lnProbs] * len(sizes), [counts] * len(sizes), sizes, seeds)
+  if processes > 1 and len(sizes) > 1:
+    with ProcessPoolExecutor(max_workers=processes,
+                             mp_context=process_context()) as executor:
+      deltaKs = np.vstack(list(executor.map(bootstrapChunk, *args)))
+  else:
+    deltaKs = np.vstack(list(map(bootstrapChunk, *args)))
+
+  lowerLimit = (100 - confidence) / 2
+  with warnings.catch_warnings():
+    # K values without any delta K get a NaN interval
+    warnings.simplefilter('ignore', RuntimeWarning)
+    lower, upper = np.nanpercentile(deltaKs, [lowerLimit, 100 - lowerLimit],
+                                    axis=0)
+  # The best K of each resample, among the ones with a delta K
+  valid = ~np.all(np.isnan(deltaKs), axis=1)
+  best = np.argmax(np.where(np.isnan(deltaKs), -np.inf, deltaKs)[valid],
+                   axis=1)
+  pBest = np.bincount(best, minlength=deltaKs.shape[1]) / max(1, valid.sum())
+
+  Ks = data.sortedKs[1:-1]
+  data.deltaKLower = dict(zip(Ks, lower.tolist()))
+  data.deltaKUpper = dict(zip(Ks, upper.tolist()))
+  data.pBest = dict(zip(Ks, pBest.tolist()))
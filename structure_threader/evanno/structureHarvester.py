@@ -61,8 +61,13 @@ import os
 import time
 try:
     import evanno.harvesterCore as hc
+    from evanno.harvest_index import HarvestIndex, INDEX_FILE
+    from stats.results_store import open_store
 except ImportError:
     import structure_threader.evanno.harvesterCore as hc
+    from structure_threader.evanno.harvest_index import HarvestIndex, \
+        INDEX_FILE
+    from structure_threader.stats.results_store import open_store
 
 
 __version__ = 'v0.6.94 July 2014'
@@ -80,32 +85,51 @@ def unexpectedValue(filename, valuename, value, data):
                    % (filename, valuename, value))
 
 
-def harvestFiles(data, resultsdir):
+def harvestFiles(data, resultsdir, threads=1, index=None, store=None):
+  """ Parses every _f file in resultsdir into data.records. The files are
+  read concurrently by a pool of threads, since this is mostly waiting for
+  I/O, but the records keep the order of the (serial) glob. If a
+  HarvestIndex is given, only the files that are not in it are parsed. If a
+  ResultsStore is given, the run statistics stored there are used instead
+  of parsing the files.
+  """
   files = glob.glob(os.path.join(resultsdir, '*_f'))
   if len(files) < 1:
     raise Exception('Error, unable to locate any _f files in '
                     'the results directory %s' % resultsdir)
-  data.records = {} # key is K, value is an array
-  for f in files:
+  if index is None:
+    index = HarvestIndex()
+
+  def parse(f):
+    if store is not None:
+      values = store.stats(f, 'structure')
+      if values is not None:
+        return values
     try:
       run, errorString = hc.readFile(f, data)
     except hc.UnexpectedValue as e:
       unexpectedValue(e.filename, e.valuename, e.value, e.data)
-    if run is not None:
-      data.records.setdefault(run.k, []).append(run)
-    else:
+    if run is None:
       raise Exception('Error, unable to extract results from file %s.\n%s\n'
                       % (f, errorString))
+    return vars(run)
+
+  data.records = {} # key is K, value is an array
+  for values in index.values(files, parse, threads):
+    run = hc.RunRecord()
+    run.__dict__.update(values)
+    data.records.setdefault(run.k, []).append(run)
   data.sortedKs = list(data.records.keys())
   data.sortedKs.sort()
 
 
-def evannoMethod(data, outdir):
+def evannoMethod(data, outdir, processes=1, seed=hc.BOOTSTRAP_SEED):
   value = hc.evannoTests(data)
   if value is not None:
     raise Exception('Unable to perform Evanno method for '
                      'the following reason(s):\n' + value)
   hc.calculatePrimesDoublePrimesDeltaK(data)
+  hc.bootstrapDeltaK(data, processes=processes, seed=seed)
   writeEvannoTableToFile(data, outdir)
 
 
@@ -132,7 +156,8 @@ def writeEvannoTableToFile(data, outdir):
   file.write('\n##########\n')
   file.write('# K\tReps\t'
              'Mean LnP(K)\tStdev LnP(K)\t'
-             'Ln\'(K)\t|Ln\'\'(K)|\tDelta K\n')
+             'Ln\'(K)\t|Ln\'\'(K)|\tDelta K\t'
+             'Delta K 2.5%\tDelta K 97.5%\tP(best K)\n')
   for i in range(0, len(data.sortedKs)):
     k = data.sortedKs[i]
     if k in data.LnPK:
@@ -147,12 +172,20 @@ def writeEvannoTableToFile(data, outdir):
       deltaKstr = '%f' % data.deltaK[k]
     else:
       deltaKstr = 'NA'
+    bootstrapStrs = []
+    for values in (data.deltaKLower, data.deltaKUpper, data.pBest):
+      if k in values and values[k] == values[k]: # not NaN
+        bootstrapStrs.append('%f' % values[k])
+      else:
+        bootstrapStrs.append('NA')
     file.write('%d\t'
                '%d\t%.4f\t'
-               '%.4f\t%s\t%s\t%s\n'
-               % (k,
-                  len(data.records[k]), data.estLnProbMeans[k],
-                  data.estLnProbStdevs[k], LnPKstr, LnPPKstr, deltaKstr))
+               '%.4f\t%s\t%s\t%s\t'
+               '%s\t%s\t%s\n'
+               % ((k,
+                   len(data.records[k]), data.estLnProbMeans[k],
+                   data.estLnProbStdevs[k], LnPKstr, LnPPKstr, deltaKstr) +
+                  tuple(bootstrapStrs)))
   file.close()
   # Retrieve the top 3 k values
   bk = [x[0] for x in sorted(data.deltaK.items(),
@@ -164,11 +197,13 @@ def failHandler(message):
   raise Exception(message)
 
 
-def main(resultsdir, outdir):
+def main(resultsdir, outdir, threads=1):
   data = hc.Data()
-  harvestFiles(data, resultsdir)
+  index = HarvestIndex(os.path.join(outdir, INDEX_FILE))
+  harvestFiles(data, resultsdir, threads, index, open_store(resultsdir))
+  index.save()
   hc.calculateMeansAndSds(data)
-  evannoMethod(data, outdir)
+  evannoMethod(data, outdir, threads)
   bestk = hc.writeRawOutputToFile(os.path.join(outdir, 'summary.txt'), data)
 
   return bestk
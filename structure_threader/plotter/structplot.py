@@ -16,32 +16,64 @@
 # You should have received a copy of the GNU General Public License
 # along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
 
+import json
 import logging
+import mmap
 from os.path import basename, join, splitext
-from collections import Counter, defaultdict, OrderedDict
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import colorlover as cl
 
 from plotly.offline import plot
 import plotly.graph_objs as go
 from plotly import tools
+from plotly.utils import PlotlyJSONEncoder
 
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')
 import matplotlib.pyplot as plt
+from matplotlib.colors import ListedColormap, NoNorm
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
 
 
 try:
-    from plotter.html_template import ploty_html
+    from plotter.html_template import ploty_html, lod_script, \
+        report_data, write_report
     from sanity_checks.sanity import AuxSanity
+    from scheduler.job_pool import process_context
 except ImportError:
-    from structure_threader.plotter.html_template import ploty_html
+    from structure_threader.plotter.html_template import ploty_html, \
+        lod_script, report_data, write_report
     from structure_threader.sanity_checks.sanity import AuxSanity
+    from structure_threader.scheduler.job_pool import process_context
 
 # Create color pallete
 c = cl.scales["12"]["qual"]["Set3"]
 plt.style.use("ggplot")
 
+# Maximum width of the raster plots, in inches
+MAX_FIGURE_WIDTH = 50
+
+# Default resolution of the raster plots, in dots per inch
+RASTER_DPI = 300
+
+# Interactive plots of more individuals than this are drawn at two levels of
+# detail: bins of individuals, and single individuals once zoomed in
+LOD_INDIVIDUALS = 5000
+
+# Number of bins of the overview of level of detail plots, and maximum number
+# of individuals that are drawn one by one
+LOD_BARS = 1000
+
+# Comparative plots of more K values than this are drawn as a single stacked
+# image (see PlotList.plotk_comparative()) instead of one subplot per K
+MAX_SUBPLOTS = 8
+
+# Number of rows of each K value in the interactive stacked comparative plots
+COMPARATIVE_ROWS = 50
+
 class PlotK:
     """
     Individual class object meant to parse and store information of the meanQ
@@ -50,7 +82,7 @@ class PlotK:
     be transverse to all output files and stored in the PlotList object.
     """
 
-    def __init__(self, kfile, fmt, get_indv=False):
+    def __init__(self, kfile, fmt, get_indv=False, store=None):
         """
         Automatically parses the kfile (meanQ file) according to the fmt
         (format). Also sets all instance attributes
@@ -58,6 +90,9 @@ class PlotK:
         :param kfile (str): Path to k output file.
         :param fmt (str) ["structure", "faststructure", "maverick"]:
          The format of the k output file.
+        :param store (ResultsStore): Optional results store. The values are
+         read from it when the kfile is stored there, and added to it
+         otherwise.
         """
 
         """
@@ -102,8 +137,19 @@ class PlotK:
                          "faststructure": self._parse_faststructure,
                          "maverick": self._parse_maverick}
 
+        # Use the stored values, when available
+        if store is not None:
+            self.qvals = store.qvals(self.file_path, self.fmt)
+            if self.qvals is not None and self.get_indv:
+                self.indv = store.labels(self.file_path, self.fmt)
+                if self.indv is None:
+                    self.qvals, self.indv = None, []
+
         # Let the parsing begin
-        parse_methods[self.fmt]()
+        if self.qvals is None:
+            parse_methods[self.fmt]()
+            if store is not None:
+                self.store_values(store)
 
         # Set K value
         try:
@@ -111,7 +157,18 @@ class PlotK:
         except IndexError:
             self.k = 1
 
-    def _parse_usepopinfo(self, fhandle, end_string):
+    def store_values(self, store):
+        """
+        Adds the parsed values to a results store (see PlotK.__init__).
+        Files without Q values are not stored.
+
+        :param store (ResultsStore): The results store.
+        """
+        if self.qvals is not None and self.qvals.size:
+            store.add(self.file_path, self.fmt, self.qvals,
+                      self.indv if self.get_indv else None)
+
+    def _parse_usepopinfo(self, lines):
         """
         This method handles the parsing of a Structure output file when the
         USEPOPINFO flag is specified.
@@ -131,61 +188,46 @@ class PlotK:
         Then, for each array of values after a "|" the probability assignment
         to all other populations is provided.
 
-        :param fhandle (file object): File handle of the output K file
-        :param end_string (str): String that will be used in each line
-        iteration and marks the end of the parsing.
+        :param lines (list): Lines of the individuals, without the headers.
         """
 
-        self.qvals = np.array([])
-
-        # Skip subheader
-        next(fhandle)
-
-        for line in fhandle:
-
-            if line.strip() != "":
-                # We stop the parsing here
-                if line.strip().lower().startswith(end_string):
-                    return
-
-                # Get indv names if get_indv is True
-                if self.get_indv:
-                    self.indv.append(line.split()[1])
-
-                # Since the assignment probabilities of each taxon to a
-                # specific cluster are not ordered in this output file,
-                # a dictionary is create and is populated during the file
-                #  parsing. For example, taxonA may have the assignment
-                # probability to cluster 3 first, and then to 1, 2 and 4.
-                qvalues_dic = defaultdict(float)
-                fields = line.strip().split("|")[:-1]
-
-                # Get the assignment probability for the best K assigned to
-                # the current taxon
-                qvalues_dic[fields[0].split()[3]] = float(fields[0].split()[5])
+        # Each taxon has one "|" separated field per cluster: the assumed
+        # population first, then all other clusters, in any order.
+        fields = [line.strip().split("|")[:-1] for line in lines
+                  if line.strip() != ""]
 
-                # Gather the assignment probabilities for other  K clusters.
-                for pop in fields[1:]:
-                    # To get the assignment to a particular cluster, we
-                    # have to sum all the values for other populations here
-                    prob = sum(map(float, pop.split()[-3:]))
-                    # pop.split()[1][:-1] gets the cluster number
-                    qvalues_dic[int(pop.split()[1][:-1])] = prob
-
-                # Sort the probability assignment values according to cluster
-                # positions (e.g. [<cluster 1 prob>, <cluster 2 prob>, ...])
-                cl_vals = [vals for k, vals in sorted(qvalues_dic.items())]
+        if not fields:
+            self.qvals = np.array([])
+            return
 
-                # Here we add the assignment probabilities to the main array.
-                # If the array alread exits,use vstack to "append" the values
-                # for the current taxon. If it does not exist, create a new
-                # array from the values of the first taxon
-                try:
-                    self.qvals = np.vstack((self.qvals, cl_vals))
-                except ValueError:
-                    self.qvals = np.array(cl_vals)
+        heads = [x[0].split() for x in fields]
 
-    def _parse_nousepopinfo(self, fhandle, end_string):
+        # Get indv names if get_indv is True
+        if self.get_indv:
+            self.indv = [x[1] for x in heads]
+
+        rows = np.arange(len(fields))
+        self.qvals = np.zeros((len(fields), len(fields[0])))
+
+        # Get the assignment probability for the assumed population of each
+        # taxon
+        assumed = np.array([x[3] for x in heads], dtype=float).astype(int)
+        self.qvals[rows, assumed - 1] = np.array([x[5] for x in heads],
+                                                 dtype=float)
+
+        # Gather the assignment probabilities for other K clusters, which are
+        # the sum of the values for each generation back ("Pop 2: a b c").
+        # The numbers of all these fields are converted at once into a
+        # taxa x clusters x (cluster number + values) array.
+        if len(fields[0]) > 1:
+            others = " ".join(" ".join(x[1:]) for x in fields)
+            others = np.array(others.replace("Pop", "").replace(":", " ")
+                              .split(), dtype=float)
+            others = others.reshape(len(fields), len(fields[0]) - 1, -1)
+            self.qvals[rows[:, np.newaxis], others[:, :, 0].astype(int) - 1] \
+                = others[:, :, 1:].sum(axis=2)
+
+    def _parse_nousepopinfo(self, lines):
         """
         Parses Structure results when **not** using the USEPOPINFO flag.
 
@@ -201,38 +243,47 @@ class PlotK:
         In this example, K = 2 and the assignment probabilities are ordered
         in the columns [5:]
 
-        :param fhandle (file object): File handle of the output K file
-        :param end_string (str): String that will be used in each line
-        iteration and marks the end of the parsing.
+        :param lines (list): Lines of the individuals, without the header.
         """
 
-        self.qvals = np.array([])
+        # Skip empty lines
+        fields = [line.split() for line in lines if line.strip() != ""]
 
-        for line in fhandle:
+        # Get indv names if get_indv is True
+        if self.get_indv:
+            self.indv = [x[1] for x in fields]
 
-            # Skip empty lines
-            if line.strip() != "":
+        # Convert all the cluster values in a single step
+        self.qvals = np.array([x[5:] for x in fields], dtype=float)
 
-                # We stop parsing here
-                if line.strip().lower().startswith(end_string):
-                    return
+    def _ancestry_lines(self):
+        """
+        Finds the "Inferred ancestry of individuals" section of a Structure
+        output file, through a memory map of the file, and returns its lines
+        (after the section title) up to the allele frequencies section. Returns
+        None if there is no such section.
+        """
 
-                # Get indv names if get_indv is True
-                if self.get_indv:
-                    self.indv.append(line.split()[1])
+        parsing_string = b"Inferred ancestry of individuals:"
+        end_parsing_string = b"Estimated Allele Frequencies in each cluster"
 
-                # Get the cluster values
-                fields = line.strip().split()
-                cl_vals = [float(x) for x in fields[5:]]
+        with open(self.file_path, "rb") as flh:
+            try:
+                mapped = mmap.mmap(flh.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty file
+                return None
 
-                # Here we add the assignment probabilities to the main array.
-                # If the array alread exits,use vstack to "append" the values
-                # for the current taxon. If it does not exist, create a new
-                # array from the values of the first taxon
-                try:
-                    self.qvals = np.vstack((self.qvals, cl_vals))
-                except ValueError:
-                    self.qvals = np.array(cl_vals)
+            with mapped:
+                start = mapped.find(parsing_string)
+                if start == -1:
+                    return None
+                end = mapped.find(end_parsing_string, start)
+                if end == -1:
+                    end = len(mapped)
+                block = mapped[start:end].decode()
+
+        return block.splitlines()[1:]
 
     def _parse_structure(self):
         """
@@ -240,26 +291,22 @@ class PlotK:
         :return:
         """
 
-        parsing_string = "inferred ancestry of individuals:"
         popinfo_string = "probability of being from assumed " \
                          "population | prob of other pops"
-        end_parsing_string = "estimated allele frequencies in each " \
-                             "cluster"
-
-        with open(self.file_path) as flh:
-            for line in flh:
-                # The string that marks the beginning of the parsing was found
-                if line.strip().lower().startswith(parsing_string):
-                    # Check if the next line has the signature of an output
-                    # file generated with the USEPOPINFO flag.
-                    if next(flh).lower().startswith(popinfo_string):
-                        self._parse_usepopinfo(flh, end_parsing_string)
-                        break
-                    # THe output file generated was NOT generated with the
-                    # USEPOPINFO flag.
-                    else:
-                        self._parse_nousepopinfo(flh, end_parsing_string)
-                        break
+
+        lines = self._ancestry_lines()
+        if not lines:
+            return
+
+        # Check if the next line has the signature of an output
+        # file generated with the USEPOPINFO flag. It is followed by a
+        # subheader line.
+        if lines[0].lower().startswith(popinfo_string):
+            self._parse_usepopinfo(lines[2:])
+        # THe output file generated was NOT generated with the
+        # USEPOPINFO flag.
+        else:
+            self._parse_nousepopinfo(lines[1:])
 
     def _parse_faststructure(self):
         """
@@ -299,6 +346,138 @@ class PlotK:
                                            skip_header=1).T[1].T)
 
 
+def _parse_file(args):
+    """
+    Process pool worker of parse_files(). Parses a single output file.
+    """
+    return PlotK(*args)
+
+
+def parse_files(kfiles, fmt, get_indv=False, store=None, threads=1):
+    """
+    Parses several output files into PlotK objects, in the same order. The
+    files that are not in the store are parsed concurrently by a pool of
+    processes, and then added to the store. Errors are raised in the order
+    of the files, whatever the order in which the workers finish.
+
+    :param kfiles (list): Paths to the output files.
+    :param fmt (str): The format of the output files (see PlotK).
+    :param get_indv (bool): Whether the individual labels should be parsed.
+     They are the same for all files, so they are only parsed from the first
+     one.
+    :param store (ResultsStore): Optional results store (see PlotK).
+    :param threads (int): Maximum number of processes.
+    """
+
+    kobjs = [None] * len(kfiles)
+    tasks = []
+    for i, kfile in enumerate(kfiles):
+        if store is not None and store.lookup(kfile, fmt) is not None:
+            kobjs[i] = PlotK(kfile, fmt, get_indv and i == 0, store)
+        else:
+            tasks.append((i, (kfile, fmt, get_indv and i == 0)))
+
+    # Spawning processes is only worth it for more than one file
+    if threads > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(threads, len(tasks)),
+                                 mp_context=process_context()) as executor:
+            parsed = list(executor.map(_parse_file, [x[1] for x in tasks]))
+    else:
+        parsed = [_parse_file(x[1]) for x in tasks]
+
+    for (i, _), kobj in zip(tasks, parsed):
+        kobjs[i] = kobj
+        if store is not None:
+            kobj.store_values(store)
+
+    return kobjs
+
+
+def _write_html(fig, output_dir, filename, report=False, lod=None):
+    """
+    Writes an interactive plot, either as a standalone HTML file or as the
+    data file of an HTML report (see main()).
+    :param fig: (plotly Figure) The plot.
+    :param output_dir: (str) Path to the directory of the plot.
+    :param filename: (str) Name of the plot file, without extension.
+    :param report: (bool) If True, write the data file of an HTML report.
+    :param lod: (tuple) Optional (nind, max_bars, qvals) of a level of detail
+    plot (see html_template.lod_script()).
+    """
+
+    # The data files of reports only hold the figure (and level of detail)
+    # data, which is drawn by the index page of the report
+    if report:
+        with open(join(output_dir, filename) + ".js", "w") as flh:
+            flh.write(report_data(filename, json.dumps(
+                fig, cls=PlotlyJSONEncoder, separators=(",", ":")), lod))
+        return
+
+    filepath = join(output_dir, filename) + ".html"
+
+    pdiv = plot(fig, include_plotlyjs=False, output_type='div')
+    # Remove plotly div
+    pdiv = pdiv.replace(', {"showLink": true, "linkText": '
+                        '"Export to plot.ly"}', '')
+
+    # Add the Q values of each individual, for zooming in
+    if lod:
+        pdiv += lod_script(*lod)
+
+    # Create html file
+    with open(filepath, "w") as flh:
+        flh.write(ploty_html(pdiv))
+
+
+def _cluster_image(qvalues, rows):
+    """
+    Returns the stacked bars of a Q matrix as an image with one column per
+    individual and the given number of rows, in which each pixel holds the
+    index of its cluster. The cluster of each pixel is the number of bar tops
+    (cumulative Q values) below its center, so the pixels above the last bar
+    (due to rounding of the Q values) get the index K.
+    :param qvalues: (numpy.ndarray) Individuals x K matrix of Q values.
+    :param rows: (int) Number of rows of the image, the first of which is the
+    bottom of the bars.
+    """
+
+    kclusters = qvalues.shape[1]
+    tops = np.cumsum(qvalues, axis=1)
+    centers = (np.arange(rows) + .5) / rows
+    image = np.zeros((rows, qvalues.shape[0]),
+                     dtype=np.min_scalar_type(kclusters))
+    for i in range(kclusters):
+        image += tops[:, i] < centers[:, np.newaxis]
+
+    return image
+
+
+def _stacked_image(qmatrices, rows):
+    """
+    Returns the stacked bars of several Q matrices as a single image (see
+    _cluster_image()), with one band of rows per matrix, separated by white
+    rows. The first matrix is the top band.
+    :param qmatrices: (list) Columns x K matrices of Q values, with the same
+    number of columns.
+    :param rows: (int) Number of rows of each band.
+    :return: (image, white) the image and the index of the white color,
+    which is the largest K.
+    """
+
+    white = max(x.shape[1] for x in qmatrices)
+    gap = max(1, rows // 10)
+
+    image = np.full(((rows + gap) * len(qmatrices) - gap,
+                     qmatrices[0].shape[0]),
+                    white, dtype=np.min_scalar_type(white))
+    for j, qvalues in enumerate(reversed(qmatrices)):
+        band = _cluster_image(qvalues, rows)
+        image[j * (rows + gap):j * (rows + gap) + rows] = np.where(
+            band == qvalues.shape[1], white, band)
+
+    return image, white
+
+
 class PlotList(AuxSanity):
     """
     Main class object that will store multiple PlotK instances for each
@@ -308,7 +487,8 @@ class PlotList(AuxSanity):
     the output plots.
     """
 
-    def __init__(self, ouput_file_list, fmt, popfile=None, indfile=None):
+    def __init__(self, ouput_file_list, fmt, popfile=None, indfile=None,
+                 qfiles=None, store=None, threads=1):
         """
         When a PlotList instance is created, a list of the output files and
         their format must be provided. Optionally, a population file may
@@ -323,6 +503,14 @@ class PlotList(AuxSanity):
         with indfile).
         :param indfile (str): Path to individual file (mutually exclusive
         with popfile).
+        :param qfiles (dict): Optional {K: path} of Q matrix files (in the
+        .meanQ format, eg. the aligned means written by
+        stats.alignment.align_runs()) whose values replace the ones parsed
+        from the output file of that K. The plots are named after them.
+        :param store (ResultsStore): Optional results store the output files
+        are read from (see PlotK).
+        :param threads (int): Number of processes used to parse the output
+        files.
         """
 
         """
@@ -372,17 +560,22 @@ class PlotList(AuxSanity):
         """
         self.number_indv = None
 
-        # Parse each output file and add it to the kvals attribute
-        for fpath in ouput_file_list:
+        # Parse the output files. The individual labels are taken from the
+        # first one, unless they are provided by a popfile or indfile
+        get_indv = not (popfile or indfile)
+        kobjs = parse_files(ouput_file_list, self.fmt, get_indv=get_indv,
+                            store=store, threads=threads)
+        if get_indv and kobjs:
+            self.indv = kobjs[0].indv
+            self.number_indv = len(self.indv)
+
+        # Add each output file to the kvals attribute
+        for fpath, kobj in zip(ouput_file_list, kobjs):
 
-            if not popfile and not indfile and self.indv is None:
-                # Create PlotK object
-                kobj = PlotK(fpath, self.fmt, get_indv=True)
-                self.indv = kobj.indv
-                self.number_indv = len(self.indv)
-            else:
-                # Create PlotK object
-                kobj = PlotK(fpath, self.fmt)
+            # Replace the Q matrix with the provided one
+            if qfiles and kobj.k in qfiles:
+                kobj.file_path = qfiles[kobj.k]
+                kobj.qvals = np.loadtxt(kobj.file_path, ndmin=2)
 
             self.kvals[kobj.k] = kobj
 
@@ -407,9 +600,11 @@ class PlotList(AuxSanity):
         a "k" before the desired k value.
         """
         item = item.replace("k", "")
+        # kvals is looked up in __dict__, since it is not set yet when an
+        # instance is unpickled (eg. by the workers of render_plots())
         try:
-            return self.kvals[int(item)]
-        except KeyError:
+            return self.__dict__["kvals"][int(item)]
+        except (KeyError, ValueError):
             raise AttributeError
 
     def __iter__(self):
@@ -420,50 +615,34 @@ class PlotList(AuxSanity):
         for k, kobj in self.kvals.items():
             yield k, kobj
 
-    def _sort_qvals_pop(self, poparray=None, indarray=None):
+    def _sort_qvals_pop(self, order):
         """
-        Sorts an ndarray with popfile/indfile information ALONG with the
-        qvalues array
-        :param poparray: (numpy.ndarray) As returned by genfromtxt
-        :param indarray: (numpy.array) As returned by genfromtxt
+        Sorts the individuals of the qvalues arrays of all K values with the
+        same permutation, so that the individuals of each population are
+        together and the populations are in the order of the plot.
+        :param order: (numpy.ndarray) Integer permutation of the
+        individuals, as returned by argsort: the i-th individual of the
+        sorted arrays is the order[i]-th individual of the result files.
         """
 
-        sorted_array = None
-
-        if poparray is not None:
-            # Create a ndarray of the same size as the qvalues array
-            for i in range(len(poparray)):
-                if sorted_array is None:
-                    sorted_array = np.repeat(poparray[i:i + 1, np.newaxis],
-                                             poparray[i][1],
-                                             0)
-                else:
-                    sorted_array = np.vstack(
-                        [sorted_array,
-                         np.repeat(poparray[i:i + 1, np.newaxis],
-                                   poparray[i][1],
-                                   0)])
-        # Sort the qvalues array acorrding to the "original_order" column
-        # of poparray
         for _, kobj in self.kvals.items():
-            # Retrieve meanQ array
-            qvals = kobj.qvals
-
-            # Stack index to meanQ array
-            if poparray is not None:
-                index_array = np.c_[sorted_array["original_order"],
-                                    qvals]
-            elif indarray is not None:
-                if indarray.shape[1] == 3:
-                    index = indarray[:, 2].astype(np.float64)
-                    index_array = np.c_[index, qvals]
-                else:
-                    index = indarray[:, 1]
-                    index_array = np.c_[index, qvals]
+            kobj.qvals = np.asarray(kobj.qvals, dtype=np.float64)[order]
 
-            # Sort indexed array
-            sorted_qvals = index_array[index_array[:, 0].argsort()]
-            kobj.qvals = sorted_qvals[:, 1:].astype(np.float64)
+    def _set_pops(self, pops, counts):
+        """
+        Sets the pops related attributes from the populations, in the order
+        of the plot, and their number of individuals.
+        :param pops: (list) Population labels.
+        :param counts: (numpy.ndarray) Number of individuals of each
+        population.
+        """
+
+        pop_sums = np.cumsum(counts)
+        starts = pop_sums - counts
+
+        self.pops = list(pops)
+        self.pops_xpos = (starts + counts / 2).tolist()
+        self.pops_xrange = list(zip(starts.tolist(), pop_sums.tolist()))
 
     def _parse_popfile(self, popfile):
         """
@@ -497,31 +676,22 @@ class PlotList(AuxSanity):
 
         """
 
-        self.check_popfile(popfile, self.kvals)
+        # The popfile is only read once, by the sanity check
+        poparray = self.check_popfile(popfile, self.kvals)
 
-        datatype = np.dtype([("popname", "|U20"), ("nind", int),
-                             ("original_order", int)])
+        # The individuals of the result files are in the order of the
+        # popfile rows, so each individual gets the plot order of its
+        # population, and a stable sort keeps the individuals of each
+        # population in their original order
+        order = np.argsort(np.repeat(poparray["original_order"],
+                                     poparray["nind"]), kind="stable")
+        self._sort_qvals_pop(order)
 
-        poparray = np.genfromtxt(popfile, dtype=datatype)
-
-        # Sort meanQ arrays
-        self._sort_qvals_pop(poparray=poparray)
         # Sort array according to the order in the third column
         poparray.sort(order="original_order")
+        self._set_pops(poparray["popname"].tolist(), poparray["nind"])
 
-        pop_sums = np.cumsum(poparray["nind"])
-
-        # Populate pops related attributes
-        for p, x in enumerate(poparray):
-            # Add population label to list
-            self.pops.append(x[0])
-            # Add population label position in x-axis
-            self.pops_xpos.append(x[1] / 2 + sum(poparray["nind"][:p]))
-            # Add population range in the x-axis
-            self.pops_xrange.append(
-                (pop_sums[p] - poparray["nind"][p], pop_sums[p]))
-
-        self.indv = list(range(self.pops_xrange[-1][-1]))
+        self.indv = list(range(int(poparray["nind"].sum())))
         self.number_indv = len(self.indv)
 
     def _parse_indfile(self, indfile):
@@ -555,12 +725,9 @@ class PlotList(AuxSanity):
         :param indfile: (str) Path to indfile
         """
 
-        self.check_indfile(indfile, self.kvals)
-
-        # Import infile as array. dtype is set to None to allow automatic
-        # detection of dtype for each column (since the number of columns
-        # is variable)
-        indarray = np.genfromtxt(indfile, dtype="|U20")
+        # The indfile is only read once, by the sanity check, as an array of
+        # strings (since the number of columns is variable)
+        indarray = self.check_indfile(indfile, self.kvals)
 
         # Now we evaluate the the information contained in the indfile
         # If only one column is present, we set self.indv and nothing more
@@ -587,36 +754,104 @@ class PlotList(AuxSanity):
             else:
 
                 # Sort the individuals according to the order provided in the
-                # third column, if it is available
+                # third column, if it is available, or alphabetically per
+                # population otherwise. The same permutation sorts the
+                # individuals and the qvalues arrays of all K values.
                 if indarray.shape[1] == 3:
-                    self._sort_qvals_pop(indarray=indarray)
-                    indarray = indarray[indarray[:, 2].argsort()]
+                    order = np.argsort(indarray[:, 2].astype(np.int64),
+                                       kind="stable")
+                    indarray = indarray[order]
                     # Sort the population list according to the new order
                     npops = list(OrderedDict.fromkeys(indarray[:, 1]))
 
                 else:
-                    # Sort the individuals alphabetically per population if no
-                    # order column was provided
-                    self._sort_qvals_pop(indarray=indarray)
-                    indarray = indarray[indarray[:, 1].argsort()]
+                    order = np.argsort(indarray[:, 1], kind="stable")
+                    indarray = indarray[order]
+
+                self._sort_qvals_pop(order)
 
                 self.indv = indarray[:, 0]
                 self.number_indv = len(self.indv)
 
                 # Set self.pops attribute
                 pop_counts = Counter(indarray[:, 1])
-                pop_sums = np.cumsum([np.count_nonzero(indarray == x)
-                                      for x in npops])
+                self._set_pops(npops, np.array([pop_counts[x]
+                                                for x in npops]))
+
+    def _lod_edges(self, max_bars=LOD_BARS):
+        """
+        Returns the edges of the bins of individuals of the overview of level
+        of detail plots: about max_bars bins of consecutive individuals, that
+        never straddle two populations.
+        :param max_bars: (int) Approximate number of bins.
+        """
+
+        step = int(np.ceil(self.number_indv / max_bars))
+        bounds = [x for y in self.pops_xrange for x in y]
 
-                # Populate pops related attributes
-                for p, pop in enumerate(npops):
-                    # Add population label to list
-                    self.pops.append(pop)
-                    self.pops_xpos.append(pop_sums[p] - pop_counts[pop] / 2)
-                    self.pops_xrange.append(
-                        (pop_sums[p] - pop_counts[pop], pop_sums[p]))
+        return np.unique(np.r_[np.arange(0, self.number_indv, step), bounds,
+                               self.number_indv]).astype(int)
 
-    def plotk(self, kvals, output_dir):
+    def _html_xaxis(self, numeric=False):
+        """
+        Returns the x-axis layout of the interactive plots, with population
+        labels if there are populations and individual labels otherwise, and
+        the bottom margin that fits those labels.
+        :param numeric: (bool) If True, the x-axis is numeric instead of
+        categorical, so only some of the individual labels are shown.
+        """
+
+        if self.pops:
+            # Customization of x-axis with population labels
+            xdata = {"range": [-0.6, self.number_indv - 0.4],
+                     "ticks": "",
+                     "showticklabels": True,
+                     "mirror": True,
+                     "ticktext": self.pops,
+                     "tickvals": self.pops_xpos,
+                     "tickangle": -45,
+                     "tickfont": dict(size=22,
+                                      color='black')}
+
+            # Automatic setting of the bottom margin to accomodate larger
+            # population labels
+            bmargin = 14.5 * max([len(x) for x in self.pops])
+
+        else:
+            xdata = {"range": [-0.6, self.number_indv - 0.4],
+                     "showticklabels": True,
+                     "mirror": True,
+                     "tickangle": -45,
+                     "tickfont": dict(size=14,
+                                      color='black')}
+
+            # Automatic setting of the bottom margin to accommodate larger
+            # individual sample names
+            bmargin = 14.5 * max([len(x) for x in self.indv])
+
+            if numeric:
+                step = int(np.ceil(self.number_indv / LOD_BARS * 10))
+                xdata.update(tickvals=list(range(self.number_indv))[::step],
+                             ticktext=list(self.indv)[::step])
+
+        return xdata, bmargin if bmargin >= 80 else 80
+
+    def plot_name(self, kvals):
+        """
+        Returns the name of the interactive plot of a list of K values,
+        without extension. The plot of a single K value is named after its
+        output file, and the plots of multiple K values after the K values
+        they include.
+        :param kvals: (list) K values of the plot.
+        """
+
+        if len(kvals) == 1:
+            kfile = self.kvals[kvals[0]].file_path
+            return splitext(basename(kfile))[0]
+
+        return "ComparativePlot_{}".format("-".join([str(x) for x in kvals]))
+
+    def plotk(self, kvals, output_dir, report=False):
         """
         Generates a plot for each K value in kvals. These kvals must be
         present in the kvals dictionary attribute. If only one k value is
@@ -639,6 +874,14 @@ class PlotList(AuxSanity):
         should be plotted.
         :param output_dir: (str) Path to the directory where the plots will
         be generated
+        :param report: (bool) If True, the plot is written as the data file
+        of an HTML report (see main()) instead of a standalone HTML file.
+
+        ::NOTE:: LEVEL OF DETAIL
+        With more than LOD_INDIVIDUALS individuals, each bar of the plot is
+        the mean Q of a bin of individuals (see _lod_edges()), and the Q
+        values of the individuals are only drawn by the browser when the
+        plot is zoomed in to at most LOD_BARS individuals.
         """
 
         # Get number of plots (confirm the kvals are valid before)
@@ -678,6 +921,15 @@ class PlotList(AuxSanity):
             # Stores the information on the population vertical lines
             # that will be passed to the figure layout
 
+        # Bins of the level of detail overview, and the Q values of each
+        # trace, that are drawn when zoomed in
+        lod = self.number_indv > LOD_INDIVIDUALS
+        if lod:
+            edges = self._lod_edges()
+            widths = np.diff(edges)
+            xvals = ((edges[:-1] + edges[1:] - 1) / 2).tolist()
+            detail = []
+
         # Make sure that the highest K is processed first
         for j, k in enumerate(sorted(
                 [x for x in kvals if x in self.kvals], reverse=True)):
@@ -703,26 +955,34 @@ class PlotList(AuxSanity):
                     counter = 0
                     clr = c[counter]
 
+                if lod:
+                    bar_data = {"x": xvals, "width": widths.tolist(),
+                                "y": (np.add.reduceat(i, edges[:-1]) /
+                                      widths).round(4).tolist()}
+                    detail.append(np.round(i, 4).tolist())
+                else:
+                    bar_data = {"x": self.indv, "y": i}
+
                 # Create Bar trace for each cluster
                 current_bar = go.Bar(
-                    # Set xticks
-                    x=self.indv,
-                    # Set yaxis values
-                    y=i,
+                    # Set xticks and yaxis values
+                    **bar_data,
                     # Name of the cluster for the legend
                     name="K {}".format(p),
                     # Set equal cluster indexes to the same group. This
                     # ensures that K3, for example, has the same legend
                     # reference across all subplots
                     legendgroup="group_{}".format(p),
-                    # Set hover text information
-                    text=["Assignment: {}%".format(x * 100) for x in i],
+                    # Hover information is the individual (or bin), the
+                    # assignment and the cluster, instead of one text per
+                    # bar
+                    hoverinfo="x+y+name",
                     # Customization of bars
                     marker=dict(
                         color=clr,
                         line=dict(
                             color='grey',
-                            width=2,
+                            width=0 if lod else 2,
                         )),
                     # Only the first (highest K) plot will have a legend
                     showlegend=True if j == 0 else False)
@@ -766,35 +1026,7 @@ class PlotList(AuxSanity):
                  "x1": self.number_indv - 0.5, "y1": 1,
                  "yref": "y{}".format(j + 1), "line": {"width": 3}})
 
-        if self.pops:
-            # Customization of x-axis with population labels
-            xdata = {"range": [-0.6, self.number_indv - 0.4],
-                     "ticks": "",
-                     "showticklabels": True,
-                     "mirror": True,
-                     "ticktext": self.pops,
-                     "tickvals": self.pops_xpos,
-                     "tickangle": -45,
-                     "tickfont": dict(size=22,
-                                      color='black')}
-
-            # Automatic setting of the bottom margin to accomodate larger
-            # population labels
-            bmargin = 14.5 * max([len(x) for x in self.pops])
-
-        else:
-            xdata = {"range": [-0.6, self.number_indv - 0.4],
-                     "showticklabels": True,
-                     "mirror": True,
-                     "tickangle": -45,
-                     "tickfont": dict(size=14,
-                                      color='black')}
-
-            # Automatic setting of the bottom margin to accommodate larger
-            # individual sample names
-            bmargin = 14.5 * max([len(x) for x in self.indv])
-
-        bmargin = bmargin if bmargin >= 80 else 80
+        xdata, bmargin = self._html_xaxis(lod)
 
         # Update layout with population boundary shapes
         fig["layout"].update(shapes=shape_list)  # Update first xaxis
@@ -816,26 +1048,8 @@ class PlotList(AuxSanity):
                              legend={"x": 1, "y": 0.5},
                              **size)
 
-        # Determine file name. If a single K value is provided, then
-        # adapt from the ouptut name of that K value file.
-        # If there are multiple K vales,the filename will reflect the
-        # K values included.
-        if len(kvals) == 1:
-            kfile = self.kvals[kvals[0]].file_path
-            filename = splitext(basename(kfile))[0]
-        else:
-            filename = "ComparativePlot_{}".format("-".join(
-                [str(x) for x in kvals]))
-        filepath = join(output_dir, filename) + ".html"
-
-        pdiv = plot(fig, include_plotlyjs=False, output_type='div')
-        # Remove plotly div
-        pdiv = pdiv.replace(', {"showLink": true, "linkText": '
-                            '"Export to plot.ly"}', '')
-
-        # Create html file
-        with open(filepath, "w") as flh:
-            flh.write(ploty_html(pdiv))
+        _write_html(fig, output_dir, self.plot_name(kvals), report,
+                    (self.number_indv, LOD_BARS, detail) if lod else None)
 
     def plotk_static(self, kval, output_dir, bw=False, use_ind=False):
         """
@@ -852,10 +1066,10 @@ class PlotList(AuxSanity):
 
         clist = [[i / 255. for i in x] for x in cl.to_numeric(c)]
 
-        # Update plot width according to the number of samples
-        plt.rcParams["figure.figsize"] = (8 * numinds * .03, 2.64)
-
-        fig = plt.figure()
+        # Update plot width according to the number of samples. Each plot
+        # has its own Figure, instead of using the global pyplot state, so
+        # that plots can be drawn concurrently.
+        fig = Figure(figsize=(8 * numinds * .03, 2.64))
         axe = fig.add_subplot(111, xlim=(-.5, numinds - .5), ylim=(0, 1))
 
         # Transforms the qvals matrix when K = 1. If K > 2, use the
@@ -911,7 +1125,7 @@ class PlotList(AuxSanity):
             for pl in pop_lines:
 
                 # Add population delimiting lines
-                plt.axvline(x=pl - 0.5, linewidth=1.5, color="black")
+                axe.axvline(x=pl - 0.5, linewidth=1.5, color="black")
 
             if not use_ind:
                 for p, pos in enumerate(self.pops_xpos):
@@ -928,18 +1142,404 @@ class PlotList(AuxSanity):
             axe.spines[axis].set_linewidth(2)
             axe.spines[axis].set_color("black")
 
-        plt.yticks([])
-        plt.xticks([])
+        axe.set_yticks([])
+        axe.set_xticks([])
 
         kfile = self.kvals[kval].file_path
         filename = splitext(basename(kfile))[0]
         filepath = join(output_dir, filename)
 
-        plt.savefig("{}.svg".format(filepath), bbox_inches="tight")
+        fig.savefig("{}.svg".format(filepath), bbox_inches="tight")
+
+    def plotk_raster(self, kval, output_dir, bw=False, use_ind=False,
+                     fmt="png", dpi=RASTER_DPI):
+        """
+        Generates a structure plot as a raster image, for sample sizes that
+        are too large for plotk_static(). Instead of one rectangle per
+        individual and cluster, the stacked bars are drawn as a single image
+        with one pixel column per individual. The figure width is capped to
+        MAX_FIGURE_WIDTH and only the labels that fit in it are drawn.
+        :param kval: (int) Must match the K value from self.kvals
+        :param output_dir: (string) Path of the plot file
+        :param bw: (bool) If True, plots will be generated with shades of grey
+        instead of colors to distinguish k groups.
+        :param use_ind: (bool) If True, and if individual labels were provided
+        with the --ind option, use those labels instead of population labels
+        :param fmt: (str) ["png", "pdf", "svg"] Format of the plot file.
+        :param dpi: (int) Resolution of the image, in dots per inch.
+        """
+
+        qvalues = np.asarray(self.kvals[kval].qvals, dtype=np.float64)
+        qvalues = qvalues.reshape(qvalues.shape[0], -1)
+        numinds, kclusters = qvalues.shape
+
+        width = min(8 * numinds * .03, MAX_FIGURE_WIDTH)
+        height = 2.64
+        rows = max(1, int(round(height * dpi)))
+
+        # Pixels above the last bar get an extra white color
+        image = _cluster_image(qvalues, rows)
+
+        if bw:
+            colors = [[(i + 1) / (kclusters + 1)] * 3
+                      for i in range(kclusters)]
+        else:
+            clist = [[i / 255. for i in x] for x in cl.to_numeric(c)]
+            colors = [clist[i % len(clist)] for i in range(kclusters)]
+
+        fig = Figure(figsize=(width, height))
+        axe = fig.add_subplot(111, xlim=(-.5, numinds - .5), ylim=(0, 1))
+        axe.imshow(image, cmap=ListedColormap(colors + [[1, 1, 1]]),
+                   norm=NoNorm(), aspect="auto", interpolation="nearest",
+                   origin="lower", extent=(-.5, numinds - .5, 0, 1))
+
+        # Annotate population info
+        if self.pops:
+            pop_lines = list(OrderedDict.fromkeys(
+                [x for y in self.pops_xrange for x in y]))[1:-1]
+            axe.vlines(np.array(pop_lines) - 0.5, 0, 1, linewidth=1.5,
+                       color="black")
+
+        if self.pops and not use_ind:
+            positions, labels = self.pops_xpos, self.pops
+            fontsize, weight = 16, "bold"
+        else:
+            positions, labels = range(numinds), self.indv
+            fontsize, weight = 8, "normal"
+
+        # Only draw as many labels as fit along the x-axis
+        step = int(np.ceil(len(labels) / max(1, width * 36 / fontsize)))
+        axe.set_xticks(np.asarray(positions)[::step])
+        axe.set_xticklabels([str(x) for x in labels][::step], rotation=45,
+                            ha="right", fontsize=fontsize, weight=weight)
+        axe.tick_params(axis="x", length=0)
+        axe.set_yticks([])
+        axe.grid(False)
+
+        for axis in ["top", "bottom", "left", "right"]:
+            axe.spines[axis].set_linewidth(2)
+            axe.spines[axis].set_color("black")
+
+        kfile = self.kvals[kval].file_path
+        filename = splitext(basename(kfile))[0]
+        filepath = join(output_dir, filename)
+
+        fig.savefig("{}.{}".format(filepath, fmt), dpi=dpi,
+                    bbox_inches="tight")
+
+    def _comparative_image(self, kvals, rows, max_columns):
+        """
+        Returns the stacked bars of several K values as a single image (see
+        _cluster_image()), with one band of rows per K value, separated by
+        white rows. The highest K value is the top band, and each column is
+        the mean Q of a bin of individuals (see _lod_edges()). Pixels of the
+        white color hold the largest K value.
+        :param kvals: (list) K values of the plot.
+        :param rows: (int) Number of rows of each band.
+        :param max_columns: (int) Approximate maximum number of columns.
+        :return: (image, edges, valid, white) the image, the edges of the bins
+        of individuals, the valid K values of the plot, from the top band to
+        the bottom one, and the index of the white color.
+        """
+
+        valid = sorted([x for x in kvals if x in self.kvals], reverse=True)
+        if not valid:
+            logging.error("There are no valid K values to plot. \n\n"
+                          "Valid kvals: {}\n"
+                          "Provided kvals: {}\n"
+                          "Exiting.".format(self.kvals.keys(), kvals))
+            raise SystemExit(1)
 
-        # Clear plot object
-        plt.clf()
-        plt.close()
+        edges = self._lod_edges(max_columns)
+        widths = np.diff(edges)[:, np.newaxis]
+
+        qmatrices = []
+        for k in valid:
+            qvalues = np.asarray(self.kvals[k].qvals, dtype=np.float64)
+            qvalues = qvalues.reshape(qvalues.shape[0], -1)
+            qmatrices.append(
+                np.add.reduceat(qvalues, edges[:-1], axis=0) / widths)
+        image, white = _stacked_image(qmatrices, rows)
+
+        return image, edges, valid, white
+
+    def plotk_comparative(self, kvals, output_dir, report=False):
+        """
+        Generates an interactive comparative plot of many K values, as a
+        single heatmap of the stacked bars of all K values (see
+        _comparative_image()), with one frame shape per K value and one line
+        per population boundary. Unlike plotk(), the size of the plot does
+        not grow with the number of subplots and shapes.
+        :param kvals: (list) K values of the plot.
+        :param output_dir: (str) Path to the directory where the plot will be
+        generated.
+        :param report: (bool) If True, the plot is written as the data file
+        of an HTML report (see main()) instead of a standalone HTML file.
+        """
+
+        image, edges, valid, white = self._comparative_image(
+            kvals, COMPARATIVE_ROWS, LOD_BARS)
+        band = COMPARATIVE_ROWS + max(1, COMPARATIVE_ROWS // 10)
+
+        # The cluster indexes are mapped to the colors of plotk(), and the
+        # last index to white
+        colors = [c[i % len(c)] for i in range(white)] + ["rgb(255,255,255)"]
+        heatmap = go.Heatmap(
+            z=image,
+            x=edges - .5,
+            y=np.arange(image.shape[0] + 1) - .5,
+            colorscale=[[i / max(1, white), x] for i, x in enumerate(colors)],
+            zmin=0,
+            zmax=max(1, white),
+            showscale=False,
+            hoverinfo="x+z")
+
+        shape_list = []
+        for j in range(len(valid)):
+            shape_list.append(
+                {"type": "rect", "x0": -0.5, "x1": self.number_indv - 0.5,
+                 "y0": j * band - .5, "y1": j * band + COMPARATIVE_ROWS - .5,
+                 "line": {"width": 3}})
+        if self.pops:
+            for x in list(OrderedDict.fromkeys(
+                    [x for y in self.pops_xrange for x in y]))[1:-1]:
+                shape_list.append(
+                    {"type": "line", "x0": x - .5, "x1": x - .5, "y0": 0,
+                     "y1": 1, "yref": "paper", "line": {"width": 3}})
+
+        xdata, bmargin = self._html_xaxis(numeric=True)
+        ydata = {"tickvals": [j * band + COMPARATIVE_ROWS / 2
+                              for j in range(len(valid))],
+                 "ticktext": ["K={}".format(k) for k in reversed(valid)],
+                 "showgrid": False,
+                 "zeroline": False}
+
+        fig = go.Figure(data=[heatmap], layout=go.Layout(
+            xaxis=xdata, yaxis=ydata, shapes=shape_list,
+            margin={"b": bmargin},
+            height=max(450, 120 * len(valid))))
+
+        _write_html(fig, output_dir, self.plot_name(kvals), report)
+
+    def plotk_comparative_static(self, kvals, output_dir, bw=False,
+                                 use_ind=False, fmt="svg", dpi=RASTER_DPI):
+        """
+        Generates a static comparative plot of many K values, as a single
+        image of the stacked bars of all K values (see
+        _comparative_image()), with the same labels as plotk_raster().
+        :param kvals: (list) K values of the plot.
+        :param output_dir: (string) Path of the plot file
+        :param bw: (bool) If True, plots will be generated with shades of grey
+        instead of colors to distinguish k groups.
+        :param use_ind: (bool) If True, and if individual labels were provided
+        with the --ind option, use those labels instead of population labels
+        :param fmt: (str) ["png", "pdf", "svg"] Format of the plot file.
+        :param dpi: (int) Resolution of the image, in dots per inch.
+        """
+
+        numinds = self.number_indv
+        width = min(8 * numinds * .03, MAX_FIGURE_WIDTH)
+        rows = 2 * COMPARATIVE_ROWS
+
+        image, edges, valid, white = self._comparative_image(
+            kvals, rows, int(width * dpi))
+        band = rows + max(1, rows // 10)
+        height = 1.2 * len(valid)
+
+        if bw:
+            colors = [[(i + 1) / (white + 1)] * 3 for i in range(white)]
+        else:
+            clist = [[i / 255. for i in x] for x in cl.to_numeric(c)]
+            colors = [clist[i % len(clist)] for i in range(white)]
+
+        fig = Figure(figsize=(width, height))
+        axe = fig.add_subplot(111, xlim=(-.5, numinds - .5),
+                              ylim=(0, image.shape[0]))
+        axe.imshow(image, cmap=ListedColormap(colors + [[1, 1, 1]]),
+                   norm=NoNorm(), aspect="auto", interpolation="none",
+                   origin="lower",
+                   extent=(-.5, numinds - .5, 0, image.shape[0]))
+
+        # Frame each K value, and draw the population boundaries across all
+        # of them
+        for j in range(len(valid)):
+            axe.add_patch(Rectangle((-.5, j * band), numinds, rows,
+                                    fill=False, linewidth=2,
+                                    edgecolor="black"))
+        if self.pops:
+            pop_lines = list(OrderedDict.fromkeys(
+                [x for y in self.pops_xrange for x in y]))[1:-1]
+            axe.vlines(np.array(pop_lines) - 0.5, 0, image.shape[0],
+                       linewidth=1.5, color="black")
+
+        if self.pops and not use_ind:
+            positions, labels = self.pops_xpos, self.pops
+            fontsize, weight = 16, "bold"
+        else:
+            positions, labels = range(numinds), self.indv
+            fontsize, weight = 8, "normal"
+
+        # Only draw as many labels as fit along the x-axis
+        step = int(np.ceil(len(labels) / max(1, width * 36 / fontsize)))
+        axe.set_xticks(np.asarray(positions)[::step])
+        axe.set_xticklabels([str(x) for x in labels][::step], rotation=45,
+                            ha="right", fontsize=fontsize, weight=weight)
+        axe.set_yticks([j * band + rows / 2 for j in range(len(valid))])
+        axe.set_yticklabels(["K={}".format(k) for k in reversed(valid)],
+                            fontsize=12)
+        axe.tick_params(length=0)
+        axe.grid(False)
+        axe.set_facecolor("white")
+
+        for axis in ["top", "bottom", "left", "right"]:
+            axe.spines[axis].set_visible(False)
+
+        filepath = join(output_dir, self.plot_name(kvals))
+
+        fig.savefig("{}.{}".format(filepath, fmt), dpi=dpi,
+                    bbox_inches="tight")
+
+    def pop_summary(self, kvals):
+        """
+        Returns the mean, median and standard deviation of the Q values of
+        each population, for several K values. The Q matrices of all K
+        values are stacked side by side, so that each statistic is computed
+        by a single segmented reduction (np.add.reduceat) over the
+        populations of the sorted Q matrices (see _sort_qvals_pop()).
+        :param kvals: (list) K values to summarize. K values that are not in
+        self.kvals are ignored.
+        :return: (OrderedDict) {K: {"n": array, "mean": array, "median":
+        array, "sd": array}} for each K, in ascending order, where "n" is the
+        number of individuals of each population, and the other arrays are
+        populations x K matrices, with the populations in the order of
+        self.pops.
+        """
+
+        if not self.pops:
+            logging.error("Population summaries require population "
+                          "information, from a popfile or an indfile.")
+            raise SystemExit(1)
+
+        valid = sorted([x for x in kvals if x in self.kvals])
+        qmatrices = [np.asarray(self.kvals[k].qvals, dtype=np.float64)
+                     for k in valid]
+        qmatrices = [x.reshape(x.shape[0], -1) for x in qmatrices]
+        qvals = np.hstack(qmatrices)
+
+        starts = np.array([x[0] for x in self.pops_xrange])
+        counts = np.array([x[1] - x[0] for x in self.pops_xrange])
+        segments = np.repeat(np.arange(len(starts)), counts)[:, np.newaxis]
+
+        means = np.add.reduceat(qvals, starts) / counts[:, np.newaxis]
+        sds = np.sqrt(np.add.reduceat((qvals - means[segments[:, 0]]) ** 2,
+                                      starts) / counts[:, np.newaxis])
+
+        # Q values are between 0 and 1, so offsetting them by twice the
+        # population index and sorting each column sorts the values within
+        # each population, and the medians are at fixed positions
+        ordered = np.sort(qvals + 2 * segments, axis=0) - 2 * segments
+        medians = (ordered[starts + (counts - 1) // 2] +
+                   ordered[starts + counts // 2]) / 2
+
+        summary = OrderedDict()
+        bounds = np.cumsum([0] + [x.shape[1] for x in qmatrices])
+        for k, start, end in zip(valid, bounds[:-1], bounds[1:]):
+            summary[k] = {"n": counts, "mean": means[:, start:end],
+                          "median": medians[:, start:end],
+                          "sd": sds[:, start:end]}
+
+        return summary
+
+    def write_pop_summary(self, kvals, output_dir):
+        """
+        Writes the population summaries of several K values (see
+        pop_summary()) to a single tab separated table, with one line per
+        K, population and cluster.
+        :param kvals: (list) K values to summarize.
+        :param output_dir: (str) Path to the directory of the table.
+        """
+
+        summary = self.pop_summary(kvals)
+        filepath = join(output_dir, "PopulationSummary_{}.tsv".format(
+            "-".join([str(x) for x in summary])))
+
+        with open(filepath, "w") as fhandle:
+            fhandle.write("K\tPopulation\tN\tCluster\tMean\tMedian\tSD\n")
+            for k, stats in summary.items():
+                for p, pop in enumerate(self.pops):
+                    for i in range(stats["mean"].shape[1]):
+                        fhandle.write(
+                            "{}\t{}\t{}\t{}\t{:.4f}\t{:.4f}\t{:.4f}\n".format(
+                                k, pop, stats["n"][p], i + 1,
+                                stats["mean"][p, i], stats["median"][p, i],
+                                stats["sd"][p, i]))
+
+    def plot_pop_summary(self, kvals, output_dir, bw=False, fmt="svg",
+                         dpi=RASTER_DPI):
+        """
+        Generates a static plot of the mean Q values of each population (see
+        pop_summary()), with one bar per population and one band per K
+        value, drawn as a single image like plotk_comparative_static().
+        :param kvals: (list) K values of the plot.
+        :param output_dir: (string) Path of the plot file
+        :param bw: (bool) If True, plots will be generated with shades of grey
+        instead of colors to distinguish k groups.
+        :param fmt: (str) ["png", "pdf", "svg"] Format of the plot file.
+        :param dpi: (int) Resolution of the image, in dots per inch.
+        """
+
+        summary = self.pop_summary(kvals)
+        valid = list(reversed(summary))
+        npops = len(self.pops)
+        rows = 2 * COMPARATIVE_ROWS
+
+        image, white = _stacked_image([summary[k]["mean"] for k in valid],
+                                      rows)
+        band = rows + max(1, rows // 10)
+        width = min(max(4, .3 * npops), MAX_FIGURE_WIDTH)
+
+        if bw:
+            colors = [[(i + 1) / (white + 1)] * 3 for i in range(white)]
+        else:
+            clist = [[i / 255. for i in x] for x in cl.to_numeric(c)]
+            colors = [clist[i % len(clist)] for i in range(white)]
+
+        fig = Figure(figsize=(width, 1.2 * len(valid)))
+        axe = fig.add_subplot(111, xlim=(-.5, npops - .5),
+                              ylim=(0, image.shape[0]))
+        axe.imshow(image, cmap=ListedColormap(colors + [[1, 1, 1]]),
+                   norm=NoNorm(), aspect="auto", interpolation="none",
+                   origin="lower",
+                   extent=(-.5, npops - .5, 0, image.shape[0]))
+
+        # Frame each K value, and separate the populations
+        for j in range(len(valid)):
+            axe.add_patch(Rectangle((-.5, j * band), npops, rows,
+                                    fill=False, linewidth=2,
+                                    edgecolor="black"))
+        axe.vlines(np.arange(1, npops) - .5, 0, image.shape[0],
+                   linewidth=.5, color="black")
+
+        # Only draw as many labels as fit along the x-axis
+        step = int(np.ceil(npops / max(1, width * 36 / 10)))
+        axe.set_xticks(np.arange(npops)[::step])
+        axe.set_xticklabels([str(x) for x in self.pops][::step], rotation=45,
+                            ha="right", fontsize=10, weight="bold")
+        axe.set_yticks([j * band + rows / 2 for j in range(len(valid))])
+        axe.set_yticklabels(["K={}".format(k) for k in reversed(valid)],
+                            fontsize=12)
+        axe.tick_params(length=0)
+        axe.grid(False)
+        axe.set_facecolor("white")
+
+        for axis in ["top", "bottom", "left", "right"]:
+            axe.spines[axis].set_visible(False)
+
+        filepath = join(output_dir, "PopulationSummary_{}".format(
+            "-".join([str(x) for x in summary])))
+
+        fig.savefig("{}.{}".format(filepath, fmt), dpi=dpi,
+                    bbox_inches="tight")
 
 
 def plot_normalization(norm_dict, outdir):
@@ -947,8 +1547,6 @@ def plot_normalization(norm_dict, outdir):
     Draws a bar plot with normalized bestK estimation for MavericK.
     Result is similar to the plot produced by the R functions from MavericK.
     """
-    plt.clf()
-
     keys = ["norm_mean", "lower_limit", "upper_limit"]
 
     data = [(k, [vals[x] for x in keys]) for k, vals in norm_dict.items()]
@@ -959,10 +1557,12 @@ def plot_normalization(norm_dict, outdir):
     lower_limit = [x[1][0] - x[1][1] for x in data]
     upper_limit = [x[1][2] - x[1][0] for x in data]
 
-    plt.bar(range(len(means)), means, 0.5, yerr=[lower_limit, upper_limit],
-            fc=(0, 0, 1, 0.5), edgecolor="blue", linewidth=1.5, capsize=5)
-    plt.xticks(range(len(xlabs)), xlabs)
-    axes = plt.gca()
+    fig = Figure()
+    axes = fig.add_subplot(111)
+    axes.bar(range(len(means)), means, 0.5, yerr=[lower_limit, upper_limit],
+             fc=(0, 0, 1, 0.5), edgecolor="blue", linewidth=1.5, capsize=5)
+    axes.set_xticks(range(len(xlabs)))
+    axes.set_xticklabels(xlabs)
     axes.set_ylabel("Posterior probability")
     axes.set_xlabel("Ks")
     axes.set_facecolor('white')
@@ -970,17 +1570,79 @@ def plot_normalization(norm_dict, outdir):
     axes.spines["left"].set_color("black")
     axes.set_ylim([0, 1])
 
-    plt.savefig(join(outdir, "bestK", "bestk_evidence.svg"), dpi=200)
+    fig.savefig(join(outdir, "bestK", "bestk_evidence.svg"), dpi=200)
+
+
+# PlotList drawn by the workers of render_plots(), set by _init_worker()
+_WORKER_PLOTS = None
+
+
+def _init_worker(klist):
+    """
+    Initializer of the render_plots() workers, so that the PlotList is only
+    sent once to each worker instead of once per plot.
+    """
+    global _WORKER_PLOTS
+    _WORKER_PLOTS = klist
+
+
+def _render(task):
+    """
+    Process pool worker of render_plots(). Draws a single plot.
+    """
+    method, args, kwargs = task
+    getattr(_WORKER_PLOTS, method)(*args, **kwargs)
+
+
+def render_plots(klist, tasks, threads=1):
+    """
+    Draws plots of a PlotList, concurrently on a pool of processes. Errors are
+    raised in the order of the tasks, whatever the order in which the workers
+    finish.
+    :param klist: (PlotList) The plotted PlotList.
+    :param tasks: (list) (method, args, kwargs) tuples: each plot is drawn by
+    calling klist.method(*args, **kwargs).
+    :param threads: (int) Maximum number of processes.
+    """
+    if threads > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=min(threads, len(tasks)),
+                                 mp_context=process_context(),
+                                 initializer=_init_worker,
+                                 initargs=(klist,)) as executor:
+            for future in [executor.submit(_render, x) for x in tasks]:
+                future.result()
+    else:
+        for method, args, kwargs in tasks:
+            getattr(klist, method)(*args, **kwargs)
 
 
 def main(result_files, fmt, outdir, bestk=None, popfile=None, indfile=None,
-         filter_k=None, bw=False, use_ind=False):
+         filter_k=None, bw=False, use_ind=False, qfiles=None, store=None,
+         threads=1, raster=None, dpi=RASTER_DPI, report=False,
+         pop_summary=False):
     """
     Wrapper function that generates one plot for each K value.
+    :param qfiles: (dict) Optional {K: path} of Q matrix files that replace
+    the parsed values (see PlotList).
+    :param store: (ResultsStore) Optional results store the result files are
+    read from (see PlotK).
+    :param threads: (int) Number of processes used to parse the result files
+    and to draw the plots.
+    :param raster: (str) Optional format of raster static plots (see
+    PlotList.plotk_raster()), used instead of the SVG ones.
+    :param dpi: (int) Resolution of the raster plots.
+    :param report: (bool) If True, the interactive plots are written as an
+    HTML report: a single index page that loads the data file of each plot
+    on demand, and a single copy of plotly.js, instead of one standalone HTML
+    file per plot.
+    :param pop_summary: (bool) If True, the population summaries of all the
+    plotted K values are also written, as a table and as a plot (see
+    PlotList.pop_summary()).
     :return:
     """
 
-    klist = PlotList(result_files, fmt, popfile=popfile, indfile=indfile)
+    klist = PlotList(result_files, fmt, popfile=popfile, indfile=indfile,
+                     qfiles=qfiles, store=store, threads=threads)
 
     # Check if any of filter_k is not present in klist
     if filter_k:
@@ -991,14 +1653,50 @@ def main(result_files, fmt, outdir, bestk=None, popfile=None, indfile=None,
     else:
         filter_k = list(klist.kvals.keys())
 
-    # Plot all K files individually
+    # Plot all K files individually, and the comparative plot of the bestk
+    # sequence, if one is provided
+    tasks = []
+    names = []
     for k, kobj in klist:
 
         if k in filter_k:
-            klist.plotk([k], outdir)
-            klist.plotk_static(k, outdir, bw=bw, use_ind=use_ind)
-
-    # If a sequence of multiple bestk is provided, plot all files in a single
-    # plot
-    if bestk:
-        klist.plotk(bestk, outdir)
+            tasks.append(("plotk", ([k], outdir), {"report": report}))
+            names.append(klist.plot_name([k]))
+            if raster:
+                tasks.append(("plotk_raster", (k, outdir),
+                              {"bw": bw, "use_ind": use_ind, "fmt": raster,
+                               "dpi": dpi}))
+            else:
+                tasks.append(("plotk_static", (k, outdir),
+                              {"bw": bw, "use_ind": use_ind}))
+
+    # Long lists of K values are drawn as a single stacked image, which also
+    # gets a static plot
+    if bestk and len(bestk) > MAX_SUBPLOTS:
+        tasks.append(("plotk_comparative", (bestk, outdir),
+                      {"report": report}))
+        tasks.append(("plotk_comparative_static", (bestk, outdir),
+                      {"bw": bw, "use_ind": use_ind, "fmt": raster or "svg",
+                       "dpi": dpi}))
+        names.append(klist.plot_name(bestk))
+    # A single best K is the plot of that K value, which is already drawn,
+    # and drawing it twice would have two processes write the same file
+    elif bestk and klist.plot_name(bestk) not in names:
+        tasks.append(("plotk", (bestk, outdir), {"report": report}))
+        names.append(klist.plot_name(bestk))
+
+    # The population summaries of all K values are computed at once
+    if pop_summary and not klist.pops:
+        logging.warning("Population summaries require population "
+                        "information, from a popfile or an indfile. "
+                        "Skipping them.")
+    elif pop_summary:
+        kvals = [x for x in filter_k if x in klist.kvals]
+        klist.write_pop_summary(kvals, outdir)
+        tasks.append(("plot_pop_summary", (kvals, outdir),
+                      {"bw": bw, "fmt": raster or "svg", "dpi": dpi}))
+
+    render_plots(klist, tasks, threads)
+
+    if report:
+        write_report(names, outdir)
@@ -44,22 +44,34 @@ class AuxSanity(object):
                              f1=aux, f2=msg))
         raise SystemExit
 
-    def ind_mismatch(self, exp_array, kvals):
+    def ind_mismatch(self, nind, kvals):
 
         mismatch = []
 
         for kobj in kvals.values():
-            if exp_array.shape[0] != kobj.qvals.shape[0]:
+            if nind != kobj.qvals.shape[0]:
                 mismatch.append("{}: {} individuals (expected from "
                                 "popfile: {})".format(kobj.file_path,
                                                       kobj.qvals.shape[0],
-                                                      exp_array.shape[0]))
+                                                      nind))
 
         return mismatch
 
+    def missing_order(self, index):
+        """
+        Returns the order values, as strings, that are missing from the range
+        of an order column (from 1 to its maximum). Checked with a single
+        sorted set difference, instead of a membership test per value.
+        :param index: (numpy.ndarray) Integer order column.
+        """
+
+        return [str(x) for x in np.setdiff1d(np.arange(1, np.max(index)),
+                                             index)]
+
     def check_popfile(self, filepath, kvals, **kwargs):
         """
-        Check if the popfile" is valid.
+        Check if the popfile" is valid. Returns the popfile array, so that it
+        is not read again by the parser.
         """
         # Try to load array from popfile
         try:
@@ -71,6 +83,7 @@ class AuxSanity(object):
         except ValueError as exc:
             self.log_error(exc, "pop")
 
+        poparray = np.atleast_1d(poparray)
         index = poparray["original_order"]
 
         # Check if order in third column has only unique fields
@@ -82,31 +95,16 @@ class AuxSanity(object):
                                " ".join(dups)), "pop")
 
         # Check if there is no gap in the range of the ordering
-        missing = [str(x) for x in range(max(index)) if
-                   x != 0 and x not in index]
+        missing = self.missing_order(index)
         if missing:
             self.log_error("The order values in the third column of the"
                            " popfile must be in consecutive order."
                            " The following index(es) is(are) missing:"
                            " {}".format(" ".join(missing)), "pop")
 
-        # Expand poprarray matrix with the frequency of each population
-        exp_array = None
-        for idx, val in enumerate(poparray):
-            if exp_array is None:
-                exp_array = np.repeat(poparray[idx:idx + 1, np.newaxis],
-                                      val[1],
-                                      0)
-            else:
-                exp_array = np.vstack(
-                    [exp_array,
-                     np.repeat(poparray[idx:idx + 1, np.newaxis],
-                               val[1],
-                               0)])
-
-        # For each PlotK object, check if the poparray shape is compliant with
-        # the qvals matrices
-        mismatch = self.ind_mismatch(exp_array, kvals)
+        # For each PlotK object, check if the number of individuals of the
+        # popfile is compliant with the qvals matrices
+        mismatch = self.ind_mismatch(int(np.sum(poparray["nind"])), kvals)
 
         if mismatch:
             self.log_error("The number of individuals specified in"
@@ -114,9 +112,12 @@ class AuxSanity(object):
                            " individuals in the meanQ files:\n{}".format(
                                "\n".join(mismatch)), "pop")
 
+        return poparray
+
     def check_indfile(self, indfile, kvals):
         """
-        Check if the "indfile" is valid.
+        Check if the "indfile" is valid. Returns the indfile array, so that it
+        is not read again by the parser.
         """
         try:
             indarray = np.genfromtxt(indfile, dtype="|U20")
@@ -132,7 +133,7 @@ class AuxSanity(object):
         else:
             single_array = indarray
         # Check if number of individuals matches each qval matrix
-        mismatch = self.ind_mismatch(single_array, kvals)
+        mismatch = self.ind_mismatch(len(single_array), kvals)
         if mismatch:
             self.log_error("The number of individuals specified in"
                            " the indfile does not match the number of"
@@ -149,8 +150,7 @@ class AuxSanity(object):
                                    " the indfile must be integers:\n{}"
                                    "".format(exc), "ind")
                 # Check if there is no gap in the range of the ordering
-                missing = [str(x) for x in range(max(index)) if
-                           x != 0 and x not in index]
+                missing = self.missing_order(index)
                 if missing:
                     self.log_error(
                         "The order values in the third column of the"
@@ -158,6 +158,8 @@ class AuxSanity(object):
                         " The following index(es) is(are) missing:"
                         " {}".format(" ".join(missing)), "ind")
 
+        return indarray
+
 
 def cpu_checker(asked_threads):
     """Make cpu usage check to prevent excessive usage of threads.
@@ -0,0 +1,200 @@
+#!/usr/bin/python3
+
+# Copyright 2017 Francisco Pina Martins <f.pinamartins@gmail.com>
+# This file is part of structure_threader.
+# structure_threader is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# structure_threader is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import re
+import time
+
+# STRUCTURE (and MavericK) print lines such as "  1200:  0.89  ..." while
+# running. The leading number is the current MCMC iteration.
+PROGRESS_RE = re.compile(r"^\s*(\d+):")
+
+
+def process_cpu_time(pid):
+    """
+    Returns the CPU time (user + system, in seconds) used so far by a process
+    and its waited-for children, as read from /proc. Returns None if the
+    process is gone or /proc is not available (eg. on OSX).
+    """
+    try:
+        with open("/proc/{}/stat".format(pid)) as fhandle:
+            # The process name may contain spaces, so split after it.
+            fields = fhandle.read().rsplit(")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
+
+    # utime, stime, cutime and cstime are fields 14 to 17 of proc(5). The
+    # first two fields were left behind with the process name.
+    return sum(int(x) for x in fields[11:15]) / os.sysconf("SC_CLK_TCK")
+
+
+def load_average():
+    """
+    Returns the 1 minute system load average, or None if unavailable.
+    """
+    try:
+        return os.getloadavg()[0]
+    except OSError:
+        return None
+
+
+class ConcurrencyController(object):
+    """
+    Tunes the number of concurrently running jobs of a JobPool to maximize
+    the total throughput, within user set bounds.
+
+    The throughput is measured as the sum of the "relative speeds" of all
+    running jobs. The relative speed of a job is its current iteration rate
+    divided by the best rate it has shown so far, when the child reports its
+    progress, or its CPU efficiency (CPU seconds per wall clock second)
+    otherwise. Memory bandwidth contention slows every job down, so adding a
+    job only pays off if the sum grows. A hill climb moves the number of
+    slots in one direction while that happens, and turns back (and settles
+    for a few intervals) when it does not. The number of slots is also
+    lowered whenever the system is overloaded by other users' processes.
+    """
+
+    def __init__(self, min_slots, max_slots, interval=30, gain=0.05,
+                 min_efficiency=0.5, settle=3):
+        """
+        :param min_slots: (int) Lower bound for the number of jobs.
+        :param max_slots: (int) Upper bound for the number of jobs.
+        :param interval: (int) Seconds between two measurements.
+        :param gain: (float) Minimum relative throughput gain for an extra
+        job to be considered worth it.
+        :param min_efficiency: (float) Average relative speed below which
+        jobs are considered to be starving each other.
+        :param settle: (int) Number of intervals to wait after turning back.
+        """
+        self.min_slots = max(1, min_slots)
+        self.max_slots = max(self.min_slots, max_slots)
+        self.interval = interval
+        self.gain = gain
+        self.min_efficiency = min_efficiency
+        self.settle = settle
+        self.cpus = os.cpu_count() or 1
+
+        """
+        Progress of each child as {pid: [(time, iteration) of the last
+        progress line, current rate, best rate]}
+        """
+        self.progress = {}
+
+        self._cpu = {}
+        self._last = None
+        self._previous = None
+        self._direction = 1
+        self._hold = 0
+
+    def report(self, pid, line):
+        """
+        Parses a line of output of a child and updates its iteration rate.
+        """
+        match = PROGRESS_RE.match(line)
+        if match is None:
+            return
+        now = time.monotonic()
+        iteration = int(match.group(1))
+        last = self.progress.get(pid)
+        if last is None:
+            self.progress[pid] = [(now, iteration), None, None]
+            return
+        (then, previous), _, best = last
+        if now <= then or iteration <= previous:
+            return
+        rate = (iteration - previous) / (now - then)
+        self.progress[pid] = [(now, iteration), rate,
+                              rate if best is None else max(best, rate)]
+
+    def _relative_speeds(self, processes, elapsed):
+        """
+        Returns the relative speed of every process that was already running
+        at the previous measurement.
+        """
+        speeds = []
+        cpu = {}
+        for process in processes:
+            cpu[process.pid] = process_cpu_time(process.pid)
+            progress = self.progress.get(process.pid)
+            if progress is not None and progress[1] is not None:
+                speeds.append(progress[1] / progress[2])
+            elif cpu[process.pid] is not None and process.pid in self._cpu:
+                used = cpu[process.pid] - self._cpu[process.pid]
+                speeds.append(min(1.0, max(0.0, used / elapsed)))
+        self._cpu = cpu
+        # Forget the children that are gone
+        self.progress = {x: y for x, y in self.progress.items() if x in cpu}
+
+        return speeds
+
+    def update(self, pool):
+        """
+        Measures the throughput of the pool and returns the number of slots
+        it should use from now on.
+        """
+        now = time.monotonic()
+        if self._last is not None and now - self._last < self.interval:
+            return pool.slots
+
+        elapsed = None if self._last is None else now - self._last
+        self._last = now
+        speeds = self._relative_speeds(pool.processes, elapsed or 1)
+
+        # Only learn from intervals where the pool was saturated by jobs that
+        # ran during the whole interval.
+        if elapsed is None or not speeds or len(speeds) < pool.slots:
+            return pool.slots
+
+        return self.decide(len(speeds), sum(speeds),
+                           sum(speeds) / len(speeds), load_average())
+
+    def decide(self, running, throughput, efficiency, load):
+        """
+        Picks the number of slots for the next interval, given the throughput
+        measured with "running" concurrent jobs, their average relative
+        speed (efficiency) and the system load average.
+        """
+        previous = self._previous
+        self._previous = (running, throughput)
+
+        if (load is not None and load > self.cpus + 0.5) or \
+                efficiency < self.min_efficiency:
+            # Either other users need the cores or our jobs are starving
+            # each other. Back off.
+            self._direction = -1
+            self._hold = 0
+        elif self._hold > 0:
+            self._hold -= 1
+            return running
+        elif previous is not None and previous[0] != running:
+            # Did the last move pay off? Going up must gain throughput, going
+            # down must not lose it.
+            if running > previous[0]:
+                paid_off = throughput > previous[1] * (1 + self.gain)
+            else:
+                paid_off = throughput >= previous[1] * (1 - self.gain)
+            if not paid_off:
+                self._direction = -self._direction
+                self._hold = self.settle
+
+        target = running + self._direction
+        if target > self.max_slots or target < self.min_slots:
+            # Hit a bound, so the next probe goes the other way.
+            self._direction = -self._direction
+            target = max(self.min_slots, min(self.max_slots, running))
+
+        return target
@@ -0,0 +1,118 @@
+#!/usr/bin/python3
+
+# Copyright 2017 Francisco Pina Martins <f.pinamartins@gmail.com>
+# This file is part of structure_threader.
+# structure_threader is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# structure_threader is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+
+from collections import defaultdict
+
+# Rough runtime of each wrapped program per K value, relative to the others.
+# Only used to order jobs before any of their runtimes are known.
+RELATIVE_COST = {"structure": 10, "maverick": 10, "faststructure": 1}
+
+
+class CostModel(object):
+    """
+    Estimates the wall clock time of wrapped program jobs from the runtimes
+    of the jobs that already finished. Estimates are kept per program and K
+    value. When a K value was never seen, the runtime is extrapolated from
+    the other K values of the same program, assuming it grows linearly with
+    K (which is roughly the case for all wrapped programs).
+    """
+
+    def __init__(self):
+        """
+        Observed runtimes as {(program, K): [seconds, ...]}
+        """
+        self.runtimes = defaultdict(list)
+
+        """
+        Prior estimates (eg. from pilot runs) as {(program, K): seconds}.
+        These are only used until a real runtime is observed.
+        """
+        self.priors = {}
+
+        self._lock = threading.Lock()
+
+    def seed(self, prog, k, seconds):
+        """
+        Sets a prior estimate for the jobs of a program and K value.
+        """
+        with self._lock:
+            self.priors[(prog, k)] = seconds
+
+    def observe(self, job, seconds):
+        """
+        Records the runtime of a finished job.
+        """
+        with self._lock:
+            self.runtimes[(job.prog, job.k)].append(seconds)
+
+    def _known(self, prog):
+        """
+        Returns the best known runtime for each K of a program as {K: secs}.
+        """
+        known = {k: secs for (name, k), secs in self.priors.items()
+                 if name == prog}
+        known.update({k: sum(secs) / len(secs) for (name, k), secs in
+                      self.runtimes.items() if name == prog and secs})
+        return known
+
+    def estimate(self, job):
+        """
+        Returns the estimated runtime (in seconds) of a job, or None if
+        nothing is known about its program yet.
+        """
+        with self._lock:
+            known = self._known(job.prog)
+
+        if job.k in known:
+            return known[job.k]
+        if not known:
+            return None
+        if len(known) == 1:
+            k_val, secs = known.popitem()
+            return secs * job.k / k_val
+
+        # Least squares fit of runtime = a + b * K
+        kvals = list(known.keys())
+        mean_k = sum(kvals) / len(kvals)
+        mean_t = sum(known.values()) / len(kvals)
+        var_k = sum((x - mean_k) ** 2 for x in kvals)
+        slope = sum((x - mean_k) * (known[x] - mean_t) for x in kvals) / var_k
+
+        return max(mean_t + slope * (job.k - mean_k), min(known.values()))
+
+
+def cost_function(jobs, cost_model=None):
+    """
+    Returns a function that gives the expected cost of a job, for ordering
+    purposes. The cost model estimates are used when it has one for every
+    job, otherwise costs are taken from RELATIVE_COST and grow with K.
+    """
+    if cost_model is not None and \
+            all(cost_model.estimate(x) is not None for x in jobs):
+        return cost_model.estimate
+
+    return lambda job: RELATIVE_COST.get(job.prog, 1) * job.k
+
+
+def longest_first(jobs, cost_model=None):
+    """
+    Orders jobs from the most to the least expensive, so that the short jobs
+    are left to fill the slots freed at the end of the run.
+    """
+    return sorted(jobs, key=cost_function(jobs, cost_model), reverse=True)
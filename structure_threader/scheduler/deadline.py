@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+
+# Copyright 2017 Francisco Pina Martins <f.pinamartins@gmail.com>
+# This file is part of structure_threader.
+# structure_threader is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# structure_threader is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
+
+import re
+
+DURATION_RE = re.compile(r"^(?:(\d+)d)?(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s?)?$")
+
+
+def parse_duration(duration):
+    """
+    Converts a duration string such as "8h", "90m", "1h30m" or "3600" (in
+    seconds) into a number of seconds. Returns None if the string is not a
+    valid duration.
+    """
+    match = DURATION_RE.match(duration.strip().lower())
+    if match is None or not any(match.groups()):
+        return None
+
+    days, hours, minutes, seconds = [int(x) if x else 0
+                                     for x in match.groups()]
+
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+def anytime_order(jobs, cost=None):
+    """
+    Orders jobs so that useful partial results come first: one replicate of
+    every K, then a second replicate of every K, and so on. Within each round
+    the slowest jobs go first, so that every round finishes as early as
+    possible.
+    :param cost: (callable) Optional function returning the expected cost of
+    a job (see cost_model.cost_function()). Defaults to the K value.
+    """
+    if cost is None:
+        cost = lambda x: x.k
+
+    return sorted(jobs, key=lambda x: (x.rep, -cost(x)))
+
+
+def completed_runs(jobs, k_list, replicates):
+    """
+    Given the successfully finished jobs of a program, returns the K values
+    that have at least one finished replicate, and the replicates that
+    finished for every one of those K values.
+    """
+    done = {}
+    for job in jobs:
+        done.setdefault(job.k, set()).add(job.rep)
+
+    kvals = [x for x in k_list if x in done]
+    reps = [x for x in replicates if all(x in done[k] for k in kvals)]
+
+    # No replicate finished for every K. Keep the one that finished for the
+    # most K values, and only those K values.
+    if kvals and not reps:
+        best = max(replicates, key=lambda x: sum(x in done[k] for k in kvals))
+        kvals = [x for x in kvals if best in done[x]]
+        reps = [best]
+
+    return kvals, reps
@@ -0,0 +1,401 @@
+#!/usr/bin/python3
+
+# Copyright 2017 Francisco Pina Martins <f.pinamartins@gmail.com>
+# This file is part of structure_threader.
+# structure_threader is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# structure_threader is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
+
+import copy
+import itertools
+import logging
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+try:
+    import scheduler.job_pool as jp
+    import scheduler.pilot as pilot
+    import evanno.harvesterCore as hc
+    from plotter.structplot import PlotK
+except ImportError:
+    import structure_threader.scheduler.job_pool as jp
+    import structure_threader.scheduler.pilot as pilot
+    import structure_threader.evanno.harvesterCore as hc
+    from structure_threader.plotter.structplot import PlotK
+
+
+def param_files(arg):
+    """
+    Returns the paths to the mainparams and extraparams files of a STRUCTURE
+    analysis, before or after wrappers.structure_wrapper.str_param_checker()
+    was called on its arguments.
+    """
+    if isinstance(arg.params, list):
+        return arg.params[1], arg.params[3]
+
+    return pilot.structure_params(arg)
+
+
+def input_layout(wrapped_prog, arg):
+    """
+    Returns the number of header lines and the number of lines per individual
+    of the input file of an analysis.
+    """
+    if wrapped_prog == "faststructure":
+        # fastStructure's "str" format: no header, one line per chromosome
+        return 0, 2
+
+    params = pilot.read_mainparams(param_files(arg)[0])
+    header = sum(int(params.get(x, 0)) for x in
+                 ("MARKERNAMES", "RECESSIVEALLELES", "MAPDISTANCES"))
+    if int(params.get("ONEROWPERIND", 0)) == 1:
+        return header, 1
+
+    return header, int(params.get("PLOIDY", 2))
+
+
+def read_individuals(infile, header, lines_per_ind):
+    """
+    Reads a STRUCTURE formatted input file. Returns the header lines and a
+    list with the lines of each individual.
+    """
+    with open(infile) as fhandle:
+        lines = [x for x in fhandle if x.strip() != ""]
+
+    body = lines[header:]
+    if len(body) % lines_per_ind != 0:
+        raise ValueError("The number of lines in {} is not a multiple of "
+                         "{}.".format(infile, lines_per_ind))
+
+    return lines[:header], [body[i:i + lines_per_ind]
+                            for i in range(0, len(body), lines_per_ind)]
+
+
+def write_individuals(filename, header, individuals, indices):
+    """
+    Writes a STRUCTURE formatted input file with only the individuals in
+    indices.
+    """
+    with open(filename, "w") as fhandle:
+        fhandle.writelines(header)
+        for i in indices:
+            fhandle.writelines(individuals[i])
+
+
+def individual_table(arg, nind):
+    """
+    Returns the indfile rows (label, population, order) of every individual
+    in the input file, from either the indfile or the popfile. Returns None
+    if neither was provided.
+    """
+    if arg.indfile is not None:
+        table = np.genfromtxt(arg.indfile, dtype="|U20")
+        if len(table.shape) == 1:
+            table = table[:, np.newaxis]
+        return table
+
+    if arg.popfile is not None:
+        datatype = np.dtype([("popname", "|U20"), ("nind", int),
+                             ("original_order", int)])
+        poparray = np.atleast_1d(np.genfromtxt(arg.popfile, dtype=datatype))
+        labels = np.arange(1, nind + 1).astype("|U20")
+        return np.column_stack(
+            (labels, np.repeat(poparray["popname"], poparray["nind"]),
+             np.repeat(poparray["original_order"],
+                       poparray["nind"]).astype("|U20")))
+
+    return None
+
+
+def assign_clusters(qvals, threshold):
+    """
+    Assigns each individual to the cluster with its highest Q value, as long
+    as that value reaches the threshold. Admixed individuals are left out.
+    Returns a list with the indices of the individuals of each cluster.
+    """
+    best = qvals.argmax(axis=1)
+    assigned = qvals.max(axis=1) >= threshold
+
+    return [np.flatnonzero(assigned & (best == x))
+            for x in range(qvals.shape[1])]
+
+
+class Analysis(object):
+    """
+    One node of a hierarchical analysis: a complete K sweep on a set of
+    individuals.
+    """
+
+    def __init__(self, wrapped_prog, arg, depth, members=None):
+        """
+        :param arg: (argparse.Namespace) Run arguments of this analysis.
+        :param depth: (int) 0 for the analysis of the full data set.
+        :param members: (numpy.array) Indices of the individuals of this
+        analysis in the original input file. None means all of them.
+        """
+        self.wrapped_prog = wrapped_prog
+        self.arg = arg
+        self.depth = depth
+        self.members = members
+
+        """
+        Number of jobs of this analysis that were submitted but did not
+        return yet, and the jobs that finished successfully
+        """
+        self.pending = 0
+        self.finished = []
+
+        """
+        Best K value, and the number of individuals of each cluster that was
+        analysed further. Set once the analysis is complete
+        """
+        self.bestk = None
+        self.clusters = []
+
+        self.done = False
+
+
+class HierarchicalRun(object):
+    """
+    Runs the hierarchical (recursive) analysis: once all the jobs of an
+    analysis have returned, its bestK is chosen, the individuals are assigned
+    to clusters, and a new analysis of each cluster is submitted to the same
+    JobPool, so that sub-analyses start as soon as their parent finishes.
+    """
+
+    def __init__(self, process, max_depth=2, min_size=10, threshold=0.8):
+        """
+        :param process: (callable) Called as process(wrapped_prog, arg,
+        finished) once all jobs of an analysis returned. Runs the bestK tests
+        and plots and returns the list of best K values (or None).
+        :param max_depth: (int) Analyses at this depth are not split further.
+        :param min_size: (int) Clusters with fewer individuals are not
+        analysed further.
+        :param threshold: (float) Minimum Q value to assign an individual to
+        a cluster.
+        """
+        self.process = process
+        self.max_depth = max_depth
+        self.min_size = min_size
+        self.threshold = threshold
+
+        """
+        Every analysis, in submission order, and a {id(arg): Analysis} map
+        to find the analysis of a job
+        """
+        self.analyses = []
+        self._by_arg = {}
+
+        self.pool = None
+        self._lock = threading.Lock()
+        # Harvesting and plotting are not thread safe (matplotlib)
+        self._process_lock = threading.Lock()
+
+    def add(self, analysis, jobs):
+        """
+        Registers an analysis and the jobs that belong to it. The jobs still
+        have to be submitted to the pool.
+        """
+        with self._lock:
+            self.analyses.append(analysis)
+            self._by_arg[id(analysis.arg)] = analysis
+            analysis.pending += len(jobs)
+
+    def submit(self, analysis):
+        """
+        Creates the jobs of a sub-analysis and submits them to the pool.
+        """
+        arg = analysis.arg
+        jobs = [jp.Job(analysis.wrapped_prog, k, rep, arg) for k, rep in
+                itertools.product(arg.k_list, arg.replicates)][::-1]
+        self.add(analysis, jobs)
+        for job in jobs:
+            self.pool.submit(job)
+
+    def job_done(self, job, status):
+        """
+        JobPool callback, executed in the thread of each finished job.
+        Completes the analysis of the job once all its jobs returned.
+        """
+        with self._lock:
+            analysis = self._by_arg[id(job.arg)]
+            if status[0] == 0:
+                analysis.finished.append(job)
+            analysis.pending -= 1
+            if analysis.pending > 0 or analysis.done:
+                return
+            analysis.done = True
+
+        # Nothing new is launched once the deadline is reached
+        self.complete(analysis, self.pool.deadline is None or
+                      time.monotonic() < self.pool.deadline)
+
+    def finish(self):
+        """
+        Completes the analyses that still had jobs left when the pool stopped
+        (eg. because of the deadline), without splitting them further.
+        """
+        for analysis in self.analyses:
+            if not analysis.done and analysis.finished:
+                analysis.done = True
+                self.complete(analysis, False)
+
+    def complete(self, analysis, split=True):
+        """
+        Runs the bestK tests and plots of an analysis and, when split is
+        True, submits a sub-analysis of each of its clusters.
+        """
+        try:
+            with self._process_lock:
+                bestk = self.process(analysis.wrapped_prog, analysis.arg,
+                                     analysis.finished)
+        except (Exception, SystemExit) as err:
+            # A failing sub-analysis should not bring down the whole tree.
+            # The sanity checks and the harvester exit on errors.
+            if analysis.depth == 0:
+                raise
+            logging.error("Unable to process the analysis in %s: %s",
+                          analysis.arg.outpath, err)
+            return
+
+        if not bestk:
+            return
+        analysis.bestk = bestk[0]
+        if not split or analysis.depth >= self.max_depth or \
+                analysis.bestk < 2:
+            return
+
+        try:
+            qvals = self.assignment_qvals(analysis)
+        except (OSError, IndexError, ValueError, hc.HarvesterError) as err:
+            logging.error("Unable to read the Q-matrix of K=%s in %s: %s",
+                          analysis.bestk, analysis.arg.outpath, err)
+            return
+
+        for clust, indices in enumerate(
+                assign_clusters(qvals, self.threshold), 1):
+            if len(indices) < self.min_size:
+                logging.info("Cluster %s of %s has %s individuals. Not "
+                             "analysing it further.", clust,
+                             analysis.arg.outpath, len(indices))
+                continue
+            try:
+                child = self.subset(analysis, clust, indices)
+            except (OSError, ValueError) as err:
+                logging.error("Unable to write the input files of cluster "
+                              "%s of %s: %s", clust, analysis.arg.outpath,
+                              err)
+                continue
+            analysis.clusters.append(len(indices))
+            logging.info("Launching the analysis of cluster %s of %s (%s "
+                         "individuals).", clust, analysis.arg.outpath,
+                         len(indices))
+            self.submit(child)
+
+    def assignment_qvals(self, analysis):
+        """
+        Returns the Q-matrix used to assign the individuals of an analysis to
+        clusters: the replicate of the best K with the highest likelihood.
+        """
+        arg = analysis.arg
+        if analysis.wrapped_prog == "faststructure":
+            return PlotK(os.path.join(arg.outpath, "fS_run_K.{}.meanQ".format(
+                analysis.bestk)), "faststructure").qvals
+
+        best = None
+        for job in analysis.finished:
+            if job.k != analysis.bestk:
+                continue
+            filename = os.path.join(arg.outpath, "str_K{}_rep{}_f".format(
+                job.k, job.rep))
+            run = hc.readFile(filename, hc.Data())[0]
+            if run is not None and (best is None or
+                                    run.estLnProb > best[0]):
+                best = (run.estLnProb, filename)
+
+        return PlotK(best[1], "structure").qvals
+
+    def subset(self, analysis, clust, indices):
+        """
+        Writes the input files of the analysis of one cluster and returns
+        the new Analysis.
+        """
+        arg = analysis.arg
+        child_arg = copy.copy(arg)
+        child_arg.outpath = os.path.join(arg.outpath,
+                                         "cluster_{}".format(clust))
+        os.makedirs(child_arg.outpath, exist_ok=True)
+        child_arg.k_list = [x for x in arg.k_list if x <= len(indices)]
+
+        header, lines_per_ind = input_layout(analysis.wrapped_prog, arg)
+        header, individuals = read_individuals(arg.infile, header,
+                                               lines_per_ind)
+        child_arg.infile = os.path.join(child_arg.outpath, "subset.str")
+        write_individuals(child_arg.infile, header, individuals, indices)
+
+        if analysis.wrapped_prog == "structure":
+            mainparams, extraparams = param_files(arg)
+            child_main = os.path.join(child_arg.outpath, "mainparams")
+            pilot.write_mainparams(mainparams, child_main,
+                                   {"NUMINDS": len(indices)})
+            child_extra = os.path.join(child_arg.outpath, "extraparams")
+            if os.path.isfile(extraparams):
+                shutil.copy(extraparams, child_extra)
+            else:
+                open(child_extra, "w").close()
+            child_arg.params = ["-m", child_main, "-e", child_extra]
+
+        table = individual_table(arg, len(individuals))
+        if table is not None:
+            child_arg.indfile = os.path.join(child_arg.outpath,
+                                             "individuals.txt")
+            child_arg.popfile = None
+            table = table[indices]
+            if table.shape[1] > 2:
+                # The order of the populations of the cluster, without the
+                # gaps left by the populations that are not in it
+                order = table[:, 2].astype(int)
+                table[:, 2] = np.unique(order, return_inverse=True)[1] + 1
+            np.savetxt(child_arg.indfile, table, fmt="%s", delimiter="\t")
+
+        if analysis.members is None:
+            members = indices
+        else:
+            members = analysis.members[indices]
+        np.savetxt(os.path.join(child_arg.outpath, "members.txt"),
+                   members + 1, fmt="%d")
+
+        return Analysis(analysis.wrapped_prog, child_arg,
+                        analysis.depth + 1, members)
+
+    def write_summary(self, filename):
+        """
+        Writes a table with the outcome of every analysis of the tree.
+        """
+        root = self.analyses[0].arg.outpath
+        with open(filename, "w") as fhandle:
+            fhandle.write("Analysis\tDepth\tIndividuals\tBestK\t"
+                          "Split_clusters\n")
+            for analysis in self.analyses:
+                if analysis.members is None:
+                    nind = "all"
+                else:
+                    nind = str(len(analysis.members))
+                fhandle.write("{}\t{}\t{}\t{}\t{}\n".format(
+                    os.path.relpath(analysis.arg.outpath, root),
+                    analysis.depth, nind,
+                    "NA" if analysis.bestk is None else analysis.bestk,
+                    ",".join(str(x) for x in analysis.clusters) or "NA"))
@@ -0,0 +1,263 @@
+#!/usr/bin/python3
+
+# Copyright 2017 Francisco Pina Martins <f.pinamartins@gmail.com>
+# This file is part of structure_threader.
+# structure_threader is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# structure_threader is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import multiprocessing
+import threading
+import time
+
+from collections import deque, namedtuple
+
+# A single wrapped program run: the program name, the K value, the replicate
+# number and the argparse namespace with the options for that run.
+Job = namedtuple("Job", ["prog", "k", "rep", "arg"])
+
+
+def process_context():
+    """
+    Returns the multiprocessing context to start a process pool with. Forking
+    while other threads are running (eg. the JobPool threads of a
+    hierarchical run) can deadlock the children on locks that those threads
+    held at fork time, so the pool is then started from a forkserver.
+    Otherwise, None (the default context).
+    """
+    if threading.active_count() > 1 and \
+            "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+
+    return None
+
+
+class JobPool(object):
+    """
+    Runs wrapped program jobs on a pool of threads. Each thread only
+    babysits one external process, so threads are enough here, and unlike
+    multiprocessing.Pool they allow the number of concurrent jobs ("slots")
+    to be changed while the pool is running.
+    """
+
+    def __init__(self, worker, slots, controller=None, interval=5,
+                 cost_model=None, deadline=None, policy="kill",
+                 callback=None):
+        """
+        :param worker: (callable) Function that runs a single Job. It is
+        called as worker(job, tracker=pool) and must return the worker
+        status tuple (see structure_threader.runprogram()).
+        :param slots: (int) Number of jobs that may run at the same time.
+        :param controller: (object) Optional object with an update(pool)
+        method that returns the number of slots to use from then on.
+        :param interval: (int) Maximum number of seconds between two
+        controller updates.
+        :param cost_model: (CostModel) Optional runtime estimator. It is fed
+        the runtime of every successful job, and used to decide which jobs
+        still fit before the deadline.
+        :param deadline: (float) Optional time.monotonic() value after which
+        no more jobs are launched.
+        :param policy: (str) ["kill", "finish"] What to do with the jobs that
+        are still running when the deadline is reached.
+        :param callback: (callable) Optional function called as
+        callback(job, status) in the thread of each job that returned. It may
+        submit new jobs.
+        """
+        self.worker = worker
+        self.slots = slots
+        self.controller = controller
+        self.interval = interval
+        self.cost_model = cost_model
+        self.deadline = deadline
+        self.policy = policy
+        self.callback = callback
+
+        """
+        Jobs waiting to be launched, and the statuses of finished ones
+        """
+        self.queue = deque()
+        self.results = []
+
+        """
+        Jobs that finished successfully, jobs that were never launched
+        because of the deadline, and jobs that were killed at the deadline
+        """
+        self.finished = []
+        self.skipped = []
+        self.interrupted = []
+
+        """
+        Popen objects of the child processes that are currently running
+        """
+        self.processes = set()
+
+        """
+        Number of jobs currently being handled by a thread
+        """
+        self.running = 0
+
+        self._expired = False
+        self._errors = []
+        self._cond = threading.Condition()
+
+    def submit(self, job):
+        """
+        Adds a job to the queue. May be called while the pool is running.
+        """
+        with self._cond:
+            self.queue.append(job)
+            self._cond.notify()
+
+    def register(self, process):
+        """
+        Keeps track of a running child process (a Popen object).
+        """
+        with self._cond:
+            self.processes.add(process)
+            # Launched just as the deadline was reached
+            if self._expired and self.policy == "kill":
+                process.terminate()
+
+    def unregister(self, process):
+        """
+        Stops tracking a child process once it has exited.
+        """
+        with self._cond:
+            self.processes.discard(process)
+
+    def report(self, process, line):
+        """
+        Forwards a line of output of a running child to the controller, which
+        may use it to measure the progress of that child.
+        """
+        if self.controller is not None and \
+                hasattr(self.controller, "report"):
+            self.controller.report(process.pid, line)
+
+    def _next_job(self):
+        """
+        Returns the next job to launch, or None if there is none. When there
+        is a deadline, jobs that are not expected to finish before it are
+        skipped.
+        """
+        while self.queue:
+            job = self.queue.popleft()
+            if self.deadline is None:
+                return job
+
+            remaining = self.deadline - time.monotonic()
+            estimate = None
+            if self.cost_model is not None:
+                estimate = self.cost_model.estimate(job)
+            if remaining > 0 and (estimate is None or estimate <= remaining):
+                return job
+
+            logging.info("Skipping %s job for K%s, replicate %s: it is not "
+                         "expected to finish before the deadline.", job.prog,
+                         job.k, job.rep)
+            self.skipped.append(job)
+
+        return None
+
+    def _expire(self):
+        """
+        Handles the deadline: queued jobs are dropped and, depending on the
+        policy, the running ones are killed.
+        """
+        self._expired = True
+        logging.warning("The deadline was reached. %s queued jobs will not "
+                        "be launched.", len(self.queue))
+        self.skipped.extend(self.queue)
+        self.queue.clear()
+        if self.policy == "kill":
+            for process in self.processes:
+                logging.warning("Killing process %s.", process.pid)
+                process.terminate()
+
+    def _run_job(self, job):
+        """
+        Runs a single job and stores its status. Executed in its own thread.
+        """
+        start = time.monotonic()
+        # The slot is always released, or run() would wait for it forever.
+        # Errors (including SystemExit) are re-raised by run() in the main
+        # thread.
+        try:
+            try:
+                status = self.worker(job, tracker=self)
+            except BaseException as err:
+                status = (-1, None)
+                with self._cond:
+                    self._errors.append(err)
+            with self._cond:
+                if status[0] == 0:
+                    self.finished.append(job)
+                    if self.cost_model is not None:
+                        self.cost_model.observe(job,
+                                                time.monotonic() - start)
+                if self._expired and self.policy == "kill" and \
+                        status[0] != 0:
+                    self.interrupted.append(job)
+                else:
+                    self.results.append(status)
+            # Called before the job is marked as done, so that any job it
+            # submits is queued before run() can decide that there is nothing
+            # left to do.
+            if self.callback is not None:
+                try:
+                    self.callback(job, status)
+                except BaseException as err:
+                    with self._cond:
+                        self._errors.append(err)
+        finally:
+            with self._cond:
+                self.running -= 1
+                self._cond.notify()
+
+    def run(self):
+        """
+        Launches queued jobs while there are free slots and blocks until every
+        job (including the ones submitted while running) has finished.
+        Returns the list of worker statuses.
+        """
+        with self._cond:
+            while self.queue or self.running:
+                while self.running < self.slots:
+                    job = self._next_job()
+                    if job is None:
+                        break
+                    self.running += 1
+                    threading.Thread(target=self._run_job, args=(job,),
+                                     daemon=True).start()
+
+                wait = self.interval
+                if self.deadline is not None and not self._expired:
+                    remaining = self.deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._expire()
+                        continue
+                    wait = min(wait, remaining)
+
+                self._cond.wait(wait)
+
+                if self.controller is not None:
+                    slots = self.controller.update(self)
+                    if slots != self.slots:
+                        logging.info("Adjusting the number of concurrent "
+                                     "jobs from %s to %s.", self.slots, slots)
+                        self.slots = slots
+
+                if self._errors:
+                    raise self._errors[0]
+
+        return self.results
@@ -0,0 +1,273 @@
+#!/usr/bin/python3
+
+# Copyright 2017 Francisco Pina Martins <f.pinamartins@gmail.com>
+# This file is part of structure_threader.
+# structure_threader is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# structure_threader is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
+
+import copy
+import logging
+import os
+import re
+
+try:
+    import scheduler.job_pool as jp
+    import scheduler.cost_model as cm
+    import wrappers.maverick_wrapper as mw
+    import evanno.harvesterCore as hc
+    import evanno.fastChooseK as fc
+    from plotter.structplot import PlotK
+except ImportError:
+    import structure_threader.scheduler.job_pool as jp
+    import structure_threader.scheduler.cost_model as cm
+    import structure_threader.wrappers.maverick_wrapper as mw
+    import structure_threader.evanno.harvesterCore as hc
+    import structure_threader.evanno.fastChooseK as fc
+    from structure_threader.plotter.structplot import PlotK
+
+# Length of the pilot runs, in MCMC iterations
+PILOT_BURNIN = 100
+PILOT_SAMPLES = 100
+
+# fastStructure has no fixed length, so its pilot uses a loose convergence
+# criterion instead.
+PILOT_FS_TOL = "--tol=10e-2"
+
+DEFINE_RE = re.compile(r"^(#define\s+)(\w+)(\s+)(\S+)")
+
+
+def read_mainparams(filename):
+    """
+    Parses a STRUCTURE mainparams (or extraparams) file and returns the
+    defined values as a {NAME: value} dict of strings.
+    """
+    parameters = {}
+    with open(filename) as fhandle:
+        for line in fhandle:
+            match = DEFINE_RE.match(line)
+            if match is not None:
+                parameters[match.group(2)] = match.group(4)
+
+    return parameters
+
+
+def write_mainparams(source, destination, overrides):
+    """
+    Copies a STRUCTURE mainparams file, replacing the values of the
+    parameters in the overrides dict ({NAME: value}).
+    """
+    def _override(match):
+        if match.group(2) not in overrides:
+            return match.group(0)
+        return "{}{}{}{}".format(match.group(1), match.group(2),
+                                 match.group(3), overrides[match.group(2)])
+
+    with open(source) as infile, open(destination, "w") as outfile:
+        for line in infile:
+            outfile.write(DEFINE_RE.sub(_override, line))
+
+
+def write_mav_params(source, destination, overrides):
+    """
+    Copies a MavericK parameters file, replacing (or adding) the values of
+    the parameters in the overrides dict ({name: value}).
+    """
+    missing = dict(overrides)
+    with open(source) as infile, open(destination, "w") as outfile:
+        for line in infile:
+            fields = line.split()
+            if not line.startswith("#") and fields and fields[0] in missing:
+                line = "{}\t{}\n".format(fields[0], missing.pop(fields[0]))
+            outfile.write(line)
+        for param, value in missing.items():
+            outfile.write("{}\t{}\n".format(param, value))
+
+
+def structure_params(arg):
+    """
+    Returns the paths to the mainparams and extraparams files that STRUCTURE
+    will use (see wrappers.structure_wrapper.str_param_checker()).
+    """
+    if arg.params is not None:
+        mainparams = arg.params
+    else:
+        mainparams = os.path.join(os.path.dirname(arg.infile), "mainparams")
+
+    return mainparams, os.path.join(os.path.dirname(mainparams),
+                                    "extraparams")
+
+
+def run_iterations(wrapped_prog, arg):
+    """
+    Returns the number of MCMC iterations of a full run of the wrapped
+    program, or None when it can not be known beforehand.
+    """
+    try:
+        if wrapped_prog == "structure":
+            params = read_mainparams(structure_params(arg)[0])
+            return int(params["BURNIN"]) + int(params["NUMREPS"])
+
+        elif wrapped_prog == "maverick":
+            params = mw.mav_params_parser(arg.params)
+            iterations = int(params["mainRepeats"]) * (
+                int(params["mainBurnin"]) + int(params["mainSamples"]))
+            if arg.notests is False and mw.mav_ti_in_use(params):
+                iterations += int(params["thermodynamicRungs"]) * (
+                    int(params["thermodynamicBurnin"]) +
+                    int(params["thermodynamicSamples"]))
+            return iterations
+
+    except (OSError, KeyError, ValueError):
+        pass
+
+    return None
+
+
+def pilot_arguments(wrapped_prog, arg):
+    """
+    Returns a copy of the run arguments pointing to the pilot directory and to
+    parameter files that were shortened for the pilot runs.
+    """
+    pilot_arg = copy.copy(arg)
+    pilot_arg.outpath = os.path.join(arg.outpath, "pilot")
+    os.makedirs(pilot_arg.outpath, exist_ok=True)
+
+    if wrapped_prog == "structure":
+        mainparams, extraparams = structure_params(arg)
+        pilot_main = os.path.join(pilot_arg.outpath, "mainparams")
+        write_mainparams(mainparams, pilot_main,
+                         {"BURNIN": PILOT_BURNIN, "NUMREPS": PILOT_SAMPLES})
+        if not os.path.isfile(extraparams):
+            extraparams = os.path.join(pilot_arg.outpath, "extraparams")
+            open(extraparams, "w").close()
+        pilot_arg.params = ["-m", pilot_main, "-e", extraparams]
+
+    elif wrapped_prog == "maverick":
+        pilot_arg.params = os.path.join(pilot_arg.outpath, "parameters.txt")
+        write_mav_params(arg.params, pilot_arg.params,
+                         {"mainRepeats": 1, "mainBurnin": PILOT_BURNIN,
+                          "mainSamples": PILOT_SAMPLES,
+                          "thermodynamic_on": "f"})
+        pilot_arg.notests = True
+
+    else:
+        pilot_arg.extra_options = " ".join([arg.extra_options,
+                                            PILOT_FS_TOL]).strip()
+
+    return pilot_arg
+
+
+def check_output(wrapped_prog, outpath, k_val):
+    """
+    Checks that the output of a pilot run can be parsed by the same code that
+    is used by the bestK tests and the plots. Returns an error message, or
+    None if everything is fine.
+    """
+    try:
+        if wrapped_prog == "structure":
+            filename = os.path.join(outpath,
+                                    "str_K{}_rep1_f".format(k_val))
+            run, error = hc.readFile(filename, hc.Data())
+            if run is None:
+                return error
+            if run.k != k_val:
+                return "{} has results for K={}".format(filename, run.k)
+            nind = run.indivs
+            fmt = "structure"
+
+        elif wrapped_prog == "maverick":
+            filename = os.path.join(outpath, "mav_K{}".format(k_val),
+                                    "outputQmatrix_ind_K{}.csv".format(k_val))
+            nind = None
+            fmt = "maverick"
+
+        else:
+            filename = os.path.join(outpath,
+                                    "fS_run_K.{}.meanQ".format(k_val))
+            if not fc.parse_logs([filename[:-6] + ".log"]):
+                return "No marginal likelihood found in {}".format(
+                    filename[:-6] + ".log")
+            nind = None
+            fmt = "faststructure"
+
+        kobj = PlotK(filename, fmt)
+
+    except (OSError, StopIteration, AttributeError, IndexError,
+            ValueError, hc.HarvesterError) as err:
+        return "Unable to parse the output of K={}: {}".format(k_val, err)
+
+    if nind is not None and kobj.qvals.shape[0] != nind:
+        return ("{} has a Q-matrix for {} individuals, but {} individuals "
+                "were expected.".format(filename, kobj.qvals.shape[0], nind))
+
+    return None
+
+
+def pilot_run(prog_args, worker, cost_model, threads):
+    """
+    Runs a short pilot job for every K value of every wrapped program, in
+    parallel on a single pool, to check that the whole setup works before
+    launching the full sweep. Exits if any of the pilot runs fails.
+    Otherwise, the pilot runtimes are scaled to the length of the full runs
+    and used to seed the cost model.
+    :param prog_args: (OrderedDict) Run arguments of each wrapped program
+    (see structure_threader.program_arguments()).
+    :param worker: (callable) The JobPool worker function.
+    :param cost_model: (CostModel) Cost model of the full sweep.
+    :param threads: (int) Number of pilot jobs that may run at the same time.
+    """
+    logging.info("Launching the pilot runs.")
+    pilot_args = [(wrapped_prog, arg, pilot_arguments(wrapped_prog, arg))
+                  for wrapped_prog, arg in prog_args.items()]
+    pilot_costs = cm.CostModel()
+
+    pool = jp.JobPool(worker, threads, cost_model=pilot_costs)
+    for wrapped_prog, arg, pilot_arg in pilot_args:
+        for k_val in arg.k_list:
+            pool.submit(jp.Job(wrapped_prog, k_val, 1, pilot_arg))
+    pool.run()
+
+    finished = [(x.prog, x.k) for x in pool.finished]
+    errors = []
+    for wrapped_prog, arg, pilot_arg in pilot_args:
+        for k_val in arg.k_list:
+            if (wrapped_prog, k_val) not in finished:
+                errors.append("The {} pilot run for K={} exited with errors. "
+                              "Check its log file in {}.".format(
+                                  wrapped_prog, k_val, pilot_arg.outpath))
+            else:
+                error = check_output(wrapped_prog, pilot_arg.outpath, k_val)
+                if error is not None:
+                    errors.append(error)
+
+    if errors:
+        logging.critical("The pilot runs failed. Please check your "
+                         "parameters:\n\n%s", "\n".join(errors))
+        raise SystemExit(1)
+
+    logging.info("All pilot runs finished successfully.")
+
+    for wrapped_prog, arg, _ in pilot_args:
+        iterations = run_iterations(wrapped_prog, arg)
+        for k_val in arg.k_list:
+            secs = pilot_costs.estimate(jp.Job(wrapped_prog, k_val, 1, None))
+            if iterations is None:
+                logging.info("%s pilot run for K=%s took %.1f seconds.",
+                             wrapped_prog, k_val, secs)
+                continue
+            per_iteration = secs / (PILOT_BURNIN + PILOT_SAMPLES)
+            cost_model.seed(wrapped_prog, k_val, per_iteration * iterations)
+            logging.info("%s pilot run for K=%s took %.4f seconds per "
+                         "iteration. Each full run is expected to take %.0f "
+                         "seconds.", wrapped_prog, k_val, per_iteration,
+                         per_iteration * iterations)
@@ -0,0 +1,211 @@
+#!/usr/bin/python3
+
+# Copyright 2017 Francisco Pina Martins <f.pinamartins@gmail.com>
+# This file is part of structure_threader.
+# structure_threader is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# structure_threader is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import os
+
+import numpy as np
+
+try:
+    import stats.modes as md
+except ImportError:
+    import structure_threader.stats.modes as md
+
+# The scipy solver is used when available, but is not required
+try:
+    from scipy.optimize import linear_sum_assignment as scipy_assignment
+except ImportError:
+    scipy_assignment = None
+
+# Maximum number of times the replicates are re-aligned to their mean
+MAX_ITERATIONS = 10
+
+
+def linear_sum_assignment(cost):
+    """
+    Solves the assignment problem for a square cost matrix with the
+    Hungarian algorithm, in O(n^3). Returns an array with the column assigned
+    to each row, so that cost[i, result[i]] has the smallest possible sum.
+    """
+    size = cost.shape[0]
+    if scipy_assignment is not None:
+        return scipy_assignment(cost)[1]
+
+    # Rows and columns are 1 based below, 0 being a dummy row/column
+    row_pot = np.zeros(size + 1)
+    col_pot = np.zeros(size + 1)
+    col_row = np.zeros(size + 1, dtype=int)
+    way = np.zeros(size + 1, dtype=int)
+
+    for row in range(1, size + 1):
+        col_row[0] = row
+        col = 0
+        min_slack = np.full(size + 1, np.inf)
+        used = np.zeros(size + 1, dtype=bool)
+        while True:
+            used[col] = True
+            free = np.nonzero(~used)[0]
+            slack = (cost[col_row[col] - 1, free - 1] - row_pot[col_row[col]] -
+                     col_pot[free])
+            better = slack < min_slack[free]
+            min_slack[free[better]] = slack[better]
+            way[free[better]] = col
+            new_col = free[np.argmin(min_slack[free])]
+            delta = min_slack[new_col]
+            row_pot[col_row[used]] += delta
+            col_pot[used] -= delta
+            min_slack[~used] -= delta
+            col = new_col
+            if col_row[col] == 0:
+                break
+        # Flip the augmenting path
+        while col != 0:
+            prev_col = way[col]
+            col_row[col] = col_row[prev_col]
+            col = prev_col
+
+    assignment = np.zeros(size, dtype=int)
+    assignment[col_row[1:] - 1] = np.arange(size)
+
+    return assignment
+
+
+def as_matrix(qvals):
+    """
+    Returns a Q matrix as an individuals x clusters array (PlotK objects
+    store K = 1 results as a 1D array).
+    """
+    qvals = np.asarray(qvals, dtype=float)
+    return qvals.reshape(qvals.shape[0], -1)
+
+
+def column_order(reference, qvals, similarity=None):
+    """
+    Returns the order of the columns of qvals that best matches the clusters
+    of reference, ie. that maximizes the sum of the products of matching
+    columns, which is the same as minimizing their squared differences (the
+    CLUMPP G statistic). When qvals has more clusters than reference, the
+    extra ones are put last, in their original order.
+    :param similarity: (numpy.ndarray) Optional reference.T @ qvals.
+    """
+    if similarity is None:
+        similarity = reference.T @ qvals
+    ref_k, k = similarity.shape
+    size = max(ref_k, k)
+    padded = np.zeros((size, size))
+    padded[:ref_k, :k] = similarity
+    assignment = linear_sum_assignment(-padded)
+
+    order = [x for x in assignment[:ref_k] if x < k]
+    return order + sorted(set(range(k)) - set(order))
+
+
+def align_replicates(qmatrices, max_iterations=MAX_ITERATIONS):
+    """
+    Aligns the cluster labels of the replicates of one K: every replicate is
+    permuted to match the mean of the (aligned) replicates, starting from the
+    first replicate, until the permutations no longer change. The similarity
+    matrices of all the replicates are computed in a single batch.
+    Returns the replicates x individuals x K array of the aligned Q
+    matrices, the replicates x K array of the permutations (aligned =
+    original[:, permutation]) and the mean aligned Q matrix.
+    """
+    stack = np.stack([as_matrix(x) for x in qmatrices])
+    permutations = np.tile(np.arange(stack.shape[2]), (stack.shape[0], 1))
+    reference = stack[0]
+
+    for _ in range(max_iterations):
+        similarity = np.matmul(reference.T, stack)
+        new = np.array([column_order(reference, x, s)
+                        for x, s in zip(stack, similarity)])
+        aligned = np.take_along_axis(stack, new[:, np.newaxis, :], axis=2)
+        reference = aligned.mean(axis=0)
+        if np.array_equal(new, permutations):
+            break
+        permutations = new
+
+    return aligned, permutations, reference
+
+
+def align_k(means):
+    """
+    Aligns the clusters of consecutive K values, so that each cluster keeps
+    its position (and so its color in the plots) from one K to the next.
+    :param means: (dict) {K: Q matrix}
+    Returns {K: column order}, the first K keeping its own order.
+    """
+    orders = {}
+    reference = None
+    for k in sorted(means):
+        qvals = as_matrix(means[k])
+        if reference is None:
+            orders[k] = list(range(qvals.shape[1]))
+        else:
+            orders[k] = column_order(reference, qvals)
+        reference = qvals[:, orders[k]]
+
+    return orders
+
+
+def align_runs(qmatrices, outdir, prefix, replicates=None,
+               threshold=md.MODE_THRESHOLD, threads=1):
+    """
+    Aligns the replicates of each K, clusters them into modes, and then
+    aligns the K values between them. Writes the results to outdir:
+    .: <prefix><K>.Q: The mean of the aligned replicates of the major (most
+    frequent) mode, in the .meanQ format of fastStructure.
+    .: <prefix><K>_aligned.npy: The replicates x individuals x K array of
+    the aligned Q matrices.
+    .: <prefix><K>_permutations.txt: The (1 based) permutation applied to
+    the clusters of each replicate, one replicate per line.
+    .: <prefix><K>_modes.txt: The modes of the replicates (see
+    modes.write_modes()).
+    :param qmatrices: (dict) {K: [Q matrix of each replicate]}
+    :param replicates: (list) Replicate numbers of the Q matrices, for the
+    modes files.
+    :param threshold: (float) Similarity threshold of the modes.
+    :param threads: (int) Number of threads used for the similarities.
+    Returns {K: path to the mean Q matrix file}.
+    """
+    os.makedirs(outdir, exist_ok=True)
+
+    results = {}
+    for k, qvals in qmatrices.items():
+        aligned, permutations, mean = align_replicates(qvals)
+        modes = md.find_modes(md.pairwise_similarity(aligned, threads),
+                              threshold)
+        if len(modes) > 1:
+            logging.info("The replicates of K=%s converged to %s different "
+                         "modes. Using the major mode (%s of %s replicates).",
+                         k, len(modes), len(modes[0].members), len(qvals))
+            mean = align_replicates(aligned[modes[0].members])[2]
+        results[k] = (aligned, permutations, mean, modes)
+
+    orders = align_k(dict((k, x[2]) for k, x in results.items()))
+
+    qfiles = {}
+    for k, (aligned, permutations, mean, modes) in results.items():
+        filename = os.path.join(outdir, "{}{}".format(prefix, k))
+        np.savetxt(filename + ".Q", mean[:, orders[k]], fmt="%.6f",
+                   delimiter="  ")
+        np.save(filename + "_aligned.npy", aligned[:, :, orders[k]])
+        np.savetxt(filename + "_permutations.txt",
+                   permutations[:, orders[k]] + 1, fmt="%d")
+        md.write_modes(filename + "_modes.txt", modes, replicates)
+        qfiles[k] = filename + ".Q"
+
+    return qfiles
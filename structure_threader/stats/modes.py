@@ -0,0 +1,133 @@
+#!/usr/bin/python3
+
+# Copyright 2017 Francisco Pina Martins <f.pinamartins@gmail.com>
+# This file is part of structure_threader.
+# structure_threader is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# structure_threader is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Replicates whose similarity is at least this high belong to the same mode
+MODE_THRESHOLD = 0.9
+
+# Number of replicates per block of the similarity matrix
+BLOCK_SIZE = 64
+
+# A group of replicates that converged to the same solution: the (0 based)
+# indices of its replicates, the index of its most representative replicate
+# and the mean similarity between its replicates.
+Mode = namedtuple("Mode", ["members", "representative", "similarity"])
+
+
+def pairwise_similarity(aligned, threads=1):
+    """
+    Returns the replicates x replicates matrix of the CLUMPP G' similarity
+    between aligned Q matrices:
+    G'(Q1, Q2) = 1 - ||Q1 - Q2|| / sqrt(||Q1 - W|| * ||Q2 - W||)
+    where ||.|| is the Frobenius norm and W is the matrix where every value is
+    1/K. The squared distances are taken from the Gram matrix of the
+    flattened Q matrices, computed in blocks of rows that are spread over a
+    pool of threads (the matrix products release the GIL).
+    Since the replicates were aligned to a common reference rather than to
+    each other, the similarity of replicates from different modes may be
+    slightly underestimated.
+    :param aligned: (numpy.ndarray) replicates x individuals x K array, as
+    returned by alignment.align_replicates().
+    """
+    flat = aligned.reshape(aligned.shape[0], -1)
+    norms = np.einsum("ij,ij->i", flat, flat)
+    spread = np.sqrt(np.sum((flat - 1 / aligned.shape[2]) ** 2, axis=1))
+
+    def _block(start):
+        return flat[start:start + BLOCK_SIZE] @ flat.T
+
+    with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+        gram = np.vstack(list(executor.map(
+            _block, range(0, flat.shape[0], BLOCK_SIZE))))
+
+    distance = np.sqrt(np.maximum(
+        norms[:, np.newaxis] + norms[np.newaxis, :] - 2 * gram, 0))
+    scale = np.sqrt(np.outer(spread, spread))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        similarity = 1 - distance / scale
+    # Q matrices that do not depart from W (eg. K = 1) are only similar to
+    # identical ones
+    similarity[scale == 0] = np.isclose(distance[scale == 0], 0)
+
+    return np.clip(similarity, 0, 1)
+
+
+def connected_components(adjacency):
+    """
+    Returns the connected component label (its smallest member) of each node
+    of a boolean adjacency matrix, by propagating the smallest label of the
+    neighbours of each node until nothing changes.
+    """
+    adjacency = adjacency | np.eye(adjacency.shape[0], dtype=bool)
+    labels = np.arange(adjacency.shape[0])
+    while True:
+        new = np.min(np.where(adjacency, labels[np.newaxis, :],
+                              adjacency.shape[0]), axis=1)
+        if np.array_equal(new, labels):
+            return labels
+        labels = new
+
+
+def find_modes(similarity, threshold=MODE_THRESHOLD):
+    """
+    Clusters the replicates into modes: the connected components of the
+    graph linking the replicates with a similarity of at least threshold.
+    Returns a list of Mode tuples, from the largest to the smallest. The
+    representative of each mode is the replicate with the highest mean
+    similarity to the other members.
+    """
+    labels = connected_components(similarity >= threshold)
+
+    modes = []
+    for label in np.unique(labels):
+        members = np.nonzero(labels == label)[0]
+        within = similarity[np.ix_(members, members)]
+        if len(members) > 1:
+            means = (within.sum(axis=1) - 1) / (len(members) - 1)
+            mean = (within.sum() - len(members)) / (len(members) ** 2 -
+                                                    len(members))
+        else:
+            means, mean = np.ones(1), 1.0
+        modes.append(Mode(members.tolist(),
+                          int(members[np.argmax(means)]), float(mean)))
+
+    return sorted(modes, key=lambda x: (-len(x.members), x.members[0]))
+
+
+def write_modes(filename, modes, replicates=None):
+    """
+    Writes the modes of one K to a tab separated file: one line per mode,
+    with its size, mean similarity, representative and members.
+    :param replicates: (list) Optional replicate numbers, in the order of the
+    Q matrices. Defaults to 1, 2, 3...
+    """
+    if replicates is None:
+        replicates = range(1, sum(len(x.members) for x in modes) + 1)
+    replicates = list(replicates)
+
+    with open(filename, "w") as fhandle:
+        fhandle.write("Mode\tReplicates\tMean similarity\tRepresentative\t"
+                      "Members\n")
+        for i, mode in enumerate(modes):
+            fhandle.write("{}\t{}\t{:.4f}\t{}\t{}\n".format(
+                i + 1, len(mode.members), mode.similarity,
+                replicates[mode.representative],
+                ",".join(str(replicates[x]) for x in mode.members)))
@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+
+# Copyright 2017 Francisco Pina Martins <f.pinamartins@gmail.com>
+# This file is part of structure_threader.
+# structure_threader is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# structure_threader is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+
+import numpy as np
+
+# Scrambled Sobol sequences are optional, and require scipy >= 1.7
+try:
+    from scipy.stats import qmc
+    from scipy.special import ndtri
+except ImportError:
+    qmc = None
+
+SAMPLERS = ("random", "sobol")
+
+
+def sobol_available():
+    """
+    Returns True if quasi-random (Sobol) sampling can be used.
+    """
+    return qmc is not None
+
+
+def normal_batch(mean, sd, size, sampler="random"):
+    """
+    Draws a batch of normal values: one row per mean/sd pair, and "size"
+    columns. With the "sobol" sampler, each batch is an independently
+    scrambled Sobol sequence (randomized quasi-Monte Carlo), so that batches
+    stay independent of each other, and "size" is rounded up to a power of 2.
+    Seeds are taken from numpy.random, so numpy.random.seed() still makes the
+    draws reproducible.
+    """
+    if sampler == "sobol" and sobol_available():
+        engine = qmc.Sobol(d=len(mean), scramble=True,
+                           seed=np.random.randint(2 ** 32))
+        points = engine.random_base2(int(np.ceil(np.log2(size))))
+        # Keep away from 0 and 1, which have infinite normal quantiles
+        points = np.clip(points, 1e-16, 1 - 1e-16)
+        return mean[:, np.newaxis] + sd[:, np.newaxis] * ndtri(points.T)
+
+    return np.random.normal(mean[:, np.newaxis], sd[:, np.newaxis],
+                            size=(len(mean), size))
+
+
+def check_sampler(sampler):
+    """
+    Returns the sampler that will actually be used, warning if Sobol
+    sampling was asked for but is not available.
+    """
+    if sampler not in SAMPLERS:
+        raise ValueError("Unknown sampler '{}'.".format(sampler))
+    if sampler == "sobol" and not sobol_available():
+        logging.warning("Sobol sampling requires scipy (>= 1.7). Using "
+                        "pseudo-random draws instead.")
+        return "random"
+
+    return sampler
+
+
+def batch_standard_error(batch_stats):
+    """
+    Batch means estimate of the Monte Carlo standard error of a statistic:
+    given the values of the statistic in n independent batches (one row per
+    batch), returns the standard error of their mean for each column, or
+    NaN if there are less than 2 batches.
+    """
+    batch_stats = np.asarray(batch_stats, dtype=np.float64)
+    if batch_stats.shape[0] < 2:
+        return np.full(batch_stats.shape[1:], np.nan)
+
+    return batch_stats.std(axis=0, ddof=1) / np.sqrt(batch_stats.shape[0])
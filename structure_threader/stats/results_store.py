@@ -0,0 +1,215 @@
+#!/usr/bin/python3
+
+# Copyright 2017 Francisco Pina Martins <f.pinamartins@gmail.com>
+# This file is part of structure_threader.
+# structure_threader is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# structure_threader is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import json
+import os
+from threading import Lock
+
+import numpy as np
+
+try:
+    from evanno.harvest_index import file_signature
+except ImportError:
+    from structure_threader.evanno.harvest_index import file_signature
+
+# Name of the store directory, written to the output directory of a run
+STORE_DIR = "results_store"
+
+# Name of the index file, inside the store directory
+INDEX_FILE = "index.json"
+
+# Shared stores, keyed by the real path of their directory
+_STORES = {}
+_STORES_LOCK = Lock()
+
+
+class ResultsStore(object):
+    """
+    Binary copy of the results of the runs of one output directory, so that
+    they are only parsed once. The Q matrix of every result file is kept in
+    its own .npy file, which is read back with a (zero-copy, read-only)
+    memory map. The individual labels are stored once per distinct set of
+    labels, and a small JSON index holds the signature of every result file
+    (see harvest_index.file_signature()), its run statistics and metadata.
+    Entries of result files that changed since they were stored are ignored.
+    """
+
+    def __init__(self, directory):
+        """
+        :param directory: (str) Path to the store directory. Its index is
+        loaded if it exists. The directory is only created when something is
+        added to the store.
+        """
+        self.directory = directory
+        """
+        Index entries, keyed by the path of the result file relative to the
+        parent of the store directory: {"size": int, "mtime": int, "hash":
+        str, "fmt": str, "qfile": str, "labels": str or None, "stats": dict
+        or None, "metadata": dict}.
+        """
+        self.entries = {}
+        self._lock = Lock()
+
+        try:
+            with open(os.path.join(directory, INDEX_FILE)) as fhandle:
+                self.entries = json.load(fhandle)
+        except (OSError, ValueError):
+            # A missing or corrupted index is just an empty store
+            self.entries = {}
+
+    def _key(self, path):
+        """
+        Returns the index key of a result file.
+        """
+        return os.path.relpath(os.path.abspath(path), os.path.dirname(
+            os.path.abspath(self.directory)))
+
+    def _write(self, name, array):
+        """
+        Writes an array to a .npy file of the store, atomically.
+        """
+        filename = os.path.join(self.directory, name)
+        with open(filename + ".tmp", "wb") as fhandle:
+            np.save(fhandle, array)
+        os.replace(filename + ".tmp", filename)
+
+    def add(self, path, fmt, qvals, indv=None, stats=None, **metadata):
+        """
+        Stores the results parsed from a result file.
+        :param path: (str) Path to the result file.
+        :param fmt: (str) Format of the result file, as in PlotK.
+        :param qvals: (numpy.ndarray) Q matrix of the result file.
+        :param indv: (list) Optional individual labels.
+        :param stats: (dict) Optional JSON serializable run statistics, eg.
+        the values of the harvester's RunRecord.
+        :param metadata: Other JSON serializable run metadata (K, replicate,
+        program...).
+        """
+        key = self._key(path)
+        size, mtime, digest = file_signature(path)
+
+        qfile = hashlib.sha1(key.encode()).hexdigest() + ".npy"
+        labels = None
+        if indv is not None and len(indv) > 0:
+            indv = np.array([str(x) for x in indv])
+            labels = "labels_" + hashlib.sha1(
+                "\n".join(indv).encode()).hexdigest() + ".npy"
+
+        # The files are written under the lock, so that save() never removes
+        # a file whose entry is not in the index yet
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            self._write(qfile, np.asarray(qvals, dtype=float))
+            if labels is not None and not os.path.isfile(
+                    os.path.join(self.directory, labels)):
+                self._write(labels, indv)
+            self.entries[key] = {"size": size, "mtime": mtime,
+                                 "hash": digest, "fmt": fmt, "qfile": qfile,
+                                 "labels": labels, "stats": stats,
+                                 "metadata": metadata}
+
+    def lookup(self, path, fmt=None):
+        """
+        Returns the index entry of a result file, or None if the file is not
+        in the store, changed since it was stored, or was stored with a
+        different format.
+        """
+        entry = self.entries.get(self._key(path))
+        if entry is None or (fmt is not None and entry["fmt"] != fmt):
+            return None
+
+        try:
+            signature = file_signature(path)
+        except OSError:
+            return None
+        if (entry["size"], entry["mtime"], entry["hash"]) != signature:
+            return None
+
+        return entry
+
+    def qvals(self, path, fmt=None):
+        """
+        Returns the Q matrix of a result file as a read-only memory mapped
+        array, or None if it is not in the store.
+        """
+        entry = self.lookup(path, fmt)
+        if entry is None:
+            return None
+        try:
+            return np.load(os.path.join(self.directory, entry["qfile"]),
+                           mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+    def labels(self, path, fmt=None):
+        """
+        Returns the list of individual labels of a result file, or None if
+        they are not in the store.
+        """
+        entry = self.lookup(path, fmt)
+        if entry is None or entry["labels"] is None:
+            return None
+        try:
+            return np.load(os.path.join(self.directory,
+                                        entry["labels"])).tolist()
+        except (OSError, ValueError):
+            return None
+
+    def stats(self, path, fmt=None):
+        """
+        Returns the run statistics of a result file, or None if they are not
+        in the store.
+        """
+        entry = self.lookup(path, fmt)
+        if entry is None:
+            return None
+        return entry["stats"]
+
+    def save(self):
+        """
+        Writes the index of the store, atomically. The .npy files that are no
+        longer referenced by the index are removed.
+        """
+        if not os.path.isdir(self.directory):
+            return
+
+        with self._lock:
+            filename = os.path.join(self.directory, INDEX_FILE)
+            with open(filename + ".tmp", "w") as fhandle:
+                json.dump(self.entries, fhandle, sort_keys=True)
+            os.replace(filename + ".tmp", filename)
+
+            used = set(x["qfile"] for x in self.entries.values()) | \
+                set(x["labels"] for x in self.entries.values())
+            for name in os.listdir(self.directory):
+                if name.endswith(".npy") and name not in used:
+                    os.remove(os.path.join(self.directory, name))
+
+
+def open_store(outdir):
+    """
+    Returns the ResultsStore of an output directory. The same object is
+    returned for the same directory, so that it can be shared by the threads
+    of a run.
+    """
+    directory = os.path.join(outdir, STORE_DIR)
+    key = os.path.realpath(directory)
+    with _STORES_LOCK:
+        if key not in _STORES:
+            _STORES[key] = ResultsStore(directory)
+        return _STORES[key]
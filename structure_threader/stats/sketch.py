@@ -0,0 +1,131 @@
+#!/usr/bin/python3
+
+# Copyright 2017 Francisco Pina Martins <f.pinamartins@gmail.com>
+# This file is part of structure_threader.
+# structure_threader is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# structure_threader is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+
+
+def logit(log_values):
+    """
+    Returns the logit of probabilities given in log space. This is accurate
+    both for tiny probabilities and for probabilities very close to 1.
+    """
+    with np.errstate(divide="ignore"):
+        return log_values - np.log(-np.expm1(log_values))
+
+
+def expit(values):
+    """
+    Inverse of logit(): returns the probabilities of logit values.
+    """
+    return np.exp(-np.logaddexp(0, -values))
+
+
+class QuantileSketch(object):
+    """
+    Mergeable streaming quantile sketch. It keeps one sketch per row of the
+    arrays it is fed (eg. one per K value).
+
+    Values are counted in buckets of a fixed width, which are only stored
+    when they are used. Since values are clipped to [low, high], memory is
+    bounded by (high - low) / width buckets per row, no matter how many
+    values are added. This is meant to be used on logit transformed
+    probabilities, where the buckets behave like the logarithmic buckets of
+    DDSketch (Masson et al. 2019) both near 0 and near 1.
+
+    Error bounds: the quantile q is estimated as the value of the order
+    statistic of rank floor(q * (n - 1)) (the lower point used by
+    numpy.percentile's interpolation) within an absolute error of width / 2.
+    On logit values, this means the estimated probability p and 1 - p are
+    both within a factor of exp(width / 2) of the real ones. Estimates are
+    also kept within the (exact) smallest and largest values seen.
+    """
+
+    def __init__(self, rows, width=2e-3, low=-800, high=800):
+        """
+        :param rows: (int) Number of independent sketches.
+        :param width: (float) Width of the buckets.
+        :param low: (float) Smaller values are counted as low.
+        :param high: (float) Larger values are counted as high.
+        """
+        self.rows = rows
+        self.width = width
+        self.low = low
+        self.high = high
+
+        """
+        Sorted indices of the used buckets of each row, and their counts
+        """
+        self.buckets = [np.array([], dtype=np.int64) for _ in range(rows)]
+        self.counts = [np.array([], dtype=np.int64) for _ in range(rows)]
+
+        """
+        Smallest and largest values of each row
+        """
+        self.minimum = np.full(rows, np.inf)
+        self.maximum = np.full(rows, -np.inf)
+
+    def _update(self, row, buckets, counts):
+        """
+        Adds the counts of some (unsorted, possibly repeated) buckets to a row.
+        """
+        buckets = np.concatenate((self.buckets[row], buckets))
+        counts = np.concatenate((self.counts[row], counts))
+        self.buckets[row], inverse = np.unique(buckets, return_inverse=True)
+        self.counts[row] = np.bincount(inverse.ravel(), weights=counts,
+                                       minlength=len(self.buckets[row])
+                                       ).astype(np.int64)
+
+    def add(self, values):
+        """
+        Adds a rows x n array of values to the sketches.
+        """
+        values = np.clip(np.asarray(values, dtype=np.float64), self.low,
+                         self.high)
+        self.minimum = np.minimum(self.minimum, values.min(axis=1))
+        self.maximum = np.maximum(self.maximum, values.max(axis=1))
+
+        index = np.floor((values - self.low) / self.width).astype(np.int64)
+        for row in range(self.rows):
+            buckets, counts = np.unique(index[row], return_counts=True)
+            self._update(row, buckets, counts)
+
+    def merge(self, other):
+        """
+        Adds the counts of another sketch with the same parameters.
+        """
+        if (other.rows, other.width, other.low) != \
+                (self.rows, self.width, self.low):
+            raise ValueError("Only sketches with the same parameters can be "
+                             "merged.")
+        for row in range(self.rows):
+            self._update(row, other.buckets[row], other.counts[row])
+        self.minimum = np.minimum(self.minimum, other.minimum)
+        self.maximum = np.maximum(self.maximum, other.maximum)
+
+    def quantile(self, q):
+        """
+        Returns the estimated q quantile (0 <= q <= 1) of each row.
+        """
+        estimates = np.zeros(self.rows)
+        for row in range(self.rows):
+            cumulative = np.cumsum(self.counts[row])
+            rank = np.floor(q * (cumulative[-1] - 1))
+            position = np.searchsorted(cumulative, rank, side="right")
+            estimates[row] = self.low + (self.buckets[row][position] + 0.5) \
+                * self.width
+
+        return np.clip(estimates, self.minimum, self.maximum)
@@ -22,9 +22,11 @@ import signal
 import subprocess
 import itertools
 import logging
+import threading
+import time
+import copy
 
-from multiprocessing import Pool
-from random import choice
+from collections import OrderedDict
 from functools import partial
 
 try:
@@ -34,6 +36,16 @@ try:
     import wrappers.maverick_wrapper as mw
     import wrappers.faststructure_wrapper as fsw
     import wrappers.structure_wrapper as sw
+    import scheduler.job_pool as jp
+    import scheduler.adaptive as adaptive
+    import scheduler.cost_model as cm
+    import scheduler.deadline as dl
+    import scheduler.pilot as pilot
+    import scheduler.hierarchy as hierarchy
+    import stats.alignment as al
+    import stats.results_store as rs
+    import evanno.harvesterCore as hc
+    import evanno.fastChooseK as fc
     import argparser
 
 except ImportError:
@@ -43,6 +55,16 @@ except ImportError:
     import structure_threader.wrappers.maverick_wrapper as mw
     import structure_threader.wrappers.faststructure_wrapper as fsw
     import structure_threader.wrappers.structure_wrapper as sw
+    import structure_threader.scheduler.job_pool as jp
+    import structure_threader.scheduler.adaptive as adaptive
+    import structure_threader.scheduler.cost_model as cm
+    import structure_threader.scheduler.deadline as dl
+    import structure_threader.scheduler.pilot as pilot
+    import structure_threader.scheduler.hierarchy as hierarchy
+    import structure_threader.stats.alignment as al
+    import structure_threader.stats.results_store as rs
+    import structure_threader.evanno.harvesterCore as hc
+    import structure_threader.evanno.fastChooseK as fc
     import structure_threader.argparser as argparser
 
 # Where are we?
@@ -62,7 +84,35 @@ def gracious_exit(*args):
     sys.exit(0)
 
 
-def runprogram(wrapped_prog, iterations, arg):
+def follow_program(program, tracker):
+    """
+    Waits for a running program while forwarding each line of its standard
+    output to the tracker (the JobPool running it), so that its progress can
+    be measured. Returns the program's stdout and stderr.
+    """
+    tracker.register(program)
+
+    # Drain stderr on the side, otherwise a chatty child could block on a
+    # full pipe while we are reading stdout.
+    err = []
+    err_reader = threading.Thread(
+        target=lambda: err.append(program.stderr.read()))
+    err_reader.start()
+
+    out = []
+    for line in program.stdout:
+        line = line.decode("utf-8")
+        out.append(line)
+        tracker.report(program, line)
+
+    err_reader.join()
+    program.wait()
+    tracker.unregister(program)
+
+    return "".join(out), err[0].decode("utf-8")
+
+
+def runprogram(wrapped_prog, iterations, arg, tracker=None):
     """
     Run each wrapped program job. Return the worker status.
     This attribute will be populated with the worker exit code and output file
@@ -89,11 +139,18 @@ def runprogram(wrapped_prog, iterations, arg):
                                stdout=subprocess.PIPE,
                                stderr=subprocess.PIPE)
 
-    out, err = map(lambda x: x.decode("utf-8"), program.communicate())
+    if tracker is None:
+        out, err = map(lambda x: x.decode("utf-8"), program.communicate())
+    else:
+        out, err = follow_program(program, tracker)
+
+    # Jobs share the "arg" namespace, so failed runs only turn logging on
+    # for themselves.
+    write_log = arg.log
 
     # Check for errors in the program's exit code
     if program.returncode != 0:
-        arg.log = True
+        write_log = True
         try:
             worker_status = (-1, output_file)
         except UnboundLocalError:
@@ -102,7 +159,7 @@ def runprogram(wrapped_prog, iterations, arg):
         worker_status = (0, None)
 
     # Handle logging for debugging purposes.
-    if arg.log is True:
+    if write_log is True:
 
         logfile = open(os.path.join(arg.outpath, "K" + str(k_val) + "_rep" +
                                     str(rep_num) + ".stlog"), "w")
@@ -115,50 +172,182 @@ def runprogram(wrapped_prog, iterations, arg):
     return worker_status
 
 
-def structure_threader(wrapped_prog, arg):
+def run_job(job, tracker=None):
     """
-    Do the threading book-keeping to spawn jobs at the asked rate.
+    Runs a single scheduler Job. Glues the JobPool to runprogram().
     """
+    return runprogram(job.prog, (job.k, job.rep), job.arg, tracker)
+
+
+def result_file(wrapped_prog, outpath, k_val, rep_num=1):
+    """
+    Returns the path to the file with the Q matrix of a run.
+    """
+    if wrapped_prog == "structure":
+        return os.path.join(outpath, "str_K") + str(k_val) + "_rep" + \
+            str(rep_num) + "_f"
+    elif wrapped_prog == "maverick":
+        return os.path.join(os.path.join(outpath, "mav_K" + str(k_val)),
+                            "outputQmatrix_ind_K" + str(k_val) + ".csv")
+    return os.path.join(outpath, "fS_run_K.") + str(k_val) + ".meanQ"
+
+
+def store_results(job, status):
+    """
+    JobPool callback that adds the results of each successful job to the
+    results store of its output directory: its Q matrix, individual labels
+    and run statistics (the harvested values of STRUCTURE runs, the marginal
+    likelihood of fastStructure runs). Failing to store the results only
+    means that they will be parsed again later, so it is not an error. The
+    index of the store is only written at the end of the sweep.
+    """
+    if status[0] != 0:
+        return
+
+    filename = result_file(job.prog, job.arg.outpath, job.k, job.rep)
+    try:
+        stats = None
+        if job.prog == "structure":
+            run = hc.readFile(filename, hc.Data())[0]
+            if run is not None:
+                stats = vars(run)
+        elif job.prog == "faststructure":
+            stats = {"marginal_likelihood": fc.parse_logs(
+                [filename[:-len(".meanQ")] + ".log"])}
+
+        kobj = sp.PlotK(filename, job.prog, get_indv=True)
+        store = rs.open_store(job.arg.outpath)
+        store.add(filename, job.prog, kobj.qvals, kobj.indv, stats,
+                  program=job.prog, k=job.k, replicate=job.rep)
+    except Exception as err:
+        logging.warning("Unable to store the results of %s: %s", filename,
+                        err)
+
+
+def program_arguments(arg):
+    """
+    Returns the run arguments of each wrapped program as an OrderedDict
+    {wrapped_prog: arguments}. In an ensemble run every program gets its own
+    copy of the arguments, with its parameter file and an output
+    subdirectory named after the program.
+    """
+    if len(arg.programs) == 1:
+        return OrderedDict([(arg.wrapped_prog, arg)])
+
+    prog_args = OrderedDict()
+    for wrapped_prog, external_prog in arg.programs.items():
+        prog_arg = copy.copy(arg)
+        prog_arg.wrapped_prog = wrapped_prog
+        prog_arg.external_prog = external_prog
+        prog_arg.params = arg.program_params[wrapped_prog]
+        prog_arg.outpath = os.path.join(arg.outpath, wrapped_prog)
+        os.makedirs(prog_arg.outpath, exist_ok=True)
+        prog_args[wrapped_prog] = prog_arg
+
+    return prog_args
 
-    if wrapped_prog != "structure":
-        arg.replicates = [1]
-    else:
-        sw.str_param_checker(arg)
 
-    jobs = list(itertools.product(arg.k_list, arg.replicates))[::-1]
+def structure_threader(arg, prog_args, cost_model=None, tree=None):
+    """
+    Do the threading book-keeping to spawn jobs at the asked rate.
+    The jobs of every wrapped program share the same pool.
+    Returns the list of jobs that finished successfully.
+    :param prog_args: (OrderedDict) Run arguments of each wrapped program, as
+    returned by program_arguments().
+    :param cost_model: (CostModel) Optional job runtime estimator, eg. seeded
+    by the pilot runs.
+    :param tree: (HierarchicalRun) Optional hierarchical analysis. Its root
+    analysis is made of the jobs of the (single) wrapped program, and the
+    analyses of the clusters are submitted to the same pool.
+    """
 
-    # This allows us to pass partial arguments to a function so we can later
-    # use it with multiprocessing map().
-    temp = partial(runprogram, wrapped_prog, arg=arg)
+    jobs = []
+    for wrapped_prog, prog_arg in prog_args.items():
+        if wrapped_prog != "structure":
+            prog_arg.replicates = [1]
+        else:
+            sw.str_param_checker(prog_arg)
 
-    # This will automatically create the Pool object, run the jobs and deadlock
-    # the function while the children processed are being executed. This will
-    # also allow to iterate over the values returned by all workers and to sort
-    # them out to see if there were any errors
-    pool = Pool(arg.threads).map(temp, jobs)
+        jobs += [jp.Job(wrapped_prog, k, rep, prog_arg) for k, rep in
+                 itertools.product(prog_arg.k_list, prog_arg.replicates)][::-1]
+
+    # In adaptive mode the number of concurrent jobs is tuned at runtime
+    # between --min_threads and -t, starting half way.
+    if arg.adaptive is True:
+        controller = adaptive.ConcurrencyController(arg.min_threads,
+                                                    arg.threads)
+        slots = (controller.min_slots + controller.max_slots) // 2
+    else:
+        controller = None
+        slots = arg.threads
+
+    # With a deadline, jobs are ordered so that useful partial results come
+    # first, and the cost model decides which ones still fit.
+    if arg.deadline is not None:
+        if cost_model is None:
+            cost_model = cm.CostModel()
+        jobs = dl.anytime_order(jobs, cm.cost_function(jobs, cost_model))
+    elif len(prog_args) > 1:
+        # Run the long jobs first, and leave the short ones (eg.
+        # fastStructure) to fill the slots that are freed at the end.
+        jobs = cm.longest_first(jobs, cost_model)
+
+    pool = jp.JobPool(run_job, slots, controller=controller,
+                      cost_model=cost_model, deadline=arg.deadline_end,
+                      policy=arg.deadline_policy, callback=store_results)
+    if tree is not None:
+        wrapped_prog, prog_arg = list(prog_args.items())[0]
+        tree.pool = pool
+
+        def job_done(job, status):
+            store_results(job, status)
+            tree.job_done(job, status)
+
+        pool.callback = job_done
+        tree.add(hierarchy.Analysis(wrapped_prog, prog_arg, 0), jobs)
+    for job in jobs:
+        pool.submit(job)
+
+    # This will run the jobs and block until all of them are finished. The
+    # returned worker statuses are then sorted out to see if there were any
+    # errors
+    try:
+        results = pool.run()
+    finally:
+        # Rewriting the index of a results store after every job would be
+        # quadratic in the number of jobs, so each one is written once
+        for outpath in set(x.arg.outpath for x in list(pool.finished)):
+            rs.open_store(outpath).save()
 
     # Check for worker status. This will search the worker outputs and if
     # one or more workers had an error exit status, the error_list will be
     # populated with the cli commands that generated the errors
-    error_list = [x[1] for x in pool if x[0] == -1]
+    error_list = [x[1] for x in results if x[0] == -1]
 
     logging.info("\n==============================\n")
     if error_list:
-        logging.critical("%s %s runs exited with errors. Check the log files of"
-                         " the following output files:",
-                         len(error_list), wrapped_prog)
+        logging.critical("%s runs exited with errors. Check the log files of"
+                         " the following output files:", len(error_list))
         for out in error_list:
             logging.error(out)
     else:
-        logging.info("All %s jobs finished successfully.", len(pool))
+        logging.info("All %s jobs finished successfully.", len(results))
+
+    if pool.skipped or pool.interrupted:
+        logging.warning("Due to the deadline, %s jobs were not launched "
+                        "and %s were killed.", len(pool.skipped),
+                        len(pool.interrupted))
 
     os.chdir(CWD)
 
+    return pool.finished
+
 
-def structure_harvester(resultsdir, wrapped_prog):
+def structure_harvester(resultsdir, wrapped_prog, threads=1):
     """
     Run structureHarvester or fastChooseK to perform the Evanno test or the
     likelihood testing on the results.
+    :param threads: (int) Number of threads used to read the result files.
     """
     outdir = os.path.join(resultsdir, "bestK")
     if not os.path.exists(outdir):
@@ -176,7 +365,7 @@ def structure_harvester(resultsdir, wrapped_prog):
             import structure_threader.evanno.structureHarvester as sh
 
     # Retrieve list of best K values
-    bestk = sh.main(resultsdir, outdir)
+    bestk = sh.main(resultsdir, outdir, threads)
 
     return bestk
 
@@ -191,27 +380,35 @@ def create_plts(wrapped_prog, bestk, arg):
     if not os.path.exists(outdir):
         os.mkdir(outdir)
 
-    if wrapped_prog == "structure":
-        # Get only relevant output files, choosen randomly from the replictes.
-        # Failsafe in case we only have 1 replicate:
-        if arg.replicates == 1:
-            file_to_plot = "1"
-        else:
-            file_to_plot = str(choice(arg.replicates))
-        plt_files = [os.path.join(arg.outpath, "str_K") + str(i) + "_rep" +
-                     file_to_plot + "_f"
-                     for i in arg.k_list]
-    elif wrapped_prog == "maverick":
-        plt_files = [os.path.join(os.path.join(arg.outpath, "mav_K" + str(i)),
-                                  "outputQmatrix_ind_K" + str(i) + ".csv")
-                     for i in arg.k_list]
-
-    else:
-        plt_files = [os.path.join(arg.outpath, "fS_run_K.") + str(i) + ".meanQ"
-                     for i in arg.k_list]
+    # All the replicates of each K are aligned and averaged below
+    rep_files = [[result_file(wrapped_prog, arg.outpath, i, j)
+                  for j in arg.replicates] for i in arg.k_list]
+    prefix = {"structure": "str_K", "maverick": "mav_K"}.get(wrapped_prog,
+                                                           "fS_run_K.")
+
+    plt_files = [x[0] for x in rep_files]
+
+    # The results stored when the jobs finished are not parsed again
+    store = rs.open_store(arg.outpath)
+
+    # Align the cluster labels of the replicates, and of consecutive K values,
+    # so that the same cluster gets the same color in every plot. The major
+    # mode of the replicates is plotted.
+    kobjs = iter(sp.parse_files([x for files in rep_files for x in files],
+                                wrapped_prog, store=store,
+                                threads=arg.threads))
+    qmatrices = dict((k, [next(kobjs).qvals for _ in files])
+                     for k, files in zip(arg.k_list, rep_files))
+    qfiles = al.align_runs(qmatrices, os.path.join(arg.outpath, "aligned"),
+                           prefix, replicates=[x for x in arg.replicates],
+                           threshold=arg.mode_threshold, threads=arg.threads)
 
     sp.main(plt_files, wrapped_prog, outdir, bestk=bestk, popfile=arg.popfile,
-            indfile=arg.indfile, bw=arg.blacknwhite, use_ind=arg.use_ind)
+            indfile=arg.indfile, bw=arg.blacknwhite, use_ind=arg.use_ind,
+            qfiles=qfiles, store=store, threads=arg.threads,
+            raster=arg.raster, dpi=arg.dpi, report=arg.report,
+            pop_summary=arg.pop_summary)
+    store.save()
 
 
 def plots_only(arg):
@@ -256,40 +453,113 @@ def plots_only(arg):
 
     bestk = [int(x) for x in arg.bestk]
 
+    # Use the results store of a previous run, if there is one, so that
+    # replotting does not parse the result files again. Otherwise the store
+    # is created in the plots directory, for the next time.
+    if os.path.isdir(os.path.join(prefix_dir, rs.STORE_DIR)):
+        store = rs.open_store(prefix_dir)
+    else:
+        store = rs.open_store(arg.outpath)
+
     sp.main(infiles, arg.program, arg.outpath, bestk, popfile=arg.popfile,
             indfile=arg.indfile, filter_k=bestk, bw=arg.blacknwhite,
-            use_ind=arg.use_ind)
+            use_ind=arg.use_ind, store=store, threads=arg.threads,
+            raster=arg.raster, dpi=arg.dpi, report=arg.report,
+            pop_summary=arg.pop_summary)
+    store.save()
 
 
-def full_run(arg):
+def process_results(wrapped_prog, arg, finished):
     """
-    Make a full Structure_threader run, including program wrapping, and
-    eventually bestK tests and plotting.
+    Runs the bestK tests and draws the plots for the results of one wrapped
+    program. Returns the list of best K values, or None if there was nothing
+    to process.
+    :param finished: (list) Jobs of this program that finished successfully.
     """
-    # Figure out which program we are wrapping
-    if "-fs" in sys.argv:
-        wrapped_prog = "faststructure"
-    elif "-mv" in sys.argv:
-        wrapped_prog = "maverick"
-    elif "-st" in sys.argv:
-        wrapped_prog = "structure"
-
-    structure_threader(wrapped_prog, arg)
+    # Only harvest and plot the runs that completed in time
+    if arg.deadline is not None:
+        arg.k_list, arg.replicates = dl.completed_runs(finished, arg.k_list,
+                                                       arg.replicates)
+        if not arg.k_list:
+            logging.error("No %s run finished before the deadline.",
+                          wrapped_prog)
+            return None
 
     if wrapped_prog == "maverick":
         mav_params = mw.mav_params_parser(arg.params)
         bestk = mw.maverick_merger(arg.outpath, arg.k_list, mav_params,
-                                   arg.notests)
+                                   arg.notests, arg.mc_tolerance,
+                                   "sobol" if arg.sobol else "random")
         arg.notests = True
 
     if arg.notests is False:
-        bestk = structure_harvester(arg.outpath, wrapped_prog)
+        try:
+            bestk = structure_harvester(arg.outpath, wrapped_prog,
+                                        arg.threads)
+        except Exception as err:
+            # A partial grid may not be enough for the Evanno test. Plot
+            # what we have instead of failing.
+            if arg.deadline is None:
+                raise
+            logging.error("Unable to run the bestK tests on the runs that "
+                          "completed before the deadline:\n%s", err)
+            bestk = arg.k_list
     else:
         bestk = arg.k_list
 
     if arg.noplot is False:
         create_plts(wrapped_prog, bestk, arg)
 
+    return bestk
+
+
+def full_run(arg):
+    """
+    Make a full Structure_threader run, including program wrapping, and
+    eventually bestK tests and plotting. When more than one program is
+    wrapped (an ensemble run), the jobs of all programs share the same pool
+    and the results of each program are processed in its own subdirectory.
+    """
+    # The time budget starts counting now
+    if arg.deadline is not None:
+        arg.deadline_end = time.monotonic() + arg.deadline
+
+    prog_args = program_arguments(arg)
+
+    # Short pilot runs make sure the setup works before the full sweep, and
+    # give us runtime estimates for the real jobs.
+    cost_model = cm.CostModel()
+    if arg.pilot is True:
+        pilot.pilot_run(prog_args, run_job, cost_model, arg.threads)
+
+    # In hierarchical mode the results are processed (and the clusters
+    # re-analysed) as soon as each analysis finishes.
+    if arg.hierarchical is True:
+        tree = hierarchy.HierarchicalRun(process_results, arg.max_depth,
+                                         arg.min_cluster_size,
+                                         arg.assign_threshold)
+        structure_threader(arg, prog_args, cost_model, tree)
+        tree.finish()
+        tree.write_summary(os.path.join(arg.outpath, "hierarchy.txt"))
+        if tree.analyses[0].bestk is None:
+            logging.critical("No run finished before the deadline.")
+            raise SystemExit(1)
+        return
+
+    finished = structure_threader(arg, prog_args, cost_model)
+
+    processed = []
+    for wrapped_prog, prog_arg in prog_args.items():
+        if len(prog_args) > 1:
+            logging.info("Processing the %s results.", wrapped_prog)
+        processed.append(process_results(
+            wrapped_prog, prog_arg,
+            [x for x in finished if x.prog == wrapped_prog]) is not None)
+
+    if not any(processed):
+        logging.critical("No run finished before the deadline.")
+        raise SystemExit(1)
+
 
 def spooky_scary_skeletons(arg):
     """
@@ -39,8 +39,9 @@ def fs_cli_generator(k_val, arg):
             infile = arg.infile[:-4]
 
     cli = ["python2", arg.external_prog, "-K", str(k_val), "--input",
-           infile, "--output", output_file, "--format", file_format,
-           arg.extra_options]
+           infile, "--output", output_file, "--format", file_format]
+    # Each extra option must be a separate argument
+    cli += arg.extra_options.split()
 
     # Are we using the python script or a binary?
     if arg.external_prog.endswith(".py") is False:
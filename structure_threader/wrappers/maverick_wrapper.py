@@ -22,14 +22,16 @@ import os
 from itertools import chain
 import numpy as np
 
-from numpy.random import normal as rnorm
-
 try:
     import colorer.colorer as colorer
     from plotter.structplot import plot_normalization
+    from stats.sketch import QuantileSketch, logit, expit
+    import stats.montecarlo as mc
 except ImportError:
     import structure_threader.colorer.colorer as colorer
     from structure_threader.plotter.structplot import plot_normalization
+    from structure_threader.stats.sketch import QuantileSketch, logit, expit
+    import structure_threader.stats.montecarlo as mc
 
 def mav_cli_generator(arg, k_val, mav_params):
     """
@@ -155,11 +157,15 @@ def ti_test(outdir, norm_evidence, ti_in_use):
     return [int(bestk)]
 
 
-def maverick_merger(outdir, k_list, mav_params, no_tests):
+def maverick_merger(outdir, k_list, mav_params, no_tests, tolerance=None,
+                    sampler="random"):
     """
     Grabs the split outputs from MavericK and merges them in a single directory.
     Also uses the data from these files to generate an
     "outputEvidenceNormalized.csv" file.
+    :param tolerance: (float) Monte Carlo standard error at which the
+    normalization stops drawing. None means a fixed number of draws.
+    :param sampler: (str) ["random", "sobol"] Normalization sampler.
     """
 
     def _mav_output_parser(filename):
@@ -235,9 +241,14 @@ def maverick_merger(outdir, k_list, mav_params, no_tests):
 
         p_format = "posterior_{}{}"
 
+        # The precision columns come after the original ones, so that readers
+        # of the original layout keep working
         posterior = [[[p_format.format(x.replace("_grand", ""), i)]
                       for i in ["_mean", "_LL", "_UL"]]
                      for x in categories]
+        posterior += [[[p_format.format(x.replace("_grand", ""), i)]
+                       for i in ["_draws", "_MCSE"]]
+                      for x in categories]
         flat_posterior = list(chain(*list(chain(*posterior))))
 
         normalized = []
@@ -253,11 +264,12 @@ def maverick_merger(outdir, k_list, mav_params, no_tests):
                                   "'MainRepeats' parameter?).")
                     normalization = False
             if normalization:
-                normalized.append(maverick_normalization(evidence[cat[0]],
-                                                         evidence[cat[1]],
-                                                         k_list))
+                normalized.append(maverick_normalization(
+                    evidence[cat[0]], evidence[cat[1]], k_list,
+                    tolerance=tolerance, sampler=sampler))
 
-        dtypes = ("norm_mean", "lower_limit", "upper_limit")
+        dtypes = [("norm_mean", "lower_limit", "upper_limit"),
+                  ("draws", "mc_se")]
 
         outfile = open(filepath, 'w')
 
@@ -265,8 +277,10 @@ def maverick_merger(outdir, k_list, mav_params, no_tests):
         outfile.write("\n")
         for k in k_list:
             line = str(k) + ",N/A"
-            for i in normalized:
-                line += "," + ",".join([str(i[k][x]) for x in dtypes])
+            for cols in dtypes:
+                for i in normalized:
+                    line += "," + ",".join(["NA" if np.isnan(i[k][x])
+                                            else str(i[k][x]) for x in cols])
 
             outfile.write(line)
             outfile.write("\n")
@@ -315,42 +329,119 @@ def maverick_merger(outdir, k_list, mav_params, no_tests):
     return bestk
 
 
-def maverick_normalization(x_mean, x_sd, klist, draws=int(1e6), limit=95):
+def log_sum_exp(log_values, axis=0):
+    """
+    Returns log(sum(exp(log_values))) along an axis, without overflowing or
+    underflowing when the values are very large or very small.
+    """
+    max_values = np.max(log_values, axis=axis, keepdims=True)
+    sums = np.sum(np.exp(log_values - max_values), axis=axis, keepdims=True)
+
+    return np.squeeze(np.log(sums) + max_values, axis=axis)
+
+
+def maverick_normalization(x_mean, x_sd, klist, draws=int(1e6), limit=95,
+                           chunk_size=int(1e5), accuracy=1e-3, tolerance=None,
+                           max_draws=int(1e7), batch_size=int(1e4),
+                           min_batches=10, sampler="random"):
     """
     Performs TI normalization as in the original implementation from MavericK.
     This is essentially a port from the C++ code written by Bob Verity.
+    For each draw, a log evidence is drawn for every K from a normal
+    distribution with the estimated mean and SE, and the evidences are
+    normalized so that they sum to 1 over all K values. The posterior mean
+    and the limits of the "limit"% interval are then calculated for each K.
+    Draws are made in chunks of chunk_size and normalized in log space, which
+    is stable in float64 without the need for longdouble. Memory use does not
+    depend on the number of draws: means are accumulated exactly, and when
+    there is more than one chunk the interval limits are estimated with a
+    QuantileSketch of the logit of the normalized values. Both the estimated
+    limits and their complements (1 - limit) are then within a relative
+    error of about "accuracy".
+    The Monte Carlo standard error of the mean and limits of each K is
+    estimated with the batch means method, using each chunk as a batch.
+    When a tolerance is given, the number of draws is adaptive instead:
+    batches of batch_size draws are made until the standard errors of every K
+    are below the tolerance (after at least min_batches batches), or until
+    max_draws is reached.
+    :param sampler: (str) ["random", "sobol"] Use pseudo-random or scrambled
+    Sobol (quasi-random) normal draws. See stats.montecarlo.normal_batch().
+    Besides the mean and limits, the result of each K includes the number of
+    draws used ("draws") and the largest standard error of the three
+    ("mc_se", NaN with a single batch).
     """
     # subtract maximum value from x_mean (this has no effect on final outcome
     # but prevents under/overflow)
     # Just like in the original implementation
-    x_mean = [x - max(x_mean) for x in x_mean]
+    x_mean = np.asarray(x_mean, dtype=np.float64)
+    x_mean = x_mean - x_mean.max()
+    x_sd = np.asarray(x_sd, dtype=np.float64)
+    sampler = mc.check_sampler(sampler)
 
-    z_array = np.zeros([len(x_mean), draws], dtype=np.longdouble)
-
-    # draw random values of Z, exponentiate, and sort them in a bidimensional
-    # array
-    for i in range(z_array.shape[0]):
-        y_array = np.array([np.exp(rnorm(x_mean[i], x_sd[i]),
-                                   dtype=np.longdouble)
-                            for _ in range(draws)])
-
-        z_array[i] = y_array
-
-    sum_ar = sum(z_array)
-
-    for i in range(draws):
-
-        z_array[:, i] = z_array[:, i] / sum_ar[i]
+    if tolerance is not None:
+        chunk_size = batch_size
+        draws = max_draws
 
     # Define limit tails
     l_limit = (100 - limit) / 2
     u_limit = 100 - l_limit
 
+    sketch = QuantileSketch(len(x_mean), width=2 * accuracy)
+    # Compensated (Kahan-Babuska) sums of each K, so that the means do not
+    # lose precision over many chunks
+    sums = np.zeros(len(x_mean))
+    compensation = np.zeros(len(x_mean))
+    # Mean and limits of each batch, for the standard errors
+    batch_stats = []
+    done = 0
+
+    while done < draws:
+        # Draw the log evidences of the chunk at once (one row per K)
+        log_z = mc.normal_batch(x_mean, x_sd, min(chunk_size, draws - done),
+                                sampler)
+        size = log_z.shape[1]
+        done += size
+
+        # z / sum(z) == exp(log(z) - log(sum(z)))
+        log_z -= log_sum_exp(log_z, axis=0)
+        # The sketch is only needed when there is more than one batch
+        if batch_stats or done < draws:
+            sketch.add(logit(log_z))
+        z_array = np.exp(log_z, out=log_z)
+
+        chunk_sums = z_array.sum(axis=1)
+        total = sums + chunk_sums
+        compensation += np.where(np.abs(sums) >= np.abs(chunk_sums),
+                                 (sums - total) + chunk_sums,
+                                 (chunk_sums - total) + sums)
+        sums = total
+
+        lower, upper = np.percentile(z_array, [l_limit, u_limit], axis=1)
+        batch_stats.append((chunk_sums / size, lower, upper))
+
+        mc_se = np.max(mc.batch_standard_error(batch_stats), axis=0)
+        if tolerance is not None and len(batch_stats) >= min_batches and \
+                np.all(mc_se < tolerance):
+            break
+
+    if tolerance is not None and not np.all(mc_se < tolerance):
+        logging.warning("The Monte Carlo standard error of the evidence "
+                        "normalization is still %s after %s draws, above the "
+                        "tolerance of %s.", np.nanmax(mc_se), done, tolerance)
+
+    means = (sums + compensation) / done
+    # With a single batch the limits are exact
+    if len(batch_stats) > 1:
+        lower = expit(sketch.quantile(l_limit / 100))
+        upper = expit(sketch.quantile(u_limit / 100))
+
     # Gather mean and CI values and return them as a single dict.
     norm_res = dict(
-        (k, {"norm_mean": np.mean(z_array[i]),
-             "lower_limit": np.percentile(z_array[i], l_limit),
-             "upper_limit": np.percentile(z_array[i], u_limit)})
+        (k, {"norm_mean": means[i],
+             "lower_limit": lower[i],
+             "upper_limit": upper[i],
+             "draws": done,
+             "mc_se": mc_se[i]})
         for i, k in enumerate(klist))
 
     return norm_res
@@ -17,8 +17,16 @@
 
 
 import glob
+import os
+
+import numpy as np
+import py
 
 import structure_threader.evanno.fastChooseK as fc
+import structure_threader.evanno.harvesterCore as hc
+import structure_threader.evanno.structureHarvester as sh
+from structure_threader.evanno.harvest_index import HarvestIndex, \
+    INDEX_FILE
 
 def test_parse_logs():
     """
@@ -49,3 +57,238 @@ def test_main():
     outfile = open(outdir + "chooseK.txt", "r")
     test_text = str(outfile.readlines())
     assert test_text == text
+    # A second run takes every value from the harvest index
+    assert fc.main(indir, outdir) == [x for x in range(2, 4)]
+    assert len(HarvestIndex(outdir + INDEX_FILE).entries) == 12
+    os.remove(outdir + INDEX_FILE)
+
+
+STRUCTURE_F = """
+
+----------------------------------------------------
+STRUCTURE by Pritchard, Stephens and Donnelly (2000)
+----------------------------------------------------
+
+Run parameters:
+   34 individuals
+   1000 loci
+   {k} populations assumed
+   50000 Burn-in period
+   100000 Reps
+
+--------------------------------------------
+Overall proportion of membership of the
+sample in each of the {k} clusters
+
+Estimated Ln Prob of Data   = {lnprob}
+Mean value of ln likelihood = -4210.3
+Variance of ln likelihood   = 36.2
+Mean value of alpha         = 0.0523
+
+Inferred ancestry of individuals:
+        Label (%Miss) :  Inferred clusters
+{qmatrix}
+Estimated Allele Frequencies in each cluster
+"""
+
+
+def write_f_files(outdir):
+    """
+    Writes a small grid of made up STRUCTURE output files to outdir.
+    """
+    for k in range(1, 5):
+        for rep in range(1, 4):
+            text = STRUCTURE_F.format(
+                k=k, lnprob=-4300 + 100 * k - 10 * k * k - rep,
+                qmatrix="  1        1   (0)   :  1.000\n" * 34)
+            with open(str(outdir.join("str_K%d_rep%d_f" % (k, rep))),
+                      "w") as fhandle:
+                fhandle.write(text)
+
+
+def test_read_file(tmpdir):
+    """
+    Tests that readFile() parses the header of STRUCTURE output files, and
+    that the result does not depend on the size of the chunks that are read.
+    """
+    write_f_files(tmpdir)
+    filename = str(tmpdir.join("str_K3_rep2_f"))
+    run, error = hc.readFile(filename, hc.Data())
+    assert error == ""
+    assert (run.name, run.runNumber, run.k, run.indivs, run.loci, run.burnin,
+            run.reps) == ("str_K3_rep2_f", -1, 3, 34, 1000, 50000, 100000)
+    assert (run.estLnProb, run.meanLlh, run.varLlh) == (-4092, -4210.3, 36.2)
+
+    header = hc.readHeader(filename)
+    assert header.endswith("Variance of ln likelihood   = 36.2\n")
+    assert "Inferred ancestry" not in header
+    for chunk_size in (1, 7, 64):
+        assert hc.readHeader(filename, chunk_size) == header
+
+
+def test_harvest_files(tmpdir):
+    """
+    Tests that harvesting the files in parallel gives the same records as
+    doing it serially.
+    """
+    write_f_files(tmpdir)
+    serial, parallel = hc.Data(), hc.Data()
+    sh.harvestFiles(serial, str(tmpdir))
+    sh.harvestFiles(parallel, str(tmpdir), threads=4)
+    assert serial.sortedKs == parallel.sortedKs == [1, 2, 3, 4]
+    for k in serial.sortedKs:
+        assert ([vars(x) for x in serial.records[k]] ==
+                [vars(x) for x in parallel.records[k]])
+        assert len(serial.records[k]) == 3
+
+
+def test_harvest_index(tmpdir):
+    """
+    Tests that a re-harvest only parses the files that were added or changed
+    since the previous one, and gives the same results as a full harvest.
+    """
+    write_f_files(tmpdir)
+    outdir = tmpdir.mkdir("bestK")
+    index_file = str(outdir.join(INDEX_FILE))
+
+    index = HarvestIndex(index_file)
+    sh.harvestFiles(hc.Data(), str(tmpdir), index=index)
+    index.save()
+    assert index.parsed == 12
+
+    # Change one file, remove another and add a new one
+    changed = tmpdir.join("str_K2_rep1_f")
+    changed.write(changed.read().replace("= 36.2", "= 40.5"))
+    tmpdir.join("str_K4_rep3_f").remove()
+    tmpdir.join("str_K4_rep2_f").copy(tmpdir.join("str_K4_rep4_f"))
+
+    index = HarvestIndex(index_file)
+    assert len(index.entries) == 12
+    cached = hc.Data()
+    sh.harvestFiles(cached, str(tmpdir), index=index)
+    index.save()
+    assert index.parsed == 2
+    assert len(HarvestIndex(index_file).entries) == 12
+
+    full = hc.Data()
+    sh.harvestFiles(full, str(tmpdir))
+    assert cached.sortedKs == full.sortedKs
+    for k in full.sortedKs:
+        assert ([vars(x) for x in cached.records[k]] ==
+                [vars(x) for x in full.records[k]])
+    assert [x.varLlh for x in cached.records[2] if
+            x.name == "str_K2_rep1_f"] == [40.5]
+
+
+def test_evanno_statistics(tmpdir):
+    """
+    Tests the vectorized Evanno statistics against a direct computation, and
+    the bootstrap of delta K.
+    """
+    write_f_files(tmpdir)
+    data = hc.Data()
+    sh.harvestFiles(data, str(tmpdir))
+    # Make the replicates differ in more than a constant
+    data.records[3][0].estLnProb -= 5
+    hc.calculateMeansAndSds(data)
+    hc.calculatePrimesDoublePrimesDeltaK(data)
+
+    lnprobs = np.array([[r.estLnProb for r in data.records[k]]
+                        for k in data.sortedKs])
+    means, sds = lnprobs.mean(axis=1), lnprobs.std(axis=1, ddof=1)
+    assert np.allclose([data.estLnProbMeans[k] for k in data.sortedKs], means)
+    assert np.allclose([data.estLnProbStdevs[k] for k in data.sortedKs], sds)
+    assert np.allclose([data.LnPK[k] for k in (2, 3, 4)], np.diff(means))
+    assert np.allclose([data.deltaK[k] for k in (2, 3)],
+                       np.abs(means[2:] - 2 * means[1:-1] + means[:-2]) /
+                       sds[1:-1])
+
+    hc.bootstrapDeltaK(data, resamples=500, seed=1)
+    assert sorted(data.pBest) == [2, 3]
+    assert np.isclose(sum(data.pBest.values()), 1)
+    for k in (2, 3):
+        assert data.deltaKLower[k] <= data.deltaK[k] <= data.deltaKUpper[k]
+
+    # The chunks are seeded independently of the number of processes, and
+    # the default seed makes the results reproducible
+    serial = dict(data.pBest)
+    hc.bootstrapDeltaK(data, resamples=500, seed=1, processes=2)
+    assert data.pBest == serial
+    hc.BOOTSTRAP_CHUNK, chunk = 64, hc.BOOTSTRAP_CHUNK
+    try:
+        hc.bootstrapDeltaK(data, resamples=500, seed=1)
+        chunked = dict(data.pBest)
+        hc.bootstrapDeltaK(data, resamples=500, seed=1, processes=2)
+    finally:
+        hc.BOOTSTRAP_CHUNK = chunk
+    assert data.pBest == chunked
+    assert np.isclose(sum(serial.values()), sum(chunked.values()))
+    hc.bootstrapDeltaK(data, resamples=500)
+    default = dict(data.pBest), dict(data.deltaKUpper)
+    hc.bootstrapDeltaK(data, resamples=500, processes=2)
+    assert (data.pBest, data.deltaKUpper) == default
+
+
+def test_evanno_table(tmpdir):
+    """
+    Tests that evanno.txt has the bootstrap columns.
+    """
+    write_f_files(tmpdir)
+    outdir = tmpdir.mkdir("bestK")
+    tmpdir.join("str_K3_rep1_f").write(
+        tmpdir.join("str_K3_rep1_f").read().replace("-4093", "-4099"))
+    sh.main(str(tmpdir), str(outdir))
+    rows = [x.split("\t") for x in outdir.join("evanno.txt").readlines()
+            if x[0].isdigit()]
+    assert [len(x) for x in rows] == [10] * 4
+    assert [x[-1].strip() for x in rows][::3] == ["NA", "NA"]
+    assert np.isclose(sum(float(x[-1]) for x in rows[1:3]), 1)
+
+
+def test_parse_logs_tail(monkeypatch):
+    """
+    Tests that parse_logs() falls back to reading the whole log when the
+    marginal likelihood is not in its tail.
+    """
+    files = sorted(glob.glob("files/*.log"))
+    expected = fc.parse_logs(files)
+    monkeypatch.setattr(fc, "LOG_TAIL_BYTES", 16)
+    assert fc.parse_logs(files) == expected
+
+
+def test_read_meanQ():
+    """
+    Tests that read_meanQ() reads the same values as parsing each line.
+    """
+    for filename in glob.glob("files/*.meanQ"):
+        with open(filename) as fhandle:
+            expected = np.array([list(map(float, line.split()))
+                                 for line in fhandle])
+        assert np.array_equal(fc.read_meanQ(filename), expected)
+
+
+def test_main_replicates(tmpdir):
+    """
+    Tests that the replicates of each K are aggregated by main().
+    """
+    for filename in glob.glob("files/fS_run_K.*"):
+        name = os.path.basename(filename)
+        for prefix in ("fS_run_K", "fS_rep2_K"):
+            py.path.local(filename).copy(tmpdir.join(
+                name.replace("fS_run_K", prefix)))
+    # A second replicate of K=2 that is much worse than the first, so that
+    # K=1 has the best mean marginal likelihood
+    log = tmpdir.join("fS_rep2_K.2.log")
+    log.write(log.read().replace("Marginal Likelihood = -0.9721792877",
+                                 "Marginal Likelihood = -0.9999"))
+    outdir = tmpdir.mkdir("bestK")
+    assert fc.main(str(tmpdir), str(outdir), threads=4) == [1, 2, 3]
+    assert outdir.join("chooseK.txt").readlines()[0] == \
+        "Model complexity that maximizes marginal likelihood = 1\n"
+
+    # The .meanQ files parsed on the pool of processes are in the index
+    index = HarvestIndex(str(outdir.join(INDEX_FILE)))
+    meanqs = glob.glob(str(tmpdir.join("*.meanQ")))
+    assert len(meanqs) > 1
+    for filename in meanqs:
+        assert index.lookup(filename) == fc.model_components(filename)
@@ -18,6 +18,7 @@
 import hashlib
 import os
 import pytest
+import numpy as np
 import mockups
 import structure_threader.wrappers.maverick_wrapper as mw
 
@@ -125,6 +126,16 @@ def test_maverick_merger():
 
     assert known_hashes == generated_hashes
 
+    # The precision columns are appended after the original ones
+    with open("files/merged/outputEvidenceNormalised.csv") as fhandle:
+        header = fhandle.readline().strip().split(",")
+    categories = ["harmonic", "structure", "TI"][:(len(header) - 2) // 5]
+    assert header == ["K", "posterior_exhaustive"] + \
+        ["posterior_{}_{}".format(x, i) for x in categories
+         for i in ("mean", "LL", "UL")] + \
+        ["posterior_{}_{}".format(x, i) for x in categories
+         for i in ("draws", "MCSE")]
+
 
 def test_maverick_normalization():
     """
@@ -144,6 +155,61 @@ def test_maverick_normalization():
     assert real_result == list(k_list)
 
 
+def test_maverick_normalization_values():
+    """
+    Tests the normalization values when there is no uncertainty in the
+    evidences, so that the results are exact.
+    """
+    x_mean = [-3012.0, -3010.0, -3010.0 + np.log(2)]
+    k_list = [1, 2, 3]
+
+    result = mw.maverick_normalization(x_mean, [0.0, 0.0, 0.0], k_list,
+                                       draws=10)
+
+    expected = np.exp(x_mean - mw.log_sum_exp(np.array(x_mean)))
+    for i, k in enumerate(k_list):
+        assert np.isclose(result[k]["norm_mean"], expected[i])
+        assert np.isclose(result[k]["lower_limit"], expected[i])
+        assert np.isclose(result[k]["upper_limit"], expected[i])
+    assert np.isclose(result[3]["norm_mean"], 2 * result[2]["norm_mean"])
+
+    # Same, in several chunks
+    chunked = mw.maverick_normalization(x_mean, [0.0, 0.0, 0.0], k_list,
+                                        draws=10, chunk_size=3)
+    for i, k in enumerate(k_list):
+        for key in ("norm_mean", "lower_limit", "upper_limit"):
+            assert np.isclose(chunked[k][key], expected[i])
+        assert chunked[k]["draws"] == 10
+
+
+def test_maverick_normalization_adaptive():
+    """
+    Tests if the adaptive normalization stops once it is precise enough.
+    """
+    x_mean = [-312.847354, -301.40566, -300.5]
+    x_sd = [0.5, 0.5, 0.5]
+
+    result = mw.maverick_normalization(x_mean, x_sd, [1, 2, 3],
+                                       tolerance=1e-3, batch_size=int(1e4))
+
+    for vals in result.values():
+        assert vals["mc_se"] < 1e-3
+        assert vals["draws"] < int(1e7)
+        assert vals["lower_limit"] <= vals["norm_mean"] <= vals["upper_limit"]
+    assert result[1]["draws"] % int(1e4) == 0
+
+
+def test_log_sum_exp():
+    """
+    Tests if log_sum_exp() does not overflow or underflow.
+    """
+    values = np.array([[-1e5, 1e5], [-1e5, 1e5]])
+
+    assert np.allclose(mw.log_sum_exp(values, axis=0),
+                       [-1e5 + np.log(2), 1e5 + np.log(2)])
+    assert np.allclose(mw.log_sum_exp(np.log([1.0, 2.0, 3.0])), np.log(6))
+
+
 def test_ti_test():
     """
     Tests if the function mw.ti_test is working correctlly.
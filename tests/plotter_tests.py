@@ -0,0 +1,368 @@
+#!/usr/bin/python3
+
+# Copyright 2017 Francisco Pina Martins <f.pinamartins@gmail.com>
+# This file is part of structure_threader.
+# structure_threader is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# structure_threader is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+
+import numpy as np
+import pytest
+
+import structure_threader.plotter.structplot as sp
+import structure_threader.scheduler.job_pool as jp
+
+
+STRUCTURE_HEADER = """
+Run parameters:
+   4 individuals
+
+Inferred ancestry of individuals:
+"""
+
+STRUCTURE_FOOTER = """
+
+Estimated Allele Frequencies in each cluster
+(Allele frequencies)
+"""
+
+NOUSEPOPINFO = """        Label (%Miss) Pop:  Inferred clusters
+  1  Coc_W.1    (0)    1 :  0.033 0.067 0.900
+  2 Coc_W.10    (0)    1 :  0.032 0.968 0.000
+
+  3 Coc_W.11    (0)    2 :  0.500 0.250 0.250
+  4 Coc_W.16    (0)    2 :  0.033 0.967 0.000
+"""
+
+USEPOPINFO = """Probability of being from assumed population | prob of other pops
+        Label (%Miss) Pop
+  1 neoNAAri1    (0)    1 :  0.900 | Pop 2: 0.010 0.020 0.030  | Pop 3: 0.000 0.000 0.040  |
+  2 neoNAAri2    (0)    2 :  1.000 | Pop 1: 0.000 0.000 0.000  | Pop 3: 0.000 0.000 0.000  |
+  3 neoNAAri3    (0)    3 :  0.700 | Pop 1: 0.100 0.000 0.000  | Pop 2: 0.000 0.100 0.100  |
+  4 neoNAAri4    (0)    1 :  0.800 | Pop 3: 0.000 0.100 0.000  | Pop 2: 0.050 0.050 0.000  |
+"""
+
+
+def test_parse_structure(tmpdir):
+    """
+    Tests the parsing of the Q values of STRUCTURE output files, with and
+    without the USEPOPINFO flag.
+    """
+    nopop = tmpdir.join("str_K3_rep1_f")
+    nopop.write(STRUCTURE_HEADER + NOUSEPOPINFO + STRUCTURE_FOOTER)
+    kobj = sp.PlotK(str(nopop), "structure", get_indv=True)
+    assert kobj.k == 3
+    assert kobj.indv == ["Coc_W.1", "Coc_W.10", "Coc_W.11", "Coc_W.16"]
+    assert np.array_equal(kobj.qvals, [[0.033, 0.067, 0.9],
+                                       [0.032, 0.968, 0.0],
+                                       [0.5, 0.25, 0.25],
+                                       [0.033, 0.967, 0.0]])
+
+    popinfo = tmpdir.join("str_K3_rep2_f")
+    popinfo.write(STRUCTURE_HEADER + USEPOPINFO + STRUCTURE_FOOTER)
+    kobj = sp.PlotK(str(popinfo), "structure", get_indv=True)
+    assert kobj.k == 3
+    assert kobj.indv == ["neoNAAri1", "neoNAAri2", "neoNAAri3", "neoNAAri4"]
+    assert np.allclose(kobj.qvals, [[0.9, 0.06, 0.04],
+                                    [0.0, 1.0, 0.0],
+                                    [0.1, 0.2, 0.7],
+                                    [0.8, 0.1, 0.1]])
+
+    # Files without Q values are left unparsed
+    empty = tmpdir.join("str_K3_rep3_f")
+    empty.write(STRUCTURE_HEADER.split("Inferred")[0])
+    kobj = sp.PlotK.__new__(sp.PlotK)
+    kobj.file_path = str(empty)
+    assert kobj._ancestry_lines() is None
+
+
+def test_parse_files(tmpdir):
+    """
+    Tests that output files parsed by a pool of processes give the same
+    results, in the same order, as the serial parser.
+    """
+    files = []
+    for rep in range(1, 5):
+        kfile = tmpdir.join("str_K3_rep{}_f".format(rep))
+        kfile.write(STRUCTURE_HEADER + (NOUSEPOPINFO if rep % 2 else
+                                        USEPOPINFO) + STRUCTURE_FOOTER)
+        files.append(str(kfile))
+
+    serial = sp.parse_files(files, "structure", get_indv=True)
+    parallel = sp.parse_files(files, "structure", get_indv=True, threads=2)
+    assert [x.file_path for x in parallel] == files
+    for kobj, other in zip(serial, parallel):
+        assert np.array_equal(kobj.qvals, other.qvals)
+    # Labels are only parsed once
+    assert parallel[0].indv == ["Coc_W.1", "Coc_W.10", "Coc_W.11",
+                                "Coc_W.16"]
+    assert all(x.indv == [] for x in parallel[1:])
+
+    # Errors are raised for the first broken file
+    broken = tmpdir.join("str_K3_rep5_f")
+    broken.write(STRUCTURE_HEADER.split("Inferred")[0])
+    with pytest.raises(AttributeError):
+        sp.parse_files(files + [str(broken)], "structure", threads=2)
+
+
+def test_plotk_raster(tmpdir):
+    """
+    Tests that the raster plots are drawn in every format, with a capped
+    width.
+    """
+    nind = 5000
+    qfile = tmpdir.join("fS_run_K.3.meanQ")
+    rng = np.random.RandomState(1)
+    np.savetxt(str(qfile), rng.dirichlet([0.5] * 3, size=nind), fmt="%.6f")
+    indfile = tmpdir.join("indfile")
+    indfile.write("".join("ind{}\tPop{}\n".format(i, i // 1000)
+                          for i in range(nind)))
+
+    klist = sp.PlotList([str(qfile)], "faststructure", indfile=str(indfile))
+    for fmt in ("png", "pdf", "svg"):
+        klist.plotk_raster(3, str(tmpdir), fmt=fmt, dpi=20)
+        assert tmpdir.join("fS_run_K.3." + fmt).size() > 0
+
+    image = sp.plt.imread(str(tmpdir.join("fS_run_K.3.png")))
+    assert image.shape[1] < (sp.MAX_FIGURE_WIDTH + 2) * 20
+
+
+def test_render_plots(tmpdir, monkeypatch):
+    """
+    Tests that the plots of all K values are drawn by a pool of processes.
+    """
+    files = []
+    for k in (2, 3, 4):
+        kfile = tmpdir.join("fS_run_K.{}.meanQ".format(k))
+        np.savetxt(str(kfile), np.random.RandomState(k).dirichlet(
+            [0.5] * k, size=30), fmt="%.6f")
+        files.append(str(kfile))
+    indfile = tmpdir.join("indfile")
+    indfile.write("".join("ind{}\tPop{}\n".format(i, i // 10)
+                          for i in range(30)))
+
+    outdir = tmpdir.mkdir("plots")
+    sp.main(files, "faststructure", str(outdir), bestk=[2, 4],
+            indfile=str(indfile), threads=2, raster="png", dpi=20)
+    assert sorted(x.basename for x in outdir.listdir()) == [
+        "ComparativePlot_2-4.html", "fS_run_K.2.html", "fS_run_K.2.png",
+        "fS_run_K.3.html", "fS_run_K.3.png", "fS_run_K.4.html",
+        "fS_run_K.4.png"]
+
+    # With other threads running (as in a hierarchical run), the workers are
+    # not forked from this process
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    try:
+        assert jp.process_context().get_start_method() == "forkserver"
+        threaded = tmpdir.mkdir("threaded")
+        sp.main(files, "faststructure", str(threaded), bestk=[2, 4],
+                indfile=str(indfile), threads=2, raster="png", dpi=20)
+    finally:
+        stop.set()
+        thread.join()
+    assert sorted(x.basename for x in threaded.listdir()) == \
+        sorted(x.basename for x in outdir.listdir())
+    assert jp.process_context() is None
+
+    # A single best K is only drawn once
+    rendered = []
+    monkeypatch.setattr(sp, "render_plots",
+                        lambda klist, tasks, threads: rendered.extend(tasks))
+    sp.main(files, "faststructure", str(outdir), bestk=[3],
+            indfile=str(indfile), threads=2)
+    assert [x[1][0] for x in rendered if x[0] == "plotk"] == [[2], [3], [4]]
+    monkeypatch.undo()
+
+    # Errors of the workers are raised
+    with pytest.raises(SystemExit):
+        klist = sp.PlotList(files, "faststructure", indfile=str(indfile))
+        sp.render_plots(klist, [("plotk", ([2], str(outdir)), {}),
+                                ("plotk", ([5], str(outdir)), {})], 2)
+
+
+def test_plotk_lod(tmpdir):
+    """
+    Tests that the interactive plots of many individuals are drawn as bins
+    of individuals, that do not straddle populations, plus the Q values that
+    are drawn when zoomed in.
+    """
+    nind = sp.LOD_INDIVIDUALS + 1000
+    qfile = tmpdir.join("fS_run_K.3.meanQ")
+    np.savetxt(str(qfile), np.random.RandomState(1).dirichlet(
+        [0.5] * 3, size=nind), fmt="%.6f")
+    indfile = tmpdir.join("indfile")
+    indfile.write("".join("ind{}\tPop{}\n".format(i, i // 700)
+                          for i in range(nind)))
+
+    klist = sp.PlotList([str(qfile)], "faststructure", indfile=str(indfile))
+    edges = klist._lod_edges()
+    assert edges[0] == 0 and edges[-1] == nind
+    assert len(edges) <= sp.LOD_BARS + len(klist.pops_xrange) + 1
+    assert set(x for y in klist.pops_xrange for x in y) <= set(edges)
+
+    klist.plotk([3], str(tmpdir))
+    html = tmpdir.join("fS_run_K.3.html").read()
+    assert "structureLod(" in html
+    assert "Assignment: " not in html
+
+
+def test_html_report(tmpdir):
+    """
+    Tests that an HTML report has a single copy of plotly.js, an index page
+    and one data file per plot.
+    """
+    files = []
+    for k in (2, 3):
+        kfile = tmpdir.join("fS_run_K.{}.meanQ".format(k))
+        np.savetxt(str(kfile), np.random.RandomState(k).dirichlet(
+            [0.5] * k, size=30), fmt="%.6f")
+        files.append(str(kfile))
+    indfile = tmpdir.join("indfile")
+    indfile.write("".join("ind{}\tPop{}\n".format(i, i // 10)
+                          for i in range(30)))
+
+    outdir = tmpdir.mkdir("plots")
+    sp.main(files, "faststructure", str(outdir), bestk=[2, 3],
+            indfile=str(indfile), raster="png", dpi=20, report=True)
+    assert sorted(x.basename for x in outdir.listdir()) == [
+        "ComparativePlot_2-3.js", "fS_run_K.2.js", "fS_run_K.2.png",
+        "fS_run_K.3.js", "fS_run_K.3.png", "index.html", "plotly.min.js"]
+
+    index = outdir.join("index.html").read()
+    assert index.count("<option") == 3
+    assert "plotly.js v" not in index
+    assert outdir.join("fS_run_K.2.js").read().startswith(
+        'structureFigure("fS_run_K.2", {')
+
+
+def test_comparative_plot(tmpdir):
+    """
+    Tests that comparative plots of many K values are drawn as a single
+    stacked image, with one band per K value.
+    """
+    kvals = list(range(2, sp.MAX_SUBPLOTS + 3))
+    files = []
+    for k in kvals:
+        kfile = tmpdir.join("fS_run_K.{}.meanQ".format(k))
+        np.savetxt(str(kfile), np.random.RandomState(k).dirichlet(
+            [0.5] * k, size=30), fmt="%.6f")
+        files.append(str(kfile))
+    indfile = tmpdir.join("indfile")
+    indfile.write("".join("ind{}\tPop{}\n".format(i, i // 10)
+                          for i in range(30)))
+
+    klist = sp.PlotList(files, "faststructure", indfile=str(indfile))
+    image, edges, valid, white = klist._comparative_image(kvals + [99], 10,
+                                                          1000)
+    assert valid == sorted(kvals, reverse=True)
+    assert white == max(kvals)
+    assert image.shape == (11 * len(kvals) - 1, 30)
+    assert np.array_equal(edges, np.arange(31))
+    # The bottom band is the lowest K, and the rows between bands are white
+    assert set(np.unique(image[:10])) <= {0, 1, white}
+    assert np.all(image[10] == white)
+
+    outdir = tmpdir.mkdir("plots")
+    sp.main(files, "faststructure", str(outdir), bestk=kvals,
+            indfile=str(indfile), filter_k=[2])
+    name = "ComparativePlot_" + "-".join(str(x) for x in kvals)
+    assert sorted(x.basename for x in outdir.listdir()) == [
+        name + ".html", name + ".svg", "fS_run_K.2.html", "fS_run_K.2.svg"]
+
+    # The stacked comparative plot is listed in the index of HTML reports
+    outdir = tmpdir.mkdir("report")
+    sp.main(files, "faststructure", str(outdir), bestk=kvals,
+            indfile=str(indfile), filter_k=[2], report=True)
+    assert outdir.join(name + ".js").check()
+    index = outdir.join("index.html").read()
+    assert '<option value="{0}">{0}</option>'.format(name) in index
+    assert index.count("<option") == 2
+
+
+def test_pop_summary(tmpdir):
+    """
+    Tests the population summaries of several K values against the
+    statistics of each population, and that they are written as a table and
+    a plot.
+    """
+    sizes = [1, 4, 7, 2, 6]
+    files = []
+    for k in (1, 2, 3):
+        kfile = tmpdir.join("fS_run_K.{}.meanQ".format(k))
+        np.savetxt(str(kfile), np.random.RandomState(k).dirichlet(
+            [0.5] * k, size=sum(sizes)), fmt="%.6f")
+        files.append(str(kfile))
+    popfile = tmpdir.join("popfile")
+    popfile.write("".join("Pop{}\t{}\t{}\n".format(i, x, len(sizes) - i)
+                          for i, x in enumerate(sizes)))
+
+    klist = sp.PlotList(files, "faststructure", popfile=str(popfile))
+    summary = klist.pop_summary([3, 1, 2, 7])
+    assert list(summary) == [1, 2, 3]
+    for k, stats in summary.items():
+        qvals = np.asarray(klist.kvals[k].qvals).reshape(-1, k)
+        for p, (start, end) in enumerate(klist.pops_xrange):
+            assert stats["n"][p] == end - start
+            assert np.allclose(stats["mean"][p], qvals[start:end].mean(0))
+            assert np.allclose(stats["median"][p],
+                               np.median(qvals[start:end], 0))
+            assert np.allclose(stats["sd"][p], qvals[start:end].std(0))
+
+    outdir = tmpdir.mkdir("plots")
+    sp.main(files, "faststructure", str(outdir), popfile=str(popfile),
+            filter_k=[2, 3], pop_summary=True)
+    assert outdir.join("PopulationSummary_2-3.svg").size() > 0
+    table = outdir.join("PopulationSummary_2-3.tsv").readlines()
+    assert table[0].split() == ["K", "Population", "N", "Cluster", "Mean",
+                                "Median", "SD"]
+    assert len(table) == 1 + (2 + 3) * len(sizes)
+
+
+def test_sort_qvals_pop(tmpdir):
+    """
+    Tests that the individual labels and the Q values of all K values are
+    sorted by the same permutation, keeping the original order of the
+    individuals within each population.
+    """
+    pops = np.random.RandomState(0).randint(12, size=80)
+    files = []
+    for k in (2, 3):
+        kfile = tmpdir.join("fS_run_K.{}.meanQ".format(k))
+        np.savetxt(str(kfile), np.random.RandomState(k).dirichlet(
+            [0.5] * k, size=len(pops)), fmt="%.6f")
+        files.append(str(kfile))
+
+    # More than 9 populations, so that the order column sorts differently
+    # as numbers and as strings
+    indfile = tmpdir.join("indfile")
+    indfile.write("".join("ind{}\tPop{}\t{}\n".format(i, x, 12 - x)
+                          for i, x in enumerate(pops)))
+    klist = sp.PlotList(files, "faststructure", indfile=str(indfile))
+    order = [int(x[3:]) for x in klist.indv]
+    assert order == sorted(range(len(pops)), key=lambda x: -pops[x])
+    for k, kfile in zip((2, 3), files):
+        assert np.allclose(klist.kvals[k].qvals, np.loadtxt(kfile)[order])
+    assert klist.pops == ["Pop{}".format(x) for x in range(11, -1, -1)]
+    assert klist.pops_xrange[-1] == (len(pops) - sum(pops == 0), len(pops))
+
+    popfile = tmpdir.join("popfile")
+    popfile.write("A\t30\t2\nB\t10\t3\nC\t40\t1\n")
+    klist = sp.PlotList(files, "faststructure", popfile=str(popfile))
+    order = list(range(40, 80)) + list(range(30)) + list(range(30, 40))
+    assert np.allclose(klist.kvals[2].qvals, np.loadtxt(files[0])[order])
+    assert klist.pops == ["C", "A", "B"]
+    assert klist.pops_xpos == [20, 55, 75]
+    assert klist.pops_xrange == [(0, 40), (40, 70), (70, 80)]
@@ -16,6 +16,9 @@
 # along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
 
 import os
+from types import SimpleNamespace
+
+import numpy as np
 import pytest
 import structure_threader.sanity_checks.sanity as sc
 
@@ -49,3 +52,53 @@ def test_file_checker(tmpdir):
     # Chck for a file and provided with a wrong path
     with pytest.raises(SystemExit):
         sc.file_checker(str(testfile) + "a")
+
+
+def test_check_popfile(tmpdir):
+    """
+    Tests if check_popfile() checks the order column and the number of
+    individuals of the popfile against the Q matrices, and returns the
+    popfile array.
+    """
+    popfile = tmpdir.join("popfile")
+    popfile.write("Pop1\t3\t2\nPop2\t2\t1\n")
+    kvals = {2: SimpleNamespace(file_path="K2", qvals=np.zeros((5, 2)))}
+
+    poparray = sc.AuxSanity().check_popfile(str(popfile), kvals)
+    assert poparray["popname"].tolist() == ["Pop1", "Pop2"]
+    assert poparray["nind"].tolist() == [3, 2]
+
+    kvals[3] = SimpleNamespace(file_path="K3", qvals=np.zeros((6, 3)))
+    with pytest.raises(SystemExit):
+        sc.AuxSanity().check_popfile(str(popfile), kvals)
+
+    popfile.write("Pop1\t3\t5\nPop2\t2\t2\n")
+    with pytest.raises(SystemExit):
+        sc.AuxSanity().check_popfile(str(popfile), {})
+
+
+def test_check_indfile(tmpdir):
+    """
+    Tests if check_indfile() checks the order column of the indfile, and
+    returns the indfile array.
+    """
+    kvals = {2: SimpleNamespace(file_path="K2", qvals=np.zeros((4, 2)))}
+    indfile = tmpdir.join("indfile")
+    indfile.write("A\tP1\t1\nB\tP2\t3\nC\tP3\t2\nD\tP2\t3\n")
+    indarray = sc.AuxSanity().check_indfile(str(indfile), kvals)
+    assert indarray[:, 0].tolist() == ["A", "B", "C", "D"]
+
+    indfile.write("A\tP1\t1\nB\tP2\t4\nC\tP3\t4\nD\tP2\t4\n")
+    with pytest.raises(SystemExit):
+        sc.AuxSanity().check_indfile(str(indfile), kvals)
+
+
+def test_missing_order():
+    """
+    Tests if missing_order() finds the gaps of an order column.
+    """
+    check = sc.AuxSanity()
+    assert check.missing_order(np.array([3, 1, 2, 2])) == []
+    assert check.missing_order(np.array([7, 2, 5, 2])) == ["1", "3", "4",
+                                                           "6"]
+    assert check.missing_order(np.array([0, 1])) == []
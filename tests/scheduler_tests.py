@@ -0,0 +1,598 @@
+#!/usr/bin/python3
+
+# Copyright 2017 Francisco Pina Martins <f.pinamartins@gmail.com>
+# This file is part of structure_threader.
+# structure_threader is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# structure_threader is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pytest
+
+import mockups
+import structure_threader.argparser as argparser
+import structure_threader.structure_threader as st
+import structure_threader.wrappers.maverick_wrapper as mw
+import structure_threader.scheduler.pilot as pilot
+import structure_threader.scheduler.job_pool as jp
+import structure_threader.scheduler.adaptive as adaptive
+import structure_threader.scheduler.cost_model as cm
+import structure_threader.scheduler.deadline as dl
+import structure_threader.scheduler.hierarchy as hierarchy
+import structure_threader.stats.results_store as rs
+
+
+def test_job_pool():
+    """
+    Tests if JobPool runs every job without exceeding its slots.
+    """
+    lock = threading.Lock()
+    running = [0, 0]  # Current and maximum number of concurrent jobs
+
+    def _worker(job, tracker=None):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        time.sleep(0.05)
+        with lock:
+            running[0] -= 1
+        return (0, job.k)
+
+    pool = jp.JobPool(_worker, 2, interval=0.01)
+    for k in range(1, 7):
+        pool.submit(jp.Job("structure", k, 1, None))
+
+    results = pool.run()
+
+    assert sorted(x[1] for x in results) == list(range(1, 7))
+    assert running[1] == 2
+
+
+def test_job_pool_exit():
+    """
+    Tests if a SystemExit in a job or in its callback releases the slot and
+    is re-raised by run().
+    """
+    def _worker(job, tracker=None):
+        if job.k == 1:
+            raise SystemExit(1)
+        return (0, job.k)
+
+    def _callback(job, status):
+        if job.k == 2:
+            raise SystemExit(2)
+
+    pool = jp.JobPool(_worker, 1, interval=0.01)
+    pool.submit(jp.Job("structure", 1, 1, None))
+    with pytest.raises(SystemExit):
+        pool.run()
+    assert pool.running == 0
+
+    pool = jp.JobPool(_worker, 1, interval=0.01, callback=_callback)
+    pool.submit(jp.Job("structure", 2, 1, None))
+    with pytest.raises(SystemExit):
+        pool.run()
+    assert pool.running == 0
+
+
+def test_process_cpu_time():
+    """
+    Tests if process_cpu_time() reads the CPU time of a process.
+    """
+    if not os.path.exists("/proc"):
+        return
+    assert adaptive.process_cpu_time(os.getpid()) > 0
+    assert adaptive.process_cpu_time(-1) is None
+
+
+def test_controller_decide():
+    """
+    Tests the hill climb of the ConcurrencyController.
+    """
+    ctrl = adaptive.ConcurrencyController(2, 8, settle=1)
+    ctrl.cpus = 8
+
+    # Throughput grows with the number of jobs, so keep going up
+    assert ctrl.decide(4, 4.0, 1.0, 4.0) == 5
+    assert ctrl.decide(5, 4.8, 0.96, 5.0) == 6
+    # The sixth job did not pay off: go back and settle
+    assert ctrl.decide(6, 4.85, 0.8, 6.0) == 5
+    assert ctrl.decide(5, 4.8, 0.96, 5.0) == 5
+    # Then probe downwards
+    assert ctrl.decide(5, 4.8, 0.96, 5.0) == 4
+    # The system is overloaded by someone else: back off
+    assert ctrl.decide(4, 3.9, 0.97, 12.0) == 3
+    # Never go below the lower bound
+    assert ctrl.decide(2, 1.0, 0.2, 12.0) == 2
+
+
+def test_controller_report():
+    """
+    Tests if progress lines are turned into iteration rates.
+    """
+    ctrl = adaptive.ConcurrencyController(1, 4)
+    ctrl.report(1, "   100:  0.98  0.123  -1234.5\n")
+    ctrl.report(1, "Some other line\n")
+    time.sleep(0.01)
+    ctrl.report(1, "   200:  0.98  0.123  -1230.5\n")
+
+    assert ctrl.progress[1][0][1] == 200
+    assert ctrl.progress[1][1] > 0
+    assert ctrl.progress[1][1] == ctrl.progress[1][2]
+
+
+def test_parse_duration():
+    """
+    Tests if parse_duration() converts durations to seconds.
+    """
+    assert dl.parse_duration("8h") == 8 * 3600
+    assert dl.parse_duration("1h30m") == 5400
+    assert dl.parse_duration("90m") == 5400
+    assert dl.parse_duration("1d") == 86400
+    assert dl.parse_duration("3600") == 3600
+    assert dl.parse_duration("eight hours") is None
+    assert dl.parse_duration("") is None
+
+
+def test_anytime_order():
+    """
+    Tests if jobs are ordered in replicate rounds, slowest K first.
+    """
+    jobs = [jp.Job("structure", k, rep, None) for k in (1, 2, 3)
+            for rep in (1, 2)]
+    ordered = [(x.k, x.rep) for x in dl.anytime_order(jobs)]
+
+    assert ordered == [(3, 1), (2, 1), (1, 1), (3, 2), (2, 2), (1, 2)]
+
+
+def test_completed_runs():
+    """
+    Tests if completed_runs() finds the K values and replicates to use.
+    """
+    jobs = [jp.Job("structure", k, rep, None) for k, rep in
+            [(1, 1), (2, 1), (3, 1), (1, 2), (2, 2)]]
+    assert dl.completed_runs(jobs, [1, 2, 3, 4], [1, 2, 3]) == ([1, 2, 3],
+                                                                 [1])
+    jobs = [jp.Job("structure", k, rep, None) for k, rep in
+            [(1, 2), (2, 1), (3, 2)]]
+    assert dl.completed_runs(jobs, [1, 2, 3], [1, 2]) == ([1, 3], [2])
+
+
+def test_cost_model():
+    """
+    Tests the CostModel estimates.
+    """
+    model = cm.CostModel()
+    assert model.estimate(jp.Job("structure", 2, 1, None)) is None
+
+    model.seed("structure", 2, 100)
+    assert model.estimate(jp.Job("structure", 2, 1, None)) == 100
+    assert model.estimate(jp.Job("structure", 4, 1, None)) == 200
+
+    # Observed runtimes take precedence over the priors
+    model.observe(jp.Job("structure", 2, 1, None), 10)
+    model.observe(jp.Job("structure", 3, 1, None), 15)
+    assert model.estimate(jp.Job("structure", 2, 2, None)) == 10
+    assert model.estimate(jp.Job("structure", 5, 1, None)) == 25
+    assert model.estimate(jp.Job("faststructure", 5, 1, None)) is None
+
+
+def test_job_pool_deadline():
+    """
+    Tests that JobPool stops launching jobs that do not fit the deadline.
+    """
+    def _worker(job, tracker=None):
+        time.sleep(0.1 * job.k)
+        return (0, None)
+
+    model = cm.CostModel()
+    pool = jp.JobPool(_worker, 1, interval=0.01, cost_model=model,
+                      deadline=time.monotonic() + 0.35)
+    for k in (1, 1, 3):
+        pool.submit(jp.Job("structure", k, 1, None))
+
+    pool.run()
+
+    # Both K1 jobs fit, but the K3 job is expected to take 0.3s
+    assert [x.k for x in pool.finished] == [1, 1]
+    assert [x.k for x in pool.skipped] == [3]
+
+
+def test_pilot_params(tmpdir):
+    """
+    Tests if the parameter files are shortened for the pilot runs.
+    """
+    mainparams = str(tmpdir.join("mainparams"))
+    pilot.write_mainparams("smalldata/mainparams", mainparams,
+                           {"BURNIN": 10, "NUMREPS": 20})
+    params = pilot.read_mainparams(mainparams)
+    assert params["BURNIN"] == "10"
+    assert params["NUMREPS"] == "20"
+    assert params["NUMINDS"] == "34"
+
+    mav_params = str(tmpdir.join("parameters.txt"))
+    pilot.write_mav_params("smalldata/parameters.txt", mav_params,
+                           {"mainBurnin": 10, "outputRoot": "x"})
+    params = mw.mav_params_parser(mav_params)
+    assert params["mainBurnin"] == "10"
+    assert params["mainSamples"] == "4000"
+    assert params["outputRoot"] == "x"
+
+
+def test_pilot_run(tmpdir, monkeypatch):
+    """
+    Tests if the pilot runs of every program of an ensemble run share a
+    single pool.
+    """
+    def _worker(job, tracker=None):
+        if job.prog == "maverick":
+            shutil.copytree("files/mav_K{}".format(job.k), os.path.join(
+                job.arg.outpath, "mav_K{}".format(job.k)))
+        else:
+            for ext in (".meanQ", ".log"):
+                shutil.copy("files/fS_run_K.{}{}".format(job.k, ext),
+                            job.arg.outpath)
+        return (0, None)
+
+    pools = []
+    pool_class = jp.JobPool
+
+    def _pool(*args, **kwargs):
+        pools.append(pool_class(*args, **kwargs))
+        return pools[-1]
+
+    monkeypatch.setattr(jp, "JobPool", _pool)
+
+    arg = argparser.argument_parser(
+        ["run", "-fs", "smalldata/mainparams", "-mv", "smalldata/mainparams",
+         "-K", "3", "-i", "smalldata/Reduced_dataset.structure", "-o",
+         str(tmpdir), "-t", "1", "--ind", "smalldata/indfile.txt",
+         "--params", "smalldata/parameters.txt"])
+    model = cm.CostModel()
+    pilot.pilot_run(st.program_arguments(arg), _worker, model, arg.threads)
+
+    assert len(pools) == 1
+    assert sorted((x.prog, x.k) for x in pools[0].finished) == [
+        ("faststructure", 1), ("faststructure", 2), ("faststructure", 3),
+        ("maverick", 1), ("maverick", 2), ("maverick", 3)]
+    assert model.estimate(jp.Job("maverick", 2, 1, None)) is not None
+
+
+def test_run_iterations():
+    """
+    Tests if the length of the full runs is read from the parameter files.
+    """
+    arg = mockups.Arguments()
+    arg.params = "smalldata/mainparams"
+    assert pilot.run_iterations("structure", arg) == 105000
+
+    arg.params = "smalldata/parameters.txt"
+    assert pilot.run_iterations("maverick", arg) == 5 * 4500 + 20 * 6000
+    arg.notests = True
+    assert pilot.run_iterations("maverick", arg) == 5 * 4500
+
+    assert pilot.run_iterations("faststructure", arg) is None
+
+
+def test_pilot_check_output():
+    """
+    Tests if pilot outputs are checked with the parsers used downstream.
+    """
+    assert pilot.check_output("faststructure", "files", 2) is None
+    assert pilot.check_output("maverick", "files", 2) is None
+    assert pilot.check_output("structure", "files", 2) is not None
+    assert pilot.check_output("faststructure", "files", 9) is not None
+
+
+def test_longest_first():
+    """
+    Tests if ensemble jobs are ordered from the longest to the shortest.
+    """
+    jobs = [jp.Job(prog, k, 1, None) for prog in ("faststructure",
+                                                  "structure")
+            for k in (2, 3)]
+    ordered = [(x.prog, x.k) for x in cm.longest_first(jobs)]
+    assert ordered == [("structure", 3), ("structure", 2),
+                       ("faststructure", 3), ("faststructure", 2)]
+
+    # Real estimates take over once every job has one
+    model = cm.CostModel()
+    model.seed("structure", 2, 10)
+    model.seed("faststructure", 2, 40)
+    ordered = [(x.prog, x.k) for x in cm.longest_first(jobs, model)]
+    assert ordered == [("faststructure", 3), ("faststructure", 2),
+                       ("structure", 3), ("structure", 2)]
+
+    ordered = [(x.prog, x.k) for x in dl.anytime_order(
+        jobs + [jp.Job("structure", 2, 2, None)],
+        cm.cost_function(jobs, model))]
+    assert ordered[-1] == ("structure", 2)
+    assert ordered[0] == ("faststructure", 3)
+
+
+def test_ensemble_arguments(tmpdir):
+    """
+    Tests if every program of an ensemble run gets its own arguments.
+    """
+    arg = argparser.argument_parser(
+        ["run", "-st", "smalldata/mainparams", "-fs", "smalldata/mainparams",
+         "-mv", "smalldata/mainparams", "-K", "3", "-i", "smalldata/Reduced_dataset.structure",
+         "-o", str(tmpdir), "-t", "1", "--ind", "smalldata/indfile.txt",
+         "--params", "smalldata/parameters.txt", "--st_params",
+         "smalldata/mainparams"])
+    assert list(arg.programs) == ["structure", "maverick", "faststructure"]
+    assert arg.wrapped_prog == "ensemble"
+
+    prog_args = st.program_arguments(arg)
+    assert prog_args["structure"].params.endswith("mainparams")
+    assert prog_args["maverick"].params.endswith("parameters.txt")
+    assert prog_args["faststructure"].params is None
+    for wrapped_prog, prog_arg in prog_args.items():
+        assert prog_arg.outpath == str(tmpdir.join(wrapped_prog))
+        assert os.path.isdir(prog_arg.outpath)
+        assert prog_arg.external_prog == "smalldata/mainparams"
+
+    arg = argparser.argument_parser(
+        ["run", "-st", "smalldata/mainparams", "-K", "3", "-i",
+         "smalldata/Reduced_dataset.structure", "-o", str(tmpdir), "-t", "1"])
+    assert arg.wrapped_prog == "structure"
+    assert st.program_arguments(arg) == {"structure": arg}
+
+
+def test_store_saved_once(tmpdir, monkeypatch):
+    """
+    Tests if the results of every job are stored, with the index of the
+    results store written once, at the end of the sweep.
+    """
+    def _worker(job, tracker=None):
+        for ext in (".meanQ", ".log"):
+            shutil.copy("files/fS_run_K.{}{}".format(job.k, ext),
+                        job.arg.outpath)
+        return (0, None)
+
+    saved = []
+    save = rs.ResultsStore.save
+
+    def _save(store):
+        saved.append(store.directory)
+        save(store)
+
+    monkeypatch.setattr(st, "run_job", _worker)
+    monkeypatch.setattr(st, "CWD", os.getcwd())
+    monkeypatch.setattr(rs.ResultsStore, "save", _save)
+
+    arg = argparser.argument_parser(
+        ["run", "-fs", "smalldata/mainparams", "-K", "3", "-i",
+         "smalldata/Reduced_dataset.structure", "-o", str(tmpdir), "-t",
+         "2", "--ind", "smalldata/indfile.txt"])
+    finished = st.structure_threader(arg, st.program_arguments(arg))
+
+    assert len(finished) == 3
+    assert saved == [str(tmpdir.join(rs.STORE_DIR))]
+    store = rs.ResultsStore(saved[0])
+    assert all(store.qvals(st.result_file("faststructure", str(tmpdir), k),
+                           "faststructure") is not None for k in (1, 2, 3))
+
+
+def test_assign_clusters():
+    """
+    Tests if individuals are assigned to clusters by Q value threshold.
+    """
+    qvals = np.array([[0.9, 0.1], [0.5, 0.5], [0.15, 0.85], [0.95, 0.05]])
+    clusters = hierarchy.assign_clusters(qvals, 0.8)
+
+    assert [list(x) for x in clusters] == [[0, 3], [2]]
+
+
+def test_hierarchy_subset(tmpdir):
+    """
+    Tests if the input files of a cluster analysis are written.
+    """
+    arg = mockups.Arguments()
+    arg.infile = os.path.abspath("smalldata/Reduced_dataset.structure")
+    arg.params = os.path.abspath("smalldata/mainparams")
+    arg.outpath = str(tmpdir)
+    arg.k_list = [1, 2, 3, 4]
+    arg.indfile = None
+    arg.popfile = None
+
+    tree = hierarchy.HierarchicalRun(None)
+    parent = hierarchy.Analysis("structure", arg, 0)
+    child = tree.subset(parent, 2, np.array([0, 5, 7]))
+
+    assert child.depth == 1
+    assert child.arg.k_list == [1, 2, 3]
+    assert child.arg.outpath == str(tmpdir.join("cluster_2"))
+    assert pilot.read_mainparams(child.arg.params[1])["NUMINDS"] == "3"
+
+    header, individuals = hierarchy.read_individuals(arg.infile, 1, 2)
+    assert len(individuals) == 34
+    sub_header, subset = hierarchy.read_individuals(child.arg.infile, 1, 2)
+    assert sub_header == header
+    assert subset == [individuals[x] for x in (0, 5, 7)]
+
+    grandchild = tree.subset(child, 1, np.array([2]))
+    assert list(grandchild.members) == [7]
+
+
+def test_hierarchy_subset_order(tmpdir):
+    """
+    Tests if the population order of a cluster that lacks some populations
+    is renumbered without gaps.
+    """
+    infile = tmpdir.join("data.str")
+    infile.write("".join("Ind{0} 1 1 2\nInd{0} 1 2 2\n".format(x)
+                         for x in range(6)))
+    indfile = tmpdir.join("indfile.txt")
+    indfile.write("".join("Ind{0}\t{1}\t{2}\n".format(x, pop, order) for
+                          x, (pop, order) in enumerate([("A", 1), ("A", 1),
+                                                        ("B", 2), ("B", 2),
+                                                        ("C", 3), ("C", 3)])))
+
+    arg = mockups.Arguments()
+    arg.infile = str(infile)
+    arg.outpath = str(tmpdir)
+    arg.k_list = [1, 2]
+    arg.indfile = str(indfile)
+    arg.popfile = None
+
+    tree = hierarchy.HierarchicalRun(None)
+    parent = hierarchy.Analysis("faststructure", arg, 0)
+    child = tree.subset(parent, 1, np.array([2, 4, 5]))
+
+    table = np.genfromtxt(child.arg.indfile, dtype="|U20")
+    assert list(table[:, 1]) == ["B", "C", "C"]
+    assert list(table[:, 2]) == ["1", "2", "2"]
+
+
+def test_hierarchical_run_exit(tmpdir):
+    """
+    Tests if a cluster analysis that exits (as the sanity checks do) is only
+    logged as a leaf of the tree.
+    """
+    infile = tmpdir.join("data.str")
+    infile.write("".join("Ind{0} 1 1 2\nInd{0} 1 2 2\n".format(x)
+                         for x in range(12)))
+
+    def _worker(job, tracker=None):
+        qvals = np.zeros((12, job.k))
+        qvals[:, 0] = 1
+        np.savetxt(os.path.join(job.arg.outpath,
+                                "fS_run_K.{}.meanQ".format(job.k)), qvals)
+        return (0, None)
+
+    def _process(wrapped_prog, arg, finished):
+        if arg.outpath != str(tmpdir):
+            raise SystemExit
+        return [2]
+
+    arg = mockups.Arguments()
+    arg.infile = str(infile)
+    arg.outpath = str(tmpdir)
+    arg.k_list = [1, 2]
+    arg.replicates = [1]
+    arg.indfile = None
+    arg.popfile = None
+
+    tree = hierarchy.HierarchicalRun(_process, min_size=5)
+    pool = jp.JobPool(_worker, 1, interval=0.01, callback=tree.job_done)
+    tree.pool = pool
+    jobs = [jp.Job("faststructure", k, 1, arg) for k in arg.k_list]
+    tree.add(hierarchy.Analysis("faststructure", arg, 0), jobs)
+    for job in jobs:
+        pool.submit(job)
+    pool.run()
+
+    assert len(tree.analyses) == 2
+    assert all(x.done for x in tree.analyses)
+    assert tree.analyses[1].bestk is None
+    assert tree.analyses[1].clusters == []
+
+
+def test_hierarchical_run(tmpdir):
+    """
+    Tests if cluster analyses are submitted to the running pool as soon as
+    their parent finishes.
+    """
+    infile = tmpdir.join("data.str")
+    infile.write("".join("Ind{0} 1 1 2\nInd{0} 1 2 2\n".format(x)
+                         for x in range(12)))
+
+    def _worker(job, tracker=None):
+        # Individuals 0-7 in one cluster and 8-11 (too few) in another
+        with open(job.arg.infile) as fhandle:
+            nind = len(fhandle.readlines()) // 2
+        qvals = np.zeros((nind, job.k))
+        qvals[:8, 0] = 1
+        qvals[8:, -1] = 1
+        np.savetxt(os.path.join(job.arg.outpath,
+                                "fS_run_K.{}.meanQ".format(job.k)), qvals)
+        return (0, None)
+
+    def _process(wrapped_prog, arg, finished):
+        return [2]
+
+    arg = mockups.Arguments()
+    arg.infile = str(infile)
+    arg.outpath = str(tmpdir)
+    arg.k_list = [1, 2]
+    arg.replicates = [1]
+    arg.indfile = None
+    arg.popfile = None
+
+    tree = hierarchy.HierarchicalRun(_process, max_depth=2, min_size=5)
+    pool = jp.JobPool(_worker, 2, interval=0.01, callback=tree.job_done)
+    tree.pool = pool
+    jobs = [jp.Job("faststructure", k, 1, arg) for k in arg.k_list]
+    tree.add(hierarchy.Analysis("faststructure", arg, 0), jobs)
+    for job in jobs:
+        pool.submit(job)
+    pool.run()
+
+    assert [x.depth for x in tree.analyses] == [0, 1, 2]
+    assert all(x.done for x in tree.analyses)
+    assert len(pool.finished) == 6
+    assert tree.analyses[2].arg.outpath == str(
+        tmpdir.join("cluster_1", "cluster_1"))
+
+    tree.write_summary(str(tmpdir.join("hierarchy.txt")))
+    summary = tmpdir.join("hierarchy.txt").readlines()
+    assert len(summary) == 4
+    assert summary[1].split() == [".", "0", "all", "2", "8"]
+
+
+def test_hierarchical_split_error(tmpdir):
+    """
+    Tests if a cluster whose input files can not be written is only logged,
+    and if PLINK input files are rejected in hierarchical runs.
+    """
+    infile = tmpdir.join("data.bed")
+    infile.write_binary(bytes([0x6c, 0x1b, 0x01, 0xff, 0xfe, 0x80]))
+
+    def _worker(job, tracker=None):
+        qvals = np.zeros((12, job.k))
+        qvals[:, 0] = 1
+        np.savetxt(os.path.join(job.arg.outpath,
+                                "fS_run_K.{}.meanQ".format(job.k)), qvals)
+        return (0, None)
+
+    arg = mockups.Arguments()
+    arg.infile = str(infile)
+    arg.outpath = str(tmpdir)
+    arg.k_list = [1, 2]
+    arg.replicates = [1]
+    arg.indfile = None
+    arg.popfile = None
+
+    tree = hierarchy.HierarchicalRun(lambda *args: [2], min_size=5)
+    pool = jp.JobPool(_worker, 1, interval=0.01, callback=tree.job_done)
+    tree.pool = pool
+    jobs = [jp.Job("faststructure", k, 1, arg) for k in arg.k_list]
+    tree.add(hierarchy.Analysis("faststructure", arg, 0), jobs)
+    for job in jobs:
+        pool.submit(job)
+    pool.run()
+
+    assert len(tree.analyses) == 1
+    assert tree.analyses[0].done
+    assert tree.analyses[0].clusters == []
+
+    with pytest.raises(SystemExit):
+        argparser.argument_parser(
+            ["run", "-fs", "smalldata/mainparams", "-K", "2", "-i",
+             str(infile), "-o", str(tmpdir), "-t", "1", "--ind",
+             "smalldata/indfile.txt", "--hierarchical"])
@@ -0,0 +1,238 @@
+#!/usr/bin/python3
+
+# Copyright 2017 Francisco Pina Martins <f.pinamartins@gmail.com>
+# This file is part of structure_threader.
+# structure_threader is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# structure_threader is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with structure_threader. If not, see <http://www.gnu.org/licenses/>.
+
+import glob
+import itertools
+import os
+import shutil
+
+import numpy as np
+
+import structure_threader.stats.alignment as al
+import structure_threader.stats.modes as md
+import structure_threader.stats.montecarlo as mc
+import structure_threader.stats.results_store as rs
+import structure_threader.plotter.structplot as sp
+from structure_threader.stats.sketch import QuantileSketch, logit, expit
+
+
+def test_quantile_sketch():
+    """
+    Tests if the QuantileSketch estimates are within their error bounds,
+    including when sketches are merged.
+    """
+    rng = np.random.RandomState(0)
+    data = rng.normal(0, 20, size=(2, 20000))
+    data[1, :100] = -np.inf
+
+    sketch = QuantileSketch(2, width=2e-3)
+    other = QuantileSketch(2, width=2e-3)
+    sketch.add(data[:, :5000])
+    other.add(data[:, 5000:])
+    sketch.merge(other)
+
+    assert sum(x.sum() for x in sketch.counts) == data.size
+    ordered = np.clip(np.sort(data, axis=1), sketch.low, sketch.high)
+    for quant in (0, 0.025, 0.5, 0.975, 1):
+        exact = ordered[:, int(np.floor(quant * (data.shape[1] - 1)))]
+        estimate = sketch.quantile(quant)
+        assert np.all(np.abs(estimate - exact) <= 1e-3)
+    assert np.isclose(sketch.quantile(0)[1], sketch.low, atol=1e-3)
+
+
+def test_logit():
+    """
+    Tests if logit() and expit() are accurate near 0 and 1.
+    """
+    probs = np.array([1e-200, 1e-20, 0.5, 1 - 1e-12])
+    assert np.allclose(expit(logit(np.log(probs))), probs, rtol=1e-10)
+    assert np.isclose(logit(np.log(1 - 1e-12)), -np.log(1e-12), rtol=1e-4)
+
+
+def test_batch_standard_error():
+    """
+    Tests the batch means standard error.
+    """
+    batches = np.array([[1.0, 5.0], [3.0, 5.0]])
+    assert np.allclose(mc.batch_standard_error(batches), [1.0, 0.0])
+    assert np.all(np.isnan(mc.batch_standard_error(batches[:1])))
+
+
+def test_normal_batch():
+    """
+    Tests if normal batches have the right shape and moments, with both
+    samplers (Sobol falls back to pseudo-random draws without scipy).
+    """
+    mean = np.array([0.0, 10.0])
+    sd = np.array([1.0, 0.0])
+    for sampler in mc.SAMPLERS:
+        batch = mc.normal_batch(mean, sd, 4096, mc.check_sampler(sampler))
+        assert batch.shape == (2, 4096)
+        assert abs(batch[0].mean()) < 0.1
+        assert abs(batch[0].std() - 1) < 0.1
+        assert np.all(batch[1] == 10)
+
+
+def test_linear_sum_assignment(monkeypatch):
+    """
+    Tests the Hungarian algorithm against a brute force search.
+    """
+    monkeypatch.setattr(al, "scipy_assignment", None)
+    rng = np.random.RandomState(0)
+    for size in range(1, 7):
+        for _ in range(10):
+            cost = rng.random_sample((size, size))
+            assignment = al.linear_sum_assignment(cost)
+            best = min(cost[range(size), list(x)].sum() for x in
+                       itertools.permutations(range(size)))
+            assert sorted(assignment) == list(range(size))
+            assert np.isclose(cost[range(size), assignment].sum(), best)
+
+
+def test_align_replicates():
+    """
+    Tests that replicates with switched labels are aligned back, and that
+    the clusters of consecutive K values are matched.
+    """
+    rng = np.random.RandomState(1)
+    qvals = rng.dirichlet([0.5] * 4, size=200)
+    permutations = [rng.permutation(4) for _ in range(10)]
+    replicates = [qvals[:, x] for x in permutations]
+
+    aligned, found, mean = al.align_replicates(replicates)
+    assert np.allclose(aligned, replicates[0])
+    assert np.allclose(mean, replicates[0])
+    for perm, rep in zip(found, replicates):
+        assert np.allclose(rep[:, perm], replicates[0])
+
+    # K=3 merges the two last clusters of K=4, in a different order
+    lower = np.c_[qvals[:, 2:].sum(axis=1), qvals[:, 0], qvals[:, 1]]
+    orders = al.align_k({3: lower, 4: qvals[:, [3, 1, 0, 2]]})
+    assert orders[3] == [0, 1, 2]
+    assert orders[4][1:3] == [2, 1] and sorted(orders[4][::3]) == [0, 3]
+
+
+def test_align_runs(tmpdir):
+    """
+    Tests the files written by align_runs(), and that they can replace the
+    values of the plots.
+    """
+    files = sorted(glob.glob("files/fS_run_K.*.meanQ"))
+    qmatrices = dict((sp.PlotK(x, "faststructure").k,
+                      [sp.PlotK(x, "faststructure").qvals]) for x in files)
+    outdir = str(tmpdir.join("aligned"))
+    qfiles = al.align_runs(qmatrices, outdir, "fS_run_K.")
+    assert sorted(qfiles) == [1, 2, 3, 4, 5, 6]
+    for k, filename in qfiles.items():
+        assert filename == tmpdir.join("aligned", "fS_run_K.%d.Q" % k)
+        qvals = np.loadtxt(filename, ndmin=2)
+        original = al.as_matrix(qmatrices[k][0])
+        assert np.allclose(np.sort(qvals, axis=1), np.sort(original, axis=1),
+                           atol=1e-6)
+        assert np.load(filename[:-2] + "_aligned.npy").shape == \
+            (1,) + original.shape
+
+    klist = sp.PlotList(files, "faststructure", qfiles=qfiles)
+    assert np.allclose(klist.kvals[3].qvals, np.loadtxt(qfiles[3]))
+    assert klist.kvals[3].file_path == qfiles[3]
+
+
+def test_modes(tmpdir, monkeypatch):
+    """
+    Tests that replicates that converged to two different solutions are
+    split into two modes, and that the major mode is the one written.
+    """
+    rng = np.random.RandomState(2)
+    major = rng.dirichlet([0.5] * 3, size=100)
+    minor = rng.dirichlet([0.5] * 3, size=100)
+    replicates = [np.clip(major + rng.normal(0, 0.01, major.shape), 0, 1)
+                  [:, rng.permutation(3)] for _ in range(6)]
+    replicates.insert(2, minor)
+    replicates.insert(5, minor[:, ::-1])
+
+    aligned = al.align_replicates(replicates)[0]
+    # Small blocks, so that the similarity matrix is built from several
+    monkeypatch.setattr(md, "BLOCK_SIZE", 3)
+    similarity = md.pairwise_similarity(aligned, threads=2)
+    assert similarity.shape == (8, 8)
+    assert np.allclose(similarity, similarity.T)
+    assert np.allclose(np.diag(similarity), 1)
+
+    modes = md.find_modes(similarity, 0.9)
+    assert [x.members for x in modes] == [[0, 1, 3, 4, 6, 7], [2, 5]]
+    assert modes[0].representative in modes[0].members
+    assert modes[0].similarity > 0.9
+
+    qfiles = al.align_runs({3: replicates}, str(tmpdir), "str_K",
+                           replicates=list(range(1, 9)))
+    assert tmpdir.join("str_K3_modes.txt").readlines()[1:] == [
+        "1\t6\t{:.4f}\t{}\t1,2,4,5,7,8\n".format(
+            modes[0].similarity, modes[0].representative + 1),
+        "2\t2\t1.0000\t3\t3,6\n"]
+    qvals = np.loadtxt(qfiles[3])
+    assert np.allclose(np.sort(qvals, axis=1), np.sort(major, axis=1),
+                       atol=0.03)
+
+
+def test_results_store(tmpdir):
+    """
+    Tests that the results store keeps the Q matrices, labels and statistics
+    of the result files, and ignores the files that changed since.
+    """
+    for k in (2, 3):
+        shutil.copy("files/fS_run_K.{}.meanQ".format(k), str(tmpdir))
+    kfile = str(tmpdir.join("fS_run_K.2.meanQ"))
+    other = str(tmpdir.join("fS_run_K.3.meanQ"))
+    parsed = sp.PlotK(kfile, "faststructure").qvals
+
+    store = rs.ResultsStore(str(tmpdir.join(rs.STORE_DIR)))
+    assert store.qvals(kfile) is None
+    store.add(kfile, "faststructure", parsed, ["a"] * len(parsed),
+              {"marginal_likelihood": [-1.5]}, k=2)
+    sp.PlotK(other, "faststructure", store=store)
+    store.save()
+
+    # A new store reads everything back from the disk
+    store = rs.ResultsStore(str(tmpdir.join(rs.STORE_DIR)))
+    qvals = store.qvals(kfile, "faststructure")
+    assert isinstance(qvals, np.memmap)
+    assert np.array_equal(qvals, parsed)
+    assert store.qvals(kfile, "structure") is None
+    assert store.labels(kfile) == ["a"] * len(parsed)
+    assert store.labels(other) is None
+    assert store.stats(kfile) == {"marginal_likelihood": [-1.5]}
+    assert store.entries[os.path.basename(kfile)]["metadata"] == {"k": 2}
+
+    kobj = sp.PlotK(kfile, "faststructure", get_indv=True, store=store)
+    assert isinstance(kobj.qvals, np.memmap)
+    assert kobj.k == 2 and kobj.indv == ["a"] * len(parsed)
+    kobj = sp.PlotK(other, "faststructure", store=store)
+    assert isinstance(kobj.qvals, np.memmap) and kobj.k == 3
+
+    # Changed files are parsed again, and replace their old entry
+    with open(kfile, "a") as fhandle:
+        fhandle.write("0.5 0.5\n")
+    assert store.qvals(kfile) is None
+    kobj = sp.PlotK(kfile, "faststructure", store=store)
+    assert not isinstance(kobj.qvals, np.memmap)
+    assert len(kobj.qvals) == len(parsed) + 1
+    store.save()
+    assert len(store.qvals(kfile)) == len(parsed) + 1
+    # The labels of the old entry are no longer used
+    assert store.labels(kfile) is None
+    assert sorted(os.listdir(store.directory)) == sorted(
+        [rs.INDEX_FILE] + [x["qfile"] for x in store.entries.values()])